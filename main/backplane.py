@@ -0,0 +1,597 @@
+"""
+여러 서버(노드)가 방 이벤트를 공유하기 위한 backplane.
+
+노드는 방 이벤트(드로잉/채팅/알림)를 직접 적용하지 않고 backplane에 publish하며,
+backplane이 방마다 시퀀스 번호를 붙여 그 방을 subscribe한 모든 노드(보낸 노드 포함)에
+같은 순서로 전달한다. 노드는 받은 이벤트를 자신의 방 히스토리에 적용하고 로컬
+클라이언트에게만 전달하므로 모든 노드에서 방의 이벤트 순서가 같다.
+
+방을 처음 subscribe하면 backplane이 가진 방 상태(압축된 획 + tail + 최근 채팅)를
+스냅샷으로 먼저 보내고, 이후 이벤트를 이어서 보낸다. 노드가 시퀀스 번호의 빈틈을
+발견하면 resync로 스냅샷을 다시 받는다.
+
+구현
+- LocalHub / LocalBackplane: 한 프로세스 안의 여러 ChatServer가 공유 (테스트/벤치마크용)
+- BrokerServer / SocketBackplane: 로컬 TCP 또는 Unix 소켓 브로커 (여러 프로세스/서버)
+
+리스너(ChatServer)는 on_room_event(방, seq, 메시지)와 on_room_snapshot(방, 스냅샷)을
+구현한다.
+
+    python backplane.py --listen tcp://127.0.0.1:9100
+"""
+
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+import protocol
+from history import DrawingHistory
+from outbound import OutboundQueue, send_buffers, remaining_buffers
+
+LENGTH = struct.Struct("<I")
+
+
+def encode_message(message):
+    body = json.dumps(message).encode("utf-8")
+    return LENGTH.pack(len(body)) + body
+
+
+def parse_address(text):
+    """"tcp://호스트:포트" 또는 "unix:///경로"를 socket 주소로 변환"""
+    if text.startswith("unix://"):
+        return text[len("unix://") :]
+    if text.startswith("tcp://"):
+        text = text[len("tcp://") :]
+    host, _, port = text.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+def open_socket(address):
+    family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+    return socket.socket(family, socket.SOCK_STREAM)
+
+
+def valid_message(message):
+    """publish할 방 이벤트가 방 상태에 적용할 수 있는 형태인지 (드로잉 이벤트는 좌표까지 확인)"""
+    if not isinstance(message, dict):
+        return False
+    kind = message.get("k")
+    if kind == "draw":
+        event = message.get("m")
+        return isinstance(event, dict) and protocol.valid_draw_event(event)
+    return kind in ("chat", "notice", "finish")
+
+
+def read_messages(sock, handle, on_error=None):
+    """
+    길이 + JSON 메시지를 연결이 끊길 때까지 읽어서 handle(dict)로 전달.
+    메시지 하나를 처리하다 난 오류는 on_error(예외)로 알리고 다음 메시지를 계속 읽음
+    """
+    buffer = b""
+    while True:
+        try:
+            data = sock.recv(262144)
+        except OSError:
+            return
+        if not data:
+            return
+        buffer += data
+        pos = 0
+        while len(buffer) - pos >= LENGTH.size:
+            (size,) = LENGTH.unpack_from(buffer, pos)
+            end = pos + LENGTH.size + size
+            if end > len(buffer):
+                break
+            try:
+                handle(json.loads(buffer[pos + LENGTH.size : end]))
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(e)
+            pos = end
+        buffer = buffer[pos:]
+
+
+def write_queue(sock, queue):
+    """OutboundQueue에 쌓인 메시지를 sendmsg로 모아서 전송 (연결이 끊기면 종료)"""
+    while True:
+        buffers = queue.wait_take()
+        if buffers is None:
+            return
+        size = sum(len(buf) for buf in buffers)
+        calls = 0
+        try:
+            while buffers:
+                sent = send_buffers(sock, buffers)
+                calls += 1
+                buffers = remaining_buffers(buffers, sent)
+        except OSError:
+            return
+        queue.mark_sent(size, calls)
+
+
+class RoomState:
+    """backplane이 관리하는 방 하나의 시퀀스 번호와 상태 (스냅샷용)"""
+
+    def __init__(self, history_max_points=500000, chat_history_size=200):
+        self.seq = 0
+        self.history = DrawingHistory(max_points=history_max_points)
+        self.chat = deque(maxlen=chat_history_size)
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def apply(self, message):
+        """메시지에 다음 시퀀스 번호를 붙이고 방 상태에 반영 (lock 안에서 호출)"""
+        self.seq += 1
+        kind = message["k"]
+        if kind == "draw":
+            self.history.append(message["m"], sender=message["u"])
+        elif kind == "chat":
+            self.chat.append(message["m"])
+        elif kind == "finish":
+            self.history.finish_sender(message["u"])
+        return self.seq
+
+    def snapshot(self):
+        """현재 상태 (lock 안에서 호출). 이 seq까지의 이벤트가 모두 반영되어 있음"""
+        strokes, tail = self.history.export()
+        return {
+            "seq": self.seq,
+            "history_seq": self.history.seq,
+            "strokes": strokes,
+            "tail": tail,
+            "chat": list(self.chat),
+        }
+
+
+class LocalHub:
+    """한 프로세스 안의 여러 노드가 공유하는 backplane 중계자"""
+
+    def __init__(self, history_max_points=500000, chat_history_size=200):
+        self.history_max_points = history_max_points
+        self.chat_history_size = chat_history_size
+        self.rooms = {}
+        self.lock = threading.Lock()
+        # 전달 대기 중인 (받을 노드들, 방, seq, 메시지). 한 스레드만 순서대로 전달
+        self.outbox = deque()
+        self.delivering = threading.Lock()
+
+    def room(self, name):
+        with self.lock:
+            state = self.rooms.get(name)
+            if state is None:
+                state = self.rooms[name] = RoomState(
+                    self.history_max_points, self.chat_history_size
+                )
+            return state
+
+    def publish(self, name, message):
+        if not valid_message(message):
+            return
+        state = self.room(name)
+        with state.lock:
+            seq = state.apply(message)
+            self.outbox.append((list(state.subscribers), name, seq, message))
+        self.drain()
+
+    def drain(self):
+        # 이벤트 처리 중에 다시 publish되어도(재귀) 순서가 바뀌지 않도록
+        # 전달은 outbox에서 한 스레드가 차례로 꺼내서 처리
+        while self.outbox:
+            if not self.delivering.acquire(blocking=False):
+                return
+            try:
+                while self.outbox:
+                    nodes, name, seq, message = self.outbox.popleft()
+                    for node in nodes:
+                        node.listener.on_room_event(name, seq, message)
+            finally:
+                self.delivering.release()
+
+    def subscribe(self, node, name):
+        state = self.room(name)
+        with state.lock:
+            if node not in state.subscribers:
+                state.subscribers.append(node)
+            snapshot = state.snapshot()
+        node.listener.on_room_snapshot(name, snapshot)
+
+    def unsubscribe(self, node):
+        with self.lock:
+            states = list(self.rooms.values())
+        for state in states:
+            with state.lock:
+                if node in state.subscribers:
+                    state.subscribers.remove(node)
+
+
+class LocalBackplane:
+    """LocalHub에 연결된 노드 하나의 backplane"""
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.listener = None
+        self.published = 0
+
+    def start(self, listener):
+        self.listener = listener
+
+    def publish(self, room, message, droppable=False):
+        if not valid_message(message):
+            return
+        self.published += 1
+        self.hub.publish(room, message)
+
+    def subscribe(self, room):
+        """방의 스냅샷을 받아 적용한 뒤 반환하고, 이후 이벤트를 받기 시작"""
+        self.hub.subscribe(self, room)
+
+    def resync(self, room):
+        self.hub.subscribe(self, room)
+
+    def fetch_history(self, room):
+        state = self.hub.room(room)
+        with state.lock:
+            return state.snapshot()
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+    def stats(self):
+        return {"type": "local", "published": self.published}
+
+
+class BrokerServer:
+    """
+    로컬 TCP/Unix 소켓 backplane 브로커.
+    방마다 시퀀스 번호를 붙이고 subscribe한 연결에 같은 순서로 전달한다.
+    """
+
+    def __init__(
+        self,
+        address,
+        history_max_points=500000,
+        chat_history_size=200,
+        queue_max_bytes=64 << 20,
+    ):
+        self.address = address
+        self.history_max_points = history_max_points
+        self.chat_history_size = chat_history_size
+        self.queue_max_bytes = queue_max_bytes
+        self.rooms = {}
+        self.lock = threading.Lock()
+        self.connections = {}  # 소켓 -> OutboundQueue
+        self.listener = None
+        self.running = False
+        # 통계
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+        self.rejected = 0  # 형식이 잘못되어 적용하지 않은 pub
+        self.errors = 0  # 처리하다 오류가 나서 건너뛴 메시지
+
+    def start(self):
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+        self.listener = open_socket(self.address)
+        if not isinstance(self.address, str):
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(self.address)
+        self.listener.listen()
+        if not isinstance(self.address, str):
+            self.address = self.listener.getsockname()
+        self.running = True
+        threading.Thread(target=self.accept_nodes, daemon=True).start()
+
+    def room(self, name):
+        with self.lock:
+            state = self.rooms.get(name)
+            if state is None:
+                state = self.rooms[name] = RoomState(
+                    self.history_max_points, self.chat_history_size
+                )
+            return state
+
+    def accept_nodes(self):
+        while self.running:
+            try:
+                sock, _ = self.listener.accept()
+            except OSError:
+                break
+            queue = OutboundQueue(self.queue_max_bytes, 1 << 20, "drop_oldest")
+            with self.lock:
+                self.connections[sock] = queue
+            threading.Thread(target=write_queue, args=(sock, queue), daemon=True).start()
+            threading.Thread(target=self.serve_node, args=(sock,), daemon=True).start()
+
+    def serve_node(self, sock):
+        try:
+            read_messages(sock, lambda message: self.handle(sock, message), self.on_error)
+        finally:
+            self.drop_node(sock)
+
+    def on_error(self, error):
+        # 잘못된 메시지 하나 때문에 노드 연결을 끊지 않고 건너뜀
+        self.errors += 1
+        print(f"backplane 메시지 처리 오류 (건너뜀): {error!r}")
+
+    def handle(self, sock, message):
+        op = message["op"]
+        if op == "pub":
+            if not valid_message(message.get("m")):
+                self.rejected += 1
+                return
+            state = self.room(message["room"])
+            with state.lock:
+                seq = state.apply(message["m"])
+                frame = encode_message(
+                    {"op": "ev", "room": message["room"], "seq": seq, "m": message["m"]}
+                )
+                self.published += 1
+                for node in state.subscribers:
+                    # 버려진 이벤트는 받는 노드가 seq 빈틈으로 알아채고 resync
+                    if self.push(node, frame, droppable=message.get("drop", False)):
+                        self.delivered += 1
+        elif op == "sub":
+            state = self.room(message["room"])
+            with state.lock:
+                if sock not in state.subscribers:
+                    state.subscribers.append(sock)
+                snapshot = state.snapshot()
+                self.push(
+                    sock,
+                    encode_message(
+                        {"op": "snapshot", "room": message["room"], "snapshot": snapshot}
+                    ),
+                )
+        elif op == "fetch":
+            state = self.room(message["room"])
+            with state.lock:
+                snapshot = state.snapshot()
+            self.push(
+                sock,
+                encode_message({"op": "history", "id": message["id"], "snapshot": snapshot}),
+            )
+
+    def push(self, sock, frame, droppable=False):
+        queue = self.connections.get(sock)
+        if queue is None:
+            return False
+        if not queue.push(frame, droppable=droppable, force=not droppable):
+            self.overflows += 1
+            return False
+        return True
+
+    def drop_node(self, sock):
+        with self.lock:
+            queue = self.connections.pop(sock, None)
+            states = list(self.rooms.values())
+        if queue:
+            queue.close()
+        for state in states:
+            with state.lock:
+                if sock in state.subscribers:
+                    state.subscribers.remove(sock)
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+    def close(self):
+        self.running = False
+        try:
+            self.listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.listener.close()
+        for sock in list(self.connections):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if isinstance(self.address, str):
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self.lock:
+            rooms = {name: state.seq for name, state in self.rooms.items()}
+        return {
+            "nodes": len(self.connections),
+            "rooms": rooms,
+            "published": self.published,
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
+
+
+class SocketBackplane:
+    """
+    BrokerServer에 접속하는 노드 하나의 backplane.
+    연결이 끊기면 다시 접속하고, subscribe했던 방의 스냅샷을 다시 받는다.
+    """
+
+    def __init__(self, address, connect_timeout=10, queue_max_bytes=64 << 20):
+        self.address = parse_address(address) if isinstance(address, str) and "://" in address else address
+        self.connect_timeout = connect_timeout
+        self.queue_max_bytes = queue_max_bytes
+        self.listener = None
+        self.sock = None
+        self.queue = None
+        self.running = False
+        self.rooms = set()
+        self.lock = threading.Lock()
+        self.waiting = {}  # 방 또는 요청 번호 -> (Event, 결과 목록)
+        self.request_id = 0
+        # 통계
+        self.published = 0
+        self.dropped = 0  # 연결이 끊긴 동안 보내지 못한 이벤트
+        self.reconnects = 0
+        self.rejected = 0  # 형식이 잘못되어 publish하지 않은 이벤트
+        self.errors = 0  # 처리하다 오류가 나서 건너뛴 메시지
+
+    def start(self, listener):
+        self.listener = listener
+        self.running = True
+        self.connect()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def connect(self):
+        deadline = time.time() + self.connect_timeout
+        delay = 0.05
+        while self.running:
+            sock = open_socket(self.address)
+            try:
+                sock.connect(self.address)
+            except OSError:
+                sock.close()
+                if time.time() > deadline:
+                    raise ConnectionError(f"backplane 브로커에 접속할 수 없음: {self.address}")
+                time.sleep(delay)
+                delay = min(delay * 2, 1)
+                continue
+            queue = OutboundQueue(self.queue_max_bytes, 1 << 20, "drop_oldest")
+            threading.Thread(target=write_queue, args=(sock, queue), daemon=True).start()
+            with self.lock:
+                self.sock, self.queue = sock, queue
+                rooms = list(self.rooms)
+            for room in rooms:
+                self.send({"op": "sub", "room": room})
+            return
+
+    def run(self):
+        while self.running:
+            read_messages(self.sock, self.handle, self.on_error)
+            with self.lock:
+                queue, self.queue = self.queue, None
+            if queue:
+                queue.close()
+            if not self.running:
+                break
+            self.reconnects += 1
+            try:
+                self.connect()  # 다시 접속하면 방마다 스냅샷부터 다시 받음
+            except ConnectionError:
+                time.sleep(1)
+
+    def on_error(self, error):
+        # 이벤트 하나 때문에 수신 스레드가 끝나면 다른 노드의 방 이벤트를 더 받지 못함
+        self.errors += 1
+        log = getattr(self.listener, "log_message", print)
+        log(f"backplane 메시지 처리 오류 (건너뜀): {error!r}")
+
+    def handle(self, message):
+        op = message["op"]
+        if op == "ev":
+            self.listener.on_room_event(message["room"], message["seq"], message["m"])
+        elif op == "snapshot":
+            self.listener.on_room_snapshot(message["room"], message["snapshot"])
+            self.wake(message["room"], message["snapshot"])
+        elif op == "history":
+            self.wake(message["id"], message["snapshot"])
+
+    def wake(self, key, result):
+        with self.lock:
+            waiter = self.waiting.pop(key, None)
+        if waiter:
+            waiter[1].append(result)
+            waiter[0].set()
+
+    def send(self, message, droppable=False):
+        with self.lock:
+            queue = self.queue
+        if queue is None or not queue.push(
+            encode_message(message), droppable=droppable, force=not droppable
+        ):
+            self.dropped += 1
+            return False
+        return True
+
+    def request(self, key, message, timeout):
+        waiter = (threading.Event(), [])
+        with self.lock:
+            self.waiting[key] = waiter
+        self.send(message)
+        if not waiter[0].wait(timeout):
+            with self.lock:
+                self.waiting.pop(key, None)
+            raise TimeoutError("backplane 응답 없음")
+        return waiter[1][0]
+
+    def publish(self, room, message, droppable=False):
+        if not valid_message(message):
+            # 브로커와 다른 노드의 방 상태에 적용할 수 없는 이벤트는 보내지 않음
+            self.rejected += 1
+            return
+        self.published += 1
+        self.send({"op": "pub", "room": room, "m": message, "drop": droppable}, droppable)
+
+    def subscribe(self, room, timeout=10):
+        """방의 스냅샷을 받아 적용할 때까지 기다리고, 이후 이벤트를 받기 시작"""
+        with self.lock:
+            self.rooms.add(room)
+        self.request(room, {"op": "sub", "room": room}, timeout)
+
+    def resync(self, room):
+        self.send({"op": "sub", "room": room})
+
+    def fetch_history(self, room, timeout=10):
+        with self.lock:
+            self.request_id += 1
+            key = self.request_id
+        return self.request(key, {"op": "fetch", "room": room, "id": key}, timeout)
+
+    def close(self):
+        self.running = False
+        with self.lock:
+            sock, queue = self.sock, self.queue
+        if queue:
+            queue.wait_empty(1)
+            queue.close()
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def stats(self):
+        return {
+            "type": "socket",
+            "address": self.address,
+            "published": self.published,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "rooms": sorted(self.rooms),
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="backplane 브로커")
+    parser.add_argument(
+        "--listen",
+        default="tcp://127.0.0.1:9100",
+        help="tcp://호스트:포트 또는 unix:///경로",
+    )
+    args = parser.parse_args()
+    broker = BrokerServer(parse_address(args.listen))
+    broker.start()
+    print(f"backplane 브로커 시작: {args.listen}")
+    try:
+        while True:
+            time.sleep(10)
+            print(broker.stats())
+    except KeyboardInterrupt:
+        broker.close()
@@ -0,0 +1,2427 @@
+"""
+서버 성능 측정용 벤치마크 스크립트 (GUI 없이 실행)
+
+사용 예:
+    python benchmark.py engines --clients 100 500 1000 2000
+    python benchmark.py syscalls --receivers 50 --drawers 4 --rate 60
+    python benchmark.py wire --events 100000
+    python benchmark.py restart --events 10000 100000 1000000
+    python benchmark.py workers --workers 1 2 4 --receivers 200 --drawers 8
+    python benchmark.py backplane --nodes 3 --backplane local tcp
+    python benchmark.py framer --events 100000
+    python benchmark.py load --clients 50 --drawers 4 --chatters 4 --json load.json
+    python benchmark.py resume --history 10000 --gaps 10 100 1000 5000 --window 2000
+    python benchmark.py compress --history 1000 10000 100000 --batches 1 4 16 64
+"""
+
+import argparse
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def raise_fd_limit():
+    # 수천 개의 연결을 열 수 있도록 파일 디스크립터 제한을 최대치로 올림
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def read_proc_status(pid):
+    """/proc/<pid>/status 에서 RSS(kB)와 스레드 수를 읽음"""
+    info = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key == "VmRSS":
+                info["rss_kb"] = int(value.split()[0])
+            elif key == "VmHWM":
+                info["rss_peak_kb"] = int(value.split()[0])
+            elif key == "Threads":
+                info["threads"] = int(value)
+    return info
+
+
+def read_proc_cpu(pid):
+    """/proc/<pid>/stat 의 utime+stime(초)"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def start_server_process(mode, port, extra_args=()):
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "benchmark.py"), "serve",
+         "--mode", mode, "--port", str(port), *extra_args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        cwd=HERE,
+    )
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("서버 프로세스가 시작되지 않았습니다")
+
+
+def stop_server_process(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def drain(sockets, quiet=0.2):
+    """더 이상 도착하는 데이터가 없을 때까지 모든 소켓의 수신 버퍼를 비움"""
+    sel = selectors.DefaultSelector()
+    for s in sockets:
+        sel.register(s, selectors.EVENT_READ)
+    while True:
+        events = sel.select(timeout=quiet)
+        if not events:
+            break
+        for key, _ in events:
+            try:
+                if not key.fileobj.recv(65536):
+                    sel.unregister(key.fileobj)
+            except OSError:
+                sel.unregister(key.fileobj)
+    sel.close()
+
+
+def wait_for_line(sock, needle, timeout=60):
+    sock.settimeout(timeout)
+    buffer = b""
+    while needle not in buffer:
+        data = sock.recv(65536)
+        if not data:
+            raise RuntimeError("서버 연결이 끊어졌습니다")
+        buffer += data
+    sock.settimeout(None)
+
+
+def measure_fanout(sender, receivers, payload, timeout=30):
+    """sender가 보낸 한 줄이 모든 receivers에 도착할 때까지의 시간(초)"""
+    sel = selectors.DefaultSelector()
+    for s in receivers:
+        sel.register(s, selectors.EVENT_READ)
+    remaining = len(receivers)
+    start = time.perf_counter()
+    sender.sendall(payload)
+    deadline = start + timeout
+    while remaining and time.perf_counter() < deadline:
+        for key, _ in sel.select(timeout=1):
+            data = key.fileobj.recv(65536)
+            if b"\n" in data or not data:
+                sel.unregister(key.fileobj)
+                remaining -= 1
+    elapsed = time.perf_counter() - start
+    sel.close()
+    return elapsed if remaining == 0 else None
+
+
+def run_engine_case(mode, count, rounds):
+    port = free_port()
+    proc = start_server_process(mode, port)
+    sockets = []
+    try:
+        base = read_proc_status(proc.pid)
+        for _ in range(count):
+            sockets.append(socket.create_connection(("127.0.0.1", port)))
+        # 마지막 접속자가 자신의 접속 알림을 받으면 모든 accept가 끝난 것
+        wait_for_line(sockets[-1], f"User{count + 1} 접속".encode("utf-8"))
+        drain(sockets)
+        status = read_proc_status(proc.pid)
+        cpu_before = read_proc_cpu(proc.pid)
+        latencies = []
+        for i in range(rounds):
+            elapsed = measure_fanout(
+                sockets[0], sockets[1:], f"ping {i}\n".encode("utf-8")
+            )
+            if elapsed is not None:
+                latencies.append(elapsed * 1000)
+        cpu = read_proc_cpu(proc.pid) - cpu_before
+        return {
+            "mode": mode,
+            "clients": count,
+            "rss_kb": status["rss_kb"],
+            "rss_per_client_kb": round(
+                (status["rss_kb"] - base["rss_kb"]) / count, 2
+            ),
+            "threads": status["threads"],
+            "fanout_ms_median": round(statistics.median(latencies), 3)
+            if latencies
+            else None,
+            "fanout_ms_max": round(max(latencies), 3) if latencies else None,
+            "server_cpu_s": round(cpu, 3),
+        }
+    finally:
+        for s in sockets:
+            s.close()
+        stop_server_process(proc)
+
+
+def cmd_engines(args):
+    raise_fd_limit()
+    results = []
+    for count in args.clients:
+        for mode in ("thread", "selector"):
+            result = run_engine_case(mode, count, args.rounds)
+            results.append(result)
+            print(
+                f"{mode:>8} clients={count:<6} rss={result['rss_kb']:>8}kB "
+                f"({result['rss_per_client_kb']}kB/client) "
+                f"threads={result['threads']:<6} "
+                f"fanout median={result['fanout_ms_median']}ms "
+                f"max={result['fanout_ms_max']}ms cpu={result['server_cpu_s']}s"
+            )
+    # selector 모드가 메모리와 지연 시간 모두에서 앞서는 최소 연결 수
+    crossover = None
+    for count in args.clients:
+        pair = {r["mode"]: r for r in results if r["clients"] == count}
+        t, s = pair["thread"], pair["selector"]
+        if (
+            s["rss_kb"] < t["rss_kb"]
+            and s["fanout_ms_median"] is not None
+            and t["fanout_ms_median"] is not None
+            and s["fanout_ms_median"] <= t["fanout_ms_median"]
+        ):
+            crossover = count
+            break
+    print(f"selector 모드 우위 시작 연결 수: {crossover}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"engines": results, "crossover": crossover}, f, indent=2)
+
+
+def start_reader(sockets):
+    """백그라운드에서 모든 소켓을 계속 읽어 주는 스레드 (수신 측 흉내)"""
+    stop = threading.Event()
+
+    def run():
+        sel = selectors.DefaultSelector()
+        for s in sockets:
+            sel.register(s, selectors.EVENT_READ)
+        while not stop.is_set():
+            for key, _ in sel.select(timeout=0.1):
+                try:
+                    if not key.fileobj.recv(262144, socket.MSG_DONTWAIT):
+                        sel.unregister(key.fileobj)
+                except BlockingIOError:
+                    pass
+                except OSError:
+                    sel.unregister(key.fileobj)
+        sel.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return stop, thread
+
+
+def queue_totals(server):
+    totals = {"send_calls": 0, "sent_messages": 0}
+    for item in server.queue_stats():
+        for key in totals:
+            totals[key] += item[key]
+    return totals
+
+
+def run_syscall_case(mode, batch, receivers, drawers, events, rate):
+    sys.path.insert(0, HERE)
+    from server import ChatServer
+
+    port = free_port()
+    server = ChatServer("127.0.0.1", port, mode=mode, batch_writes=batch)
+    server.log_message = lambda msg: None
+    server.start_server()
+    sockets = [socket.create_connection(("127.0.0.1", port)) for _ in range(receivers)]
+    senders = [socket.create_connection(("127.0.0.1", port)) for _ in range(drawers)]
+    time.sleep(0.3)
+    stop, reader = start_reader(sockets + senders)
+    time.sleep(0.2)
+    before = queue_totals(server)
+
+    def draw(sock):
+        # 한 획: start, move * events, end
+        interval = 1.0 / rate if rate else 0
+        points = [("start", 0, 0)]
+        points += [("move", i % 400, i % 300) for i in range(events)]
+        points.append(("end", 0, 0))
+        for action, x, y in points:
+            line = json.dumps({"type": "draw", "action": action, "x": x, "y": y})
+            sock.sendall((line + "\n").encode("utf-8"))
+            if interval:
+                time.sleep(interval)
+
+    threads = [threading.Thread(target=draw, args=(s,)) for s in senders]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 모든 큐가 비워질 때까지 대기
+    deadline = time.time() + 30
+    while time.time() < deadline and any(
+        item["messages"] for item in server.queue_stats()
+    ):
+        time.sleep(0.05)
+    time.sleep(0.2)
+    after = queue_totals(server)
+    stop.set()
+    reader.join()
+    for s in sockets + senders:
+        s.close()
+    server.stop_server()
+    delivered = after["sent_messages"] - before["sent_messages"]
+    calls = after["send_calls"] - before["send_calls"]
+    return {
+        "mode": mode,
+        "batch_writes": batch,
+        "delivered_events": delivered,
+        "send_syscalls": calls,
+        "syscalls_per_event": round(calls / delivered, 4) if delivered else None,
+    }
+
+
+def cmd_syscalls(args):
+    results = []
+    for mode in ("thread", "selector"):
+        for batch in (False, True):
+            result = run_syscall_case(
+                mode, batch, args.receivers, args.drawers, args.events, args.rate
+            )
+            results.append(result)
+            print(
+                f"{mode:>8} batch={'on ' if batch else 'off'} "
+                f"delivered={result['delivered_events']:<8} "
+                f"send syscalls={result['send_syscalls']:<8} "
+                f"per event={result['syscalls_per_event']}"
+            )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"syscalls": results}, f, indent=2)
+
+
+def make_strokes(events, seed=1):
+    """마우스 드래그와 비슷한 획 데이터 (작은 보폭의 랜덤 워크) 생성"""
+    import random
+
+    rng = random.Random(seed)
+    points = []
+    while len(points) < events:
+        x, y = rng.randint(0, 399), rng.randint(0, 299)
+        points.append(("start", x, y))
+        for _ in range(rng.randint(30, 300)):
+            x = min(399, max(0, x + rng.randint(-6, 6)))
+            y = min(299, max(0, y + rng.randint(-6, 6)))
+            points.append(("move", x, y))
+        points.append(("end", x, y))
+    return points[:events]
+
+
+def cmd_wire(args):
+    sys.path.insert(0, HERE)
+    import protocol
+
+    points = make_strokes(args.events)
+    json_stream = b"".join(
+        (
+            json.dumps({"type": "draw", "action": a, "x": x, "y": y}) + "\n"
+        ).encode("utf-8")
+        for a, x, y in points
+    )
+    abs_stream = b"".join(protocol.encode_draw(a, x, y) for a, x, y in points)
+    encoder = protocol.DeltaEncoder(use_delta=True)
+    delta_stream = b"".join(encoder.encode(a, x, y) for a, x, y in points)
+
+    def parse_json(stream):
+        frames, _ = protocol.split_frames(stream)
+        return [json.loads(frame.decode("utf-8")) for frame in frames]
+
+    def parse_binary(stream):
+        decoder = protocol.DeltaDecoder()
+        frames, _ = protocol.split_frames(stream)
+        return [decoder.decode(frame) for frame in frames]
+
+    results = []
+    for name, stream, parse in (
+        ("json", json_stream, parse_json),
+        ("binary", abs_stream, parse_binary),
+        ("binary+delta", delta_stream, parse_binary),
+    ):
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            decoded = parse(stream)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        assert len(decoded) == len(points)
+        result = {
+            "format": name,
+            "bytes_per_event": round(len(stream) / len(points), 2),
+            "parse_us_per_event": round(best / len(points) * 1e6, 3),
+        }
+        results.append(result)
+        print(
+            f"{name:>13} bytes/event={result['bytes_per_event']:<7} "
+            f"parse={result['parse_us_per_event']}us/event"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"wire": results}, f, indent=2)
+
+
+def make_stroke_events(events, batch=16):
+    """make_strokes의 move를 batch개씩 묶어 클라이언트가 보내는 segment 이벤트로 변환"""
+    result = []
+    pending = []
+
+    def flush():
+        if pending:
+            result.append({"type": "draw", "action": "segment", "points": pending[:]})
+            pending.clear()
+
+    for action, x, y in make_strokes(events * batch):
+        if action == "move":
+            pending.append([x, y])
+            if len(pending) >= batch:
+                flush()
+            continue
+        flush()
+        result.append({"type": "draw", "action": action, "x": x, "y": y})
+        if len(result) >= events:
+            break
+    return result[:events]
+
+
+def run_restart_case(events, checkpoint_every, clean):
+    import shutil
+    import tempfile
+
+    from room import Room, DEFAULT_ROOM
+
+    directory = tempfile.mkdtemp(prefix="journal-bench-")
+    try:
+        writer = Room(DEFAULT_ROOM, checkpoint_every=checkpoint_every)
+        writer.open_journal(directory, fsync_policy="never")
+        stroke_events = make_stroke_events(events)
+        start = time.perf_counter()
+        for event in stroke_events:
+            with writer.lock:
+                writer.record_draw(event, "bench", "bench")
+        append_seconds = time.perf_counter() - start
+        if clean:
+            writer.close_journal()  # 종료 시 마지막 체크포인트 저장
+        else:
+            # 비정상 종료: 마지막 체크포인트 이후 레코드는 세그먼트에만 있음
+            writer.journal.close()
+            writer.journal = None
+        disk_bytes = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for name in os.listdir(directory)
+        )
+
+        reader = Room(DEFAULT_ROOM)
+        stats = reader.open_journal(directory, fsync_policy="never")
+        reader.close_journal()
+        assert stats["strokes"] == len(writer.drawing_events.strokes) + len(
+            writer.drawing_events.active
+        )
+        return {
+            "events": events,
+            "checkpoint_every": checkpoint_every,
+            "clean_shutdown": clean,
+            "append_us_per_event": round(append_seconds / events * 1e6, 2),
+            "disk_bytes": disk_bytes,
+            "replayed_records": stats["records"],
+            "strokes": stats["strokes"],
+            "load_ms": round(stats["load_seconds"] * 1000, 1),
+            "restart_ms": round(stats["total_seconds"] * 1000, 1),
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def cmd_restart(args):
+    sys.path.insert(0, HERE)
+    results = []
+    for events in args.events:
+        for checkpoint_every, clean in (
+            (events + 1, False),  # 체크포인트 없이 저널만 재생
+            (args.checkpoint_every, False),  # 주기적 체크포인트 + 남은 tail 재생
+            (args.checkpoint_every, True),  # 정상 종료 (체크포인트만 읽음)
+        ):
+            result = run_restart_case(events, checkpoint_every, clean)
+            results.append(result)
+            label = "journal only" if checkpoint_every > events else (
+                "checkpoint+clean" if clean else "checkpoint+tail"
+            )
+            print(
+                f"{events:>9} events {label:>16} "
+                f"disk={result['disk_bytes'] / 1024:>9.1f}kB "
+                f"replayed={result['replayed_records']:<8} "
+                f"restart={result['restart_ms']}ms "
+                f"append={result['append_us_per_event']}us/event"
+            )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"restart": results}, f, indent=2)
+
+
+def count_receiver(port, count, expected, ready, results):
+    """
+    (workers 벤치마크용 하위 프로세스) 수신 클라이언트 count개를 접속시키고
+    각자 드로잉 이벤트 expected개를 받을 때까지 읽은 뒤 (받은 수, 마지막 수신 시각)을 보고
+    """
+    raise_fd_limit()
+    sockets = [socket.create_connection(("127.0.0.1", port)) for _ in range(count)]
+    sel = selectors.DefaultSelector()
+    received = {}
+    for s in sockets:
+        s.setblocking(False)
+        sel.register(s, selectors.EVENT_READ)
+        received[s] = 0
+    ready.send(True)
+    pending = count
+    last = None
+    deadline = None
+    while pending:
+        if deadline is None and ready.poll(0):
+            ready.recv()  # 전송 시작 신호
+            deadline = time.time() + 120
+        if deadline is not None and time.time() > deadline:
+            break
+        for key, _ in sel.select(timeout=0.1):
+            try:
+                data = key.fileobj.recv(262144)
+            except BlockingIOError:
+                continue
+            except OSError:
+                data = b""
+            if not data:
+                sel.unregister(key.fileobj)
+                pending -= 1
+                continue
+            before = received[key.fileobj]
+            received[key.fileobj] += data.count(b'"draw"')
+            if before < expected <= received[key.fileobj]:
+                pending -= 1
+                last = time.time()
+    results.send((sum(min(n, expected) for n in received.values()), last))
+    for s in sockets:
+        s.close()
+
+
+def run_workers_case(workers, receivers, drawers, events, processes):
+    import multiprocessing
+
+    port = free_port()
+    proc = start_server_process(
+        "selector", port, ["--workers", str(workers)]
+    )
+    time.sleep(1)  # 모든 워커가 listen하고 버스로 서로 연결될 때까지 대기
+    children = []
+    drawer_sockets = []
+    try:
+        expected = drawers * events
+        per_process = [receivers // processes + (i < receivers % processes) for i in range(processes)]
+        for count in per_process:
+            ready_parent, ready_child = multiprocessing.Pipe()
+            result_parent, result_child = multiprocessing.Pipe()
+            child = multiprocessing.Process(
+                target=count_receiver,
+                args=(port, count, expected, ready_child, result_child),
+                daemon=True,
+            )
+            child.start()
+            children.append((child, ready_parent, result_parent))
+        for _, ready, _ in children:
+            ready.recv()
+        drawer_sockets = [
+            socket.create_connection(("127.0.0.1", port)) for _ in range(drawers)
+        ]
+        stop, reader = start_reader(drawer_sockets)
+        time.sleep(1)  # hello_timeout 이후 히스토리 동기화가 끝나야 실시간 이벤트를 받음
+        cpu_before = sum(read_proc_cpu(pid) for pid in server_pids(proc))
+        payloads = [
+            "".join(
+                json.dumps({"type": "draw", "action": "move", "x": d, "y": i}) + "\n"
+                for i in range(events)
+            ).encode("utf-8")
+            for d in range(drawers)
+        ]
+        for _, ready, _ in children:
+            ready.send(True)
+        start = time.time()
+        senders = [
+            threading.Thread(target=s.sendall, args=(payload,))
+            for s, payload in zip(drawer_sockets, payloads)
+        ]
+        for t in senders:
+            t.start()
+        for t in senders:
+            t.join()
+        delivered = 0
+        finished = start
+        for child, _, results in children:
+            count, last = results.recv()
+            delivered += count
+            if last:
+                finished = max(finished, last)
+            child.join()
+        elapsed = finished - start
+        cpu = sum(read_proc_cpu(pid) for pid in server_pids(proc)) - cpu_before
+        stop.set()
+        reader.join()
+        return {
+            "workers": workers,
+            "receivers": receivers,
+            "drawers": drawers,
+            "delivered": delivered,
+            "expected": expected * receivers,
+            "seconds": round(elapsed, 3),
+            "delivered_per_s": round(delivered / elapsed) if elapsed else None,
+            "server_cpu_s": round(cpu, 3),
+        }
+    finally:
+        for s in drawer_sockets:
+            s.close()
+        for child, _, _ in children:
+            if child.is_alive():
+                child.kill()
+        stop_server_process(proc)
+
+
+def server_pids(proc):
+    """서버 프로세스와 워커 프로세스들의 pid"""
+    pids = [proc.pid]
+    try:
+        with open(f"/proc/{proc.pid}/task/{proc.pid}/children") as f:
+            pids.extend(int(pid) for pid in f.read().split())
+    except OSError:
+        pass
+    return pids
+
+
+def cmd_workers(args):
+    print(f"CPU {os.cpu_count()}개")
+    results = []
+    for workers in args.workers:
+        result = run_workers_case(
+            workers, args.receivers, args.drawers, args.events, args.processes
+        )
+        results.append(result)
+        print(
+            f"workers={workers:<3} delivered={result['delivered']}/{result['expected']} "
+            f"time={result['seconds']}s "
+            f"throughput={result['delivered_per_s']}/s "
+            f"server cpu={result['server_cpu_s']}s"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"workers": results}, f, indent=2)
+
+
+def read_draw_points(sock, expected, timeout=30):
+    """JSON 드로잉 이벤트를 expected개 받을 때까지 읽어서 (x, y) 목록으로 반환"""
+    sock.settimeout(0.5)
+    buffer = b""
+    points = []
+    deadline = time.time() + timeout
+    while len(points) < expected and time.time() < deadline:
+        try:
+            data = sock.recv(262144)
+        except socket.timeout:
+            continue
+        if not data:
+            break
+        buffer += data
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            if line.startswith(b"{") and b'"draw"' in line:
+                event = json.loads(line)
+                points.append((event["x"], event["y"]))
+    return points
+
+
+def run_backplane_case(kind, nodes, clients, drawers, events):
+    from backplane import BrokerServer, LocalBackplane, LocalHub, SocketBackplane
+    from server import ChatServer
+
+    broker = None
+    if kind == "tcp":
+        broker = BrokerServer(("127.0.0.1", 0))
+        broker.start()
+        make_backplane = lambda: SocketBackplane(broker.address)
+    else:
+        hub = LocalHub()
+        make_backplane = lambda: LocalBackplane(hub)
+    servers = []
+    sockets = []
+    try:
+        for _ in range(nodes):
+            server = ChatServer(
+                host="127.0.0.1", port=0, mode="selector", backplane=make_backplane()
+            )
+            server.log_message = lambda msg: None
+            server.start_server()
+            servers.append(server)
+        ports = [server.server_socket.getsockname()[1] for server in servers]
+        # 수신 클라이언트를 노드마다 고르게 접속
+        receivers = [
+            socket.create_connection(("127.0.0.1", ports[i % nodes]))
+            for i in range(clients)
+        ]
+        senders = [
+            socket.create_connection(("127.0.0.1", ports[i % nodes]))
+            for i in range(drawers)
+        ]
+        sockets = receivers + senders
+        stop, reader = start_reader(senders)
+        time.sleep(1)  # hello_timeout 이후 실시간 이벤트를 받음
+        start = time.time()
+        # 여러 노드의 drawer가 동시에 보내도 모든 수신자가 같은 순서로 받아야 함
+        threads = [
+            threading.Thread(
+                target=s.sendall,
+                args=(
+                    "".join(
+                        json.dumps({"type": "draw", "action": "move", "x": d, "y": i})
+                        + "\n"
+                        for i in range(events)
+                    ).encode("utf-8"),
+                ),
+            )
+            for d, s in enumerate(senders)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        expected = drawers * events
+        orders = [read_draw_points(s, expected) for s in receivers]
+        elapsed = time.time() - start
+        stop.set()
+        reader.join()
+        consistent = all(order == orders[0] for order in orders)
+        complete = all(len(order) == expected for order in orders)
+        # 늦게 들어온 사용자는 어느 노드에 접속해도 같은 히스토리를 받아야 함
+        late = []
+        for port in ports:
+            s = socket.create_connection(("127.0.0.1", port))
+            sockets.append(s)
+            late.append(read_draw_points(s, expected))
+        late_consistent = all(points == late[0] for points in late) and len(
+            late[0]
+        ) == expected
+        return {
+            "backplane": kind,
+            "nodes": nodes,
+            "receivers": clients,
+            "events": expected,
+            "complete": complete,
+            "same_order_everywhere": consistent,
+            "late_join_same_history": late_consistent,
+            "seconds": round(elapsed, 3),
+            "delivered_per_s": round(expected * clients / elapsed),
+        }
+    finally:
+        for s in sockets:
+            s.close()
+        for server in servers:
+            server.running = False
+            server.backplane.close()
+            try:
+                server.server_socket.close()
+            except OSError:
+                pass
+        if broker:
+            broker.close()
+
+
+def cmd_backplane(args):
+    sys.path.insert(0, HERE)
+    results = []
+    for kind in args.backplane:
+        result = run_backplane_case(
+            kind, args.nodes, args.receivers, args.drawers, args.events
+        )
+        results.append(result)
+        print(
+            f"{kind:>6} nodes={args.nodes} complete={result['complete']} "
+            f"same order={result['same_order_everywhere']} "
+            f"late join={result['late_join_same_history']} "
+            f"throughput={result['delivered_per_s']}/s"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"backplane": results}, f, indent=2)
+
+
+def make_replay_streams(events):
+    """늦은 접속자가 받는 히스토리 재전송 데이터 (형식별 bytes)"""
+    from history import DrawingHistory
+
+    history = DrawingHistory(max_points=events * 20)
+    for event in make_stroke_events(events):
+        history.append(event, sender="drawer")
+    history.finish_sender("drawer")
+    history.take_snapshot()
+    streams = {fmt: history.replay_frames(fmt) for fmt in ("legacy", "json", "binary")}
+    # 아주 긴 한 줄 (점이 많은 segment 하나)
+    points = [[x, y] for _, x, y in make_strokes(events * 4)]
+    streams["long_line"] = (
+        json.dumps({"type": "draw", "action": "segment", "points": points}) + "\n"
+    ).encode("utf-8")
+    return streams
+
+
+def read_stream_split(sock, size, read_size):
+    """기존 방식: recv로 받은 bytes를 이어 붙이고 split_frames로 처음부터 다시 분리"""
+    import protocol
+
+    buffer = b""
+    frames = received = 0
+    while received < size:
+        data = sock.recv(read_size)
+        if not data:
+            break
+        received += len(data)
+        parsed, buffer = protocol.split_frames(buffer + data)
+        frames += len(parsed)
+    return frames
+
+
+def read_stream_framer(sock, size, read_size):
+    """protocol.Framer: recv_into + 이어서 개행 탐색"""
+    import protocol
+
+    framer = protocol.Framer(read_size)
+    frames = received = 0
+    while received < size:
+        count = framer.recv_from(sock)
+        if not count:
+            break
+        received += count
+        frames += len(framer.pop_frames())
+    return frames
+
+
+def run_framer_case(stream, reader, read_size):
+    """socketpair로 stream을 보내고 reader가 프레임을 모두 분리할 때까지의 시간"""
+    a, b = socket.socketpair()
+    a.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+    b.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    sender = threading.Thread(target=a.sendall, args=(stream,), daemon=True)
+    start = time.perf_counter()
+    sender.start()
+    frames = reader(b, len(stream), read_size)
+    elapsed = time.perf_counter() - start
+    sender.join()
+    a.close()
+    b.close()
+    return frames, elapsed
+
+
+def cmd_framer(args):
+    sys.path.insert(0, HERE)
+    import protocol
+
+    streams = make_replay_streams(args.events)
+    results = []
+    for name, stream in streams.items():
+        expected = len(protocol.split_frames(stream)[0])
+        for reader_name, reader, read_size in (
+            ("split_frames", read_stream_split, 1024),
+            ("framer", read_stream_framer, 1024),
+            ("framer", read_stream_framer, args.recv_size),
+        ):
+            best = None
+            for _ in range(args.repeat):
+                frames, elapsed = run_framer_case(stream, reader, read_size)
+                assert frames == expected, (name, reader_name, frames, expected)
+                best = elapsed if best is None else min(best, elapsed)
+            result = {
+                "stream": name,
+                "reader": reader_name,
+                "read_size": read_size,
+                "bytes": len(stream),
+                "frames": expected,
+                "seconds": round(best, 4),
+                "mb_per_s": round(len(stream) / best / 1e6, 1),
+            }
+            results.append(result)
+            print(
+                f"{name:>9} {len(stream) / 1e6:6.2f}MB {reader_name:>12} "
+                f"read={read_size:<6} {best * 1000:9.1f}ms {result['mb_per_s']:8.1f}MB/s"
+            )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"framer": results}, f, indent=2)
+
+
+def percentile(values, q):
+    """정렬된 values의 q(0~1) 분위수"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def latency_summary(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.5), 3) if values else None,
+        "p99_ms": round(percentile(values, 0.99), 3) if values else None,
+        "p999_ms": round(percentile(values, 0.999), 3) if values else None,
+        "max_ms": round(values[-1], 3) if values else None,
+    }
+
+
+def open_load_client(port, fmt="json"):
+    """
+    ChatClient와 같은 방식으로 접속해서 hello에 응답하고, 자신의 방에 다시 join을
+    보내 둔다. join에 대한 "이미 ... 방에 있습니다" 안내는 히스토리 재전송 뒤에
+    오므로 이 줄을 받으면 접속 처리가 끝난 것
+    """
+    import protocol
+
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    if fmt == "binary":
+        hello = protocol.hello_message()
+    elif fmt == "json":
+        hello = protocol.hello_message(proto=())
+    else:
+        hello = protocol.hello_message(proto=(), features=())
+    hello += "\n"
+    join = json.dumps({"type": "join", "room": "lobby"}) + "\n"
+    sock.sendall((hello + join).encode("utf-8"))
+    return sock
+
+
+def read_until_joined(sock, timeout=120):
+    """open_load_client 이후 안내 줄이 올 때까지 읽고 (드로잉 프레임 수, 바이트 수)를 반환"""
+    import protocol
+
+    sock.settimeout(timeout)
+    framer = protocol.Framer(262144)
+    frames = received = 0
+    try:
+        while True:
+            count = framer.recv_from(sock)
+            if not count:
+                raise RuntimeError("서버 연결이 끊어졌습니다")
+            received += count
+            for frame in framer.pop_frames():
+                if protocol.is_binary(frame) or frame.startswith(b'{"type": "draw"'):
+                    frames += 1
+                elif "방에 있습니다".encode("utf-8") in frame:
+                    return frames, received
+    finally:
+        sock.settimeout(None)
+
+
+def start_load_receiver(sockets, latencies, counts):
+    """
+    모든 클라이언트 소켓을 읽으며 보낸 시각("t" 필드 또는 "load <ns>" 채팅)이 붙은
+    메시지의 도착 지연(ms)을 종류별로 latencies에 모음
+    """
+    import protocol
+
+    stop = threading.Event()
+    chat_marker = b"] load "
+
+    def run():
+        sel = selectors.DefaultSelector()
+        for s in sockets:
+            s.setblocking(False)
+            sel.register(s, selectors.EVENT_READ, protocol.Framer(262144))
+        while not stop.is_set():
+            for key, _ in sel.select(timeout=0.1):
+                framer = key.data
+                try:
+                    if not framer.recv_from(key.fileobj):
+                        sel.unregister(key.fileobj)
+                        continue
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    sel.unregister(key.fileobj)
+                    continue
+                now = time.perf_counter_ns()
+                counts["bytes"] += len(framer)
+                for frame in framer.pop_frames():
+                    counts["frames"] += 1
+                    index = frame.find(chat_marker)
+                    if index >= 0:
+                        sent = int(frame[index + len(chat_marker) :])
+                        latencies["chat"].append((now - sent) / 1e6)
+                    elif frame.startswith(b'{"type": "draw"'):
+                        sent = json.loads(frame).get("t")
+                        if sent:
+                            latencies["draw"].append((now - sent) / 1e6)
+        sel.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return stop, thread
+
+
+def run_load_senders(drawers, chatters, draw_rate, chat_rate, duration):
+    """
+    drawer는 draw_rate(초당 segment 수)로 획을 그리고, chatter는 chat_rate(초당 줄 수)로
+    채팅을 보냄. 보낸 메시지 수를 종류별로 반환
+    """
+    import heapq
+
+    strokes = make_stroke_events(int(draw_rate * duration) + 100)
+    schedule = []
+    start = time.perf_counter()
+    for i, sock in enumerate(drawers):
+        heapq.heappush(schedule, (start + i / max(1, len(drawers)) / draw_rate, "draw", i, sock))
+    for i, sock in enumerate(chatters):
+        heapq.heappush(schedule, (start + i / max(1, len(chatters)) / chat_rate, "chat", i, sock))
+    positions = [0] * len(drawers)
+    sent = {"draw": 0, "chat": 0}
+    end = start + duration
+    while schedule:
+        due, kind, index, sock = heapq.heappop(schedule)
+        if due >= end:
+            break
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        if kind == "draw":
+            event = dict(strokes[positions[index] % len(strokes)])
+            positions[index] += 1
+            event["t"] = time.perf_counter_ns()
+            line = json.dumps(event)
+            heapq.heappush(schedule, (due + 1 / draw_rate, kind, index, sock))
+        else:
+            line = f"load {time.perf_counter_ns()}"
+            heapq.heappush(schedule, (due + 1 / chat_rate, kind, index, sock))
+        sock.sendall((line + "\n").encode("utf-8"))
+        sent[kind] += 1
+    return sent
+
+
+def fetch_pipeline_stats(metrics_port):
+    """서버의 /stats에서 처리 단계별 계측 결과를 가져옴 (구간별 개수는 빼고 요약만)"""
+    url = f"http://127.0.0.1:{metrics_port}/stats"
+    with urllib.request.urlopen(url, timeout=5) as response:
+        pipeline = json.load(response)["pipeline"]
+    for item in pipeline["stages"].values():
+        del item["buckets"]
+    pipeline["traces"] = pipeline["traces"][-5:]
+    return pipeline
+
+
+def run_load_case(
+    mode, clients, drawers, chatters, draw_rate, chat_rate, duration, instrument=False
+):
+    sys.path.insert(0, HERE)
+    port = free_port()
+    extra_args = ()
+    if instrument:
+        metrics_port = free_port()
+        extra_args = ("--instrument", "--metrics-port", str(metrics_port))
+    proc = start_server_process(mode, port, extra_args)
+    sockets = []
+    try:
+        base = read_proc_status(proc.pid)
+        sockets = [open_load_client(port) for _ in range(clients)]
+        for sock in sockets:
+            read_until_joined(sock)
+        drain(sockets)
+        latencies = {"draw": [], "chat": []}
+        counts = {"frames": 0, "bytes": 0}
+        stop, reader = start_load_receiver(sockets, latencies, counts)
+        cpu_before = read_proc_cpu(proc.pid)
+        started = time.perf_counter()
+        sent = run_load_senders(
+            sockets[:drawers],
+            sockets[drawers : drawers + chatters],
+            draw_rate,
+            chat_rate,
+            duration,
+        )
+        # 보낸 메시지가 모두 도착할 때까지 (최대 10초) 대기
+        # (드로잉 이벤트는 보낸 사람에게도 돌아오고 채팅은 보낸 사람을 제외)
+        expected = sent["draw"] * clients + sent["chat"] * (clients - 1)
+        deadline = time.perf_counter() + 10
+        while (
+            len(latencies["draw"]) + len(latencies["chat"]) < expected
+            and time.perf_counter() < deadline
+        ):
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        cpu = read_proc_cpu(proc.pid) - cpu_before
+        status = read_proc_status(proc.pid)
+        stop.set()
+        reader.join()
+        delivered = len(latencies["draw"]) + len(latencies["chat"])
+        result = {
+            "mode": mode,
+            "clients": clients,
+            "drawers": drawers,
+            "chatters": chatters,
+            "duration_s": round(elapsed, 3),
+            "sent": sent,
+            "expected_deliveries": expected,
+            "delivered": delivered,
+            "delivered_per_s": round(delivered / elapsed),
+            "received_mb": round(counts["bytes"] / 1e6, 3),
+            "latency": {kind: latency_summary(values) for kind, values in latencies.items()},
+            "server_cpu_s": round(cpu, 3),
+            "server_cpu_percent": round(cpu / elapsed * 100, 1),
+            "server_rss_kb": status["rss_kb"],
+            "server_rss_peak_kb": status.get("rss_peak_kb"),
+            "server_rss_growth_kb": status["rss_kb"] - base["rss_kb"],
+        }
+        if instrument:
+            result["pipeline"] = fetch_pipeline_stats(metrics_port)
+        return result
+    finally:
+        for s in sockets:
+            s.close()
+        stop_server_process(proc)
+
+
+def run_late_join_case(mode, sizes, formats):
+    """
+    drawer 하나로 히스토리를 sizes만큼 채워 가면서, 크기마다 새로 접속한 클라이언트가
+    스냅샷 + tail 재전송을 모두 받을 때까지의 시간을 형식별로 측정
+    """
+    sys.path.insert(0, HERE)
+    port = free_port()
+    proc = start_server_process(mode, port)
+    results = []
+    drawer = None
+    try:
+        drawer = open_load_client(port)
+        read_until_joined(drawer)
+        events = make_stroke_events(max(sizes))
+        written = 0
+        for size in sorted(sizes):
+            # 드로잉 이벤트 뒤에 join을 보내고, 자신에게 돌아오는 이벤트를 읽으면서
+            # 안내 줄이 올 때까지 기다리면 서버가 모두 기록한 것
+            data = b"".join(
+                (json.dumps(event) + "\n").encode("utf-8") for event in events[written:size]
+            )
+            sender = threading.Thread(
+                target=drawer.sendall,
+                args=(data + b'{"type": "join", "room": "lobby"}\n',),
+                daemon=True,
+            )
+            sender.start()
+            read_until_joined(drawer)
+            sender.join()
+            written = size
+            for fmt in formats:
+                started = time.perf_counter()
+                joiner = open_load_client(port, fmt)
+                try:
+                    frames, received = read_until_joined(joiner)
+                finally:
+                    joiner.close()
+                elapsed = time.perf_counter() - started
+                status = read_proc_status(proc.pid)
+                results.append(
+                    {
+                        "mode": mode,
+                        "history_events": size,
+                        "format": fmt,
+                        "replay_frames": frames,
+                        "replay_bytes": received,
+                        "join_ms": round(elapsed * 1000, 2),
+                        "mb_per_s": round(received / elapsed / 1e6, 1),
+                        "server_rss_kb": status["rss_kb"],
+                    }
+                )
+    finally:
+        if drawer:
+            drawer.close()
+        stop_server_process(proc)
+    return results
+
+
+def cmd_load(args):
+    raise_fd_limit()
+    report = {"config": vars(args).copy(), "load": [], "late_join": []}
+    report["config"].pop("func", None)
+    for mode in args.modes:
+        result = run_load_case(
+            mode,
+            args.clients,
+            args.drawers,
+            args.chatters,
+            args.draw_rate,
+            args.chat_rate,
+            args.duration,
+            args.instrument,
+        )
+        report["load"].append(result)
+        for kind, item in result["latency"].items():
+            print(
+                f"{mode:>8} {kind:>4} n={item['count']:<7} p50={item['p50_ms']}ms "
+                f"p99={item['p99_ms']}ms p999={item['p999_ms']}ms"
+            )
+        print(
+            f"{mode:>8} delivered={result['delivered']}/{result['expected_deliveries']} "
+            f"({result['delivered_per_s']}/s) cpu={result['server_cpu_percent']}% "
+            f"rss={result['server_rss_kb']}kB"
+        )
+        if "pipeline" in result:
+            for stage, item in result["pipeline"]["stages"].items():
+                print(
+                    f"{mode:>8} stage {stage:>9} n={item['count']:<8} "
+                    f"mean={item['mean_us']}us p50<={item['p50_us']}us "
+                    f"p99<={item['p99_us']}us max={item['max_us']}us"
+                )
+        if args.history:
+            for item in run_late_join_case(mode, args.history, args.formats):
+                report["late_join"].append(item)
+                print(
+                    f"{mode:>8} late join history={item['history_events']:<8} "
+                    f"{item['format']:>6} frames={item['replay_frames']:<7} "
+                    f"bytes={item['replay_bytes']:<9} {item['join_ms']}ms"
+                )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def send_move_stream(drawers, move_rate, duration, stroke_length=100):
+    """
+    drawer마다 초당 move_rate개의 start/move/end 이벤트를 점마다 하나씩(기존 클라이언트
+    방식) 보냄. 5ms마다 그동안 보낼 이벤트를 모아서 보내고 보낸 개수를 반환
+    """
+    done = [0] * len(drawers)
+    start = time.perf_counter()
+    while True:
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            break
+        due = int(elapsed * move_rate)
+        for i, sock in enumerate(drawers):
+            lines = []
+            while done[i] < due:
+                pos = done[i] % stroke_length
+                if pos == 0:
+                    action = "start"
+                elif pos == stroke_length - 1:
+                    action = "end"
+                else:
+                    action = "move"
+                x = 50 + i * 10 + pos
+                y = 50 + (done[i] // stroke_length) % 400
+                lines.append(json.dumps({"type": "draw", "action": action, "x": x, "y": y}))
+                done[i] += 1
+            if lines:
+                sock.sendall(("\n".join(lines) + "\n").encode("utf-8"))
+        time.sleep(0.005)
+    return sum(done)
+
+
+def run_coalesce_case(label, limit, clients, drawers, move_rate, duration):
+    """limit('초당개수:버스트:합치기ms', None이면 제한 없음)에 따른 전달 프레임 수와 서버 CPU"""
+    sys.path.insert(0, HERE)
+    port = free_port()
+    metrics_port = free_port()
+    extra_args = ["--metrics-port", str(metrics_port)]
+    if limit:
+        extra_args += ["--draw-limit", limit]
+    proc = start_server_process("selector", port, extra_args)
+    sockets = []
+    try:
+        sockets = [open_load_client(port) for _ in range(clients)]
+        for sock in sockets:
+            read_until_joined(sock)
+        drain(sockets)
+        counts = {"frames": 0, "bytes": 0}
+        stop, reader = start_load_receiver(sockets, {"draw": [], "chat": []}, counts)
+        cpu_before = read_proc_cpu(proc.pid)
+        started = time.perf_counter()
+        sent = send_move_stream(sockets[:drawers], move_rate, duration)
+        # 받은 프레임 수가 0.5초 동안 늘지 않으면 모두 도착한 것으로 봄
+        last = -1
+        deadline = time.perf_counter() + 10
+        while counts["frames"] != last and time.perf_counter() < deadline:
+            last = counts["frames"]
+            time.sleep(0.5)
+        elapsed = time.perf_counter() - started
+        cpu = read_proc_cpu(proc.pid) - cpu_before
+        stop.set()
+        reader.join()
+        url = f"http://127.0.0.1:{metrics_port}/stats"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            rooms = json.load(response)["rooms"]
+        throttle = next(room["throttle"] for room in rooms if room["name"] == "lobby")
+        return {
+            "case": label,
+            "limit": limit,
+            "clients": clients,
+            "drawers": drawers,
+            "sent_events": sent,
+            "received_frames": counts["frames"],
+            "frames_per_client_s": round(counts["frames"] / clients / duration, 1),
+            "received_mb": round(counts["bytes"] / 1e6, 3),
+            "server_cpu_s": round(cpu, 3),
+            "server_cpu_percent": round(cpu / elapsed * 100, 1),
+            "throttle": throttle,
+        }
+    finally:
+        for sock in sockets:
+            sock.close()
+        stop_server_process(proc)
+
+
+def cmd_coalesce(args):
+    raise_fd_limit()
+    cases = [("off", None), ("coalesce", f"0:0:{args.coalesce_ms}")]
+    if args.rate:
+        cases.append(("rate", f"{args.rate}:{args.rate}"))
+        cases.append(("rate+coalesce", f"{args.rate}:{args.rate}:{args.coalesce_ms}"))
+    results = []
+    for label, limit in cases:
+        item = run_coalesce_case(
+            label, limit, args.clients, args.drawers, args.move_rate, args.duration
+        )
+        results.append(item)
+        throttle = item["throttle"]
+        print(
+            f"{label:>14} sent={item['sent_events']:<7} frames={item['received_frames']:<8} "
+            f"({item['frames_per_client_s']}/client/s) {item['received_mb']}MB "
+            f"cpu={item['server_cpu_percent']}% merged={throttle['merged']} shed={throttle['shed']}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def make_canvas_events(events, stroke_length=50, seed=3):
+    """수신한 원격 드로잉 이벤트처럼 start/move.../end가 이어지는 이벤트 목록"""
+    import random
+
+    rng = random.Random(seed)
+    result = []
+    while len(result) < events:
+        x, y = rng.randrange(20, 380), rng.randrange(20, 280)
+        result.append({"type": "draw", "action": "start", "x": x, "y": y})
+        for _ in range(stroke_length - 2):
+            x = min(399, max(0, x + rng.randint(-4, 4)))
+            y = min(299, max(0, y + rng.randint(-4, 4)))
+            result.append({"type": "draw", "action": "move", "x": x, "y": y})
+        result.append({"type": "draw", "action": "end", "x": x, "y": y})
+    return result[:events]
+
+
+def draw_with_items(canvas, state, event):
+    """기존 ClientGUI.handle_draw_event: 점 두 개마다 create_line"""
+    if event["action"] == "start":
+        state[:] = [event["x"], event["y"]]
+    elif event["action"] == "move" and state:
+        canvas.create_line(state[0], state[1], event["x"], event["y"], fill="black", width=2)
+        state[:] = [event["x"], event["y"]]
+    elif event["action"] == "end":
+        state[:] = []
+
+
+def draw_with_renderer(renderer, event):
+    if event["action"] == "start":
+        renderer.begin("remote", event["x"], event["y"])
+    elif event["action"] == "move":
+        renderer.extend("remote", [(event["x"], event["y"])])
+    elif event["action"] == "end":
+        renderer.end("remote")
+
+
+def run_canvas_case(root, kind, events, checkpoints, batch):
+    """
+    batch개의 이벤트를 처리하고 화면을 갱신(update)하는 것을 한 프레임으로 보고,
+    checkpoints마다 직전 구간의 프레임 시간, 캔버스 아이템 수, RSS를 기록
+    """
+    import tkinter as tk
+    from canvas_renderer import CanvasRenderer
+
+    canvas = tk.Canvas(root, width=400, height=300, bg="white")
+    canvas.pack()
+    root.update()
+    renderer = CanvasRenderer(canvas, 400, 300) if kind == "renderer" else None
+    state = []
+    stream = make_canvas_events(events)
+    base_rss = read_proc_status(os.getpid())["rss_kb"]
+    results = []
+    frames = []
+    pending = sorted(checkpoints)
+    for i in range(0, len(stream), batch):
+        started = time.perf_counter()
+        for event in stream[i : i + batch]:
+            if renderer:
+                draw_with_renderer(renderer, event)
+            else:
+                draw_with_items(canvas, state, event)
+        root.update()
+        frames.append((time.perf_counter() - started) * 1000)
+        done = i + batch
+        while pending and done >= pending[0]:
+            pending.pop(0)
+            results.append(
+                {
+                    "renderer": kind,
+                    "events": done,
+                    "items": len(canvas.find_all()),
+                    "frame_p50_ms": round(percentile(frames, 0.5), 3),
+                    "frame_p99_ms": round(percentile(frames, 0.99), 3),
+                    "frame_max_ms": round(max(frames), 3),
+                    "rss_growth_kb": read_proc_status(os.getpid())["rss_kb"] - base_rss,
+                }
+            )
+            frames = []
+    started = time.perf_counter()
+    canvas.delete("all")
+    root.update()
+    results[-1]["delete_all_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    if renderer:
+        results[-1]["renderer_stats"] = renderer.stats()
+    canvas.destroy()
+    return results
+
+
+def run_raster_case(strokes, stroke_length=50):
+    """디스플레이 없이 측정할 수 있는 부분: 끝난 획을 Raster에 그리고 PPM으로 변환하는 비용"""
+    from canvas_renderer import Raster
+
+    stream = make_canvas_events(strokes * stroke_length, stroke_length)
+    polylines = []
+    for event in stream:
+        if event["action"] == "start":
+            coords = [event["x"], event["y"]]
+        else:
+            coords += [event["x"], event["y"]]
+            if event["action"] == "end":
+                polylines.append(coords)
+    raster = Raster(400, 300)
+    started = time.perf_counter()
+    for coords in polylines:
+        raster.draw_polyline(coords)
+    drawn = time.perf_counter() - started
+    started = time.perf_counter()
+    data = raster.to_ppm()
+    converted = time.perf_counter() - started
+    return {
+        "strokes": len(polylines),
+        "points_per_stroke": stroke_length,
+        "draw_ms_per_stroke": round(drawn / len(polylines) * 1000, 4),
+        "to_ppm_ms": round(converted * 1000, 3),
+        "ppm_bytes": len(data),
+    }
+
+
+def cmd_canvas(args):
+    sys.path.insert(0, HERE)
+    import tkinter as tk
+
+    report = {"raster": run_raster_case(args.raster_strokes), "canvas": []}
+    item = report["raster"]
+    print(
+        f"raster: {item['strokes']} strokes x {item['points_per_stroke']} points, "
+        f"{item['draw_ms_per_stroke']}ms/stroke, to_ppm {item['to_ppm_ms']}ms ({item['ppm_bytes']}B)"
+    )
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Tk를 열 수 없어 캔버스 측정은 생략합니다 ({e})")
+        root = None
+    if root is not None:
+        try:
+            for kind in args.renderers:
+                for item in run_canvas_case(
+                    root, kind, max(args.events), args.events, args.batch
+                ):
+                    report["canvas"].append(item)
+                    print(
+                        f"{kind:>8} events={item['events']:<7} items={item['items']:<7} "
+                        f"frame p50={item['frame_p50_ms']}ms p99={item['frame_p99_ms']}ms "
+                        f"max={item['frame_max_ms']}ms rss+={item['rss_growth_kb']}kB"
+                        + (
+                            f" delete_all={item['delete_all_ms']}ms"
+                            if "delete_all_ms" in item
+                            else ""
+                        )
+                    )
+        finally:
+            root.destroy()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def run_registry_case(size, rounds=2000):
+    """
+    size명이 접속해 있을 때 브로드캐스트 한 번의 목록 순회 비용과 접속/퇴장 한 번의 비용을
+    기존 방식(list 복사 후 순회, list.remove)과 ClientRegistry로 비교
+    """
+    sys.path.insert(0, HERE)
+    from registry import ClientRegistry
+
+    members = [object() for _ in range(size)]
+    registry = ClientRegistry()
+    for i, member in enumerate(members):
+        registry.add(member, f"User{i}")
+
+    def per_round(func):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        return round((time.perf_counter() - started) / rounds * 1e6, 3)
+
+    def iterate_list():
+        for _ in members[:]:
+            pass
+
+    def iterate_registry():
+        for _ in registry.snapshot():
+            pass
+
+    def churn_list():
+        member = members[size // 2]
+        members.remove(member)
+        members.append(member)
+
+    def churn_registry():
+        member = members[size // 2]
+        name = registry.remove(member)
+        registry.add(member, name)
+
+    return {
+        "clients": size,
+        "broadcast_list_us": per_round(iterate_list),
+        "broadcast_registry_us": per_round(iterate_registry),
+        "churn_list_us": per_round(churn_list),
+        "churn_registry_us": per_round(churn_registry),
+        # 접속/퇴장 한 번 뒤에 브로드캐스트가 한 번 오는 최악의 경우 (스냅샷을 매번 다시 만듦)
+        "churn_then_broadcast_registry_us": per_round(
+            lambda: (churn_registry(), iterate_registry())
+        ),
+    }
+
+
+def run_churn_case(mode, receivers, churners, duration, rate):
+    """
+    고정 수신자 receivers명이 있는 방에 chatter 하나가 초당 rate줄 채팅을 보내는 동안
+    churners개 스레드가 접속/퇴장을 반복 (정상 종료, RST, 방 이동 후 종료를 번갈아).
+    끝난 뒤 서버 스레드에서 예외가 없었는지, 서버의 연결별 상태가 접속 목록과 맞는지,
+    고정 수신자가 모든 줄을 받았는지 확인
+    """
+    sys.path.insert(0, HERE)
+    from server import ChatServer
+
+    errors = []
+    excepthook = threading.excepthook
+    threading.excepthook = lambda args: errors.append(
+        f"{args.thread.name if args.thread else '?'}: "
+        f"{args.exc_type.__name__}: {args.exc_value}"
+    )
+    port = free_port()
+    server = ChatServer("127.0.0.1", port, mode=mode, hello_timeout=0.05)
+    server.log_message = lambda msg: None
+    server.start_server()
+    steady = []
+    try:
+        steady = [open_load_client(port) for _ in range(receivers + 1)]
+        for sock in steady:
+            read_until_joined(sock)
+        drain(steady)
+        chatter, steady = steady[0], steady[1:]
+        received = [0] * receivers
+        stop_reading = threading.Event()
+
+        def count_lines():
+            # 고정 수신자마다 "[UserN] churn <i>" 줄 수를 셈 (접속/퇴장 알림은 건너뜀)
+            sel = selectors.DefaultSelector()
+            tails = {}
+            for i, sock in enumerate(steady):
+                sel.register(sock, selectors.EVENT_READ, i)
+                tails[i] = b""
+            while not stop_reading.is_set():
+                for key, _ in sel.select(timeout=0.1):
+                    try:
+                        data = key.fileobj.recv(262144, socket.MSG_DONTWAIT)
+                    except BlockingIOError:
+                        continue
+                    except OSError:
+                        data = b""
+                    if not data:
+                        sel.unregister(key.fileobj)
+                        continue
+                    lines = (tails[key.data] + data).split(b"\n")
+                    tails[key.data] = lines.pop()
+                    received[key.data] += sum(1 for line in lines if b"] churn " in line)
+            sel.close()
+
+        reader = threading.Thread(target=count_lines, daemon=True)
+        reader.start()
+        stop = threading.Event()
+        cycles = [0] * churners
+
+        def churn(index):
+            while not stop.is_set():
+                try:
+                    sock = socket.create_connection(("127.0.0.1", port))
+                except OSError:
+                    continue
+                kind = cycles[index] % 3
+                try:
+                    if kind == 0:
+                        sock.sendall(b"bye\n")
+                    elif kind == 1:
+                        # SO_LINGER 0: close()가 FIN 대신 RST를 보냄
+                        sock.setsockopt(
+                            socket.SOL_SOCKET, socket.SO_LINGER, b"\1\0\0\0\0\0\0\0"
+                        )
+                    else:
+                        sock.sendall(b'{"type": "join", "room": "churn"}\n')
+                        time.sleep(0.001)
+                except OSError:
+                    pass
+                sock.close()
+                cycles[index] += 1
+
+        threads = [threading.Thread(target=churn, args=(i,)) for i in range(churners)]
+        for t in threads:
+            t.start()
+        sent = 0
+        started = time.perf_counter()
+        end = started + duration
+        while time.perf_counter() < end:
+            chatter.sendall(f"churn {sent}\n".encode("utf-8"))
+            sent += 1
+            delay = started + sent / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        stop.set()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        def mismatches():
+            # 접속 목록에 없는데 남아 있거나, 있는데 빠진 연결별 상태 수
+            members = set(server.clients.snapshot())
+            in_rooms = set()
+            for room in list(server.rooms.values()):
+                in_rooms.update(room.members)
+            return {
+                name: len(members.symmetric_difference(list(table)))
+                for name, table in (
+                    ("outbound", server.outbound),
+                    ("connections", server.connections),
+                    ("client_rooms", server.client_rooms),
+                    ("room_members", in_rooms),
+                )
+            }
+
+        # 남은 줄이 도착하고 진행 중이던 퇴장 처리가 끝날 때까지 (최대 10초) 대기
+        deadline = time.perf_counter() + 10
+        while time.perf_counter() < deadline and (
+            min(received) < sent
+            or len(server.clients) > receivers + 1
+            or any(mismatches().values())
+        ):
+            time.sleep(0.05)
+        stop_reading.set()
+        reader.join()
+        mismatched = mismatches()
+        return {
+            "mode": mode,
+            "receivers": receivers,
+            "churners": churners,
+            "duration_s": round(elapsed, 3),
+            "join_leave_cycles": sum(cycles),
+            "cycles_per_s": round(sum(cycles) / elapsed),
+            "chat_sent": sent,
+            "received_min": min(received),
+            "received_max": max(received),
+            "lost": sum(sent - count for count in received),
+            "clients_left": len(server.clients),
+            "mismatched": mismatched,
+            "snapshot_rebuilds": server.clients.rebuilds,
+            "thread_errors": errors[:10],
+            "ok": not errors
+            and len(server.clients) == receivers + 1
+            and min(received) == sent
+            and not any(mismatched.values()),
+        }
+    finally:
+        threading.excepthook = excepthook
+        for sock in steady:
+            sock.close()
+        server.stop_server()
+
+
+def cmd_churn(args):
+    raise_fd_limit()
+    report = {"registry": [], "churn": []}
+    for size in args.sizes:
+        item = run_registry_case(size)
+        report["registry"].append(item)
+        print(
+            f"registry clients={size:<6} broadcast list={item['broadcast_list_us']}us "
+            f"registry={item['broadcast_registry_us']}us | join/leave "
+            f"list={item['churn_list_us']}us registry={item['churn_registry_us']}us"
+        )
+    for mode in args.modes:
+        item = run_churn_case(
+            mode, args.receivers, args.churners, args.duration, args.rate
+        )
+        report["churn"].append(item)
+        print(
+            f"{mode:>8} cycles={item['join_leave_cycles']} ({item['cycles_per_s']}/s) "
+            f"chat={item['chat_sent']} received min={item['received_min']} "
+            f"lost={item['lost']} clients_left={item['clients_left']} "
+            f"mismatched={item['mismatched']} errors={len(item['thread_errors'])} "
+            f"{'OK' if item['ok'] else 'FAIL'}"
+        )
+        for error in item["thread_errors"]:
+            print(f"    {error}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if not all(item["ok"] for item in report["churn"]):
+        sys.exit(1)
+
+
+def make_tcp_dump(count):
+    """/proc/net/tcp 형식의 가짜 덤프 줄 (IPv4 연결 count개)"""
+    import random
+
+    rng = random.Random(1)
+    lines = [
+        "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt"
+        "   uid  timeout inode"
+    ]
+    for i in range(count):
+        local = rng.getrandbits(32)
+        remote = rng.getrandbits(32)
+        lines.append(
+            f"{i:4}: {local:08X}:{rng.randrange(65536):04X} {remote:08X}:{rng.randrange(65536):04X} "
+            f"01 {rng.randrange(4096):08X}:{rng.randrange(4096):08X} 00:00000000 00000000  1000 "
+            f"       0 {i + 10000} 1 0000000000000000 20 4 30 10 -1"
+        )
+    return lines
+
+
+def run_convert_case(count):
+    """
+    값 count개를 한 번에 변환할 때 값 하나씩 처리하는 방식(socket 함수/기존 함수)과
+    network_utils 배열 함수(array 모듈, numpy가 있으면 numpy)의 항목당 시간 비교
+    """
+    import ipaddress
+    import random
+
+    sys.path.insert(0, HERE)
+    import network_utils as nu
+
+    rng = random.Random(0)
+    values = [rng.getrandbits(32) for _ in range(count)]
+    addresses = [socket.inet_ntoa(v.to_bytes(4, "big")) for v in values]
+    addresses6 = [
+        socket.inet_ntop(socket.AF_INET6, rng.getrandbits(128).to_bytes(16, "big"))
+        for _ in range(count)
+    ]
+    dump = make_tcp_dump(count)
+    network = ipaddress.ip_network("10.0.0.0/8")
+    backends = [False] + ([True] if nu.np is not None else [])
+
+    def timed(func):
+        started = time.perf_counter()
+        func()
+        return round((time.perf_counter() - started) / count * 1e9, 1)
+
+    def scalar_dump():
+        for line in dump[1:]:
+            fields = line.split()
+            nu._parse_address(fields[1])
+            nu._parse_address(fields[2])
+
+    cases = {
+        "htonl": {
+            "scalar": lambda: [socket.htonl(v) for v in values],
+            "format": lambda: [nu.convert_byte_order(v) for v in values],
+            "batch": lambda numpy: nu.htonl_array(values, use_numpy=numpy),
+        },
+        "inet_pton_v4": {
+            "scalar": lambda: [socket.inet_pton(socket.AF_INET, a) for a in addresses],
+            "format": lambda: [nu.convert_ip_address(a) for a in addresses],
+            "batch": lambda numpy: nu.ipv4_to_ints(addresses, use_numpy=numpy),
+        },
+        "inet_pton_v6": {
+            "scalar": lambda: [socket.inet_pton(socket.AF_INET6, a) for a in addresses6],
+            "batch": lambda numpy: nu.inet_pton_many(addresses6, socket.AF_INET6, numpy),
+        },
+        "cidr_v4": {
+            "scalar": lambda: [ipaddress.ip_address(a) in network for a in addresses],
+            "batch": lambda numpy: nu.cidr_contains(network, addresses, use_numpy=numpy),
+        },
+        "tcp_dump": {
+            "scalar": scalar_dump,
+            "batch": lambda numpy: list(nu.iter_tcp_dump(dump, use_numpy=numpy)),
+        },
+    }
+    results = []
+    for name, funcs in cases.items():
+        item = {"case": name, "count": count, "scalar_ns": timed(funcs["scalar"])}
+        if "format" in funcs:
+            item["format_ns"] = timed(funcs["format"])
+        for numpy in backends:
+            key = "numpy" if numpy else "array"
+            item[f"{key}_ns"] = timed(lambda: funcs["batch"](numpy))
+            item[f"{key}_speedup"] = round(item["scalar_ns"] / max(item[f"{key}_ns"], 0.1), 1)
+        results.append(item)
+    # 결과가 값 하나씩 변환한 것과 같은지 확인
+    assert list(nu.htonl_array(values, use_numpy=False)) == [socket.htonl(v) for v in values]
+    assert list(nu.ipv4_to_ints(addresses, use_numpy=False)) == values
+    assert nu.inet_ntop_many(
+        nu.inet_pton_many(addresses6, socket.AF_INET6, False), socket.AF_INET6
+    ) == addresses6
+    assert nu.cidr_contains(network, addresses, use_numpy=False) == [
+        ipaddress.ip_address(a) in network for a in addresses
+    ]
+    return results
+
+
+def cmd_convert(args):
+    sys.path.insert(0, HERE)
+    import network_utils
+
+    if network_utils.np is None:
+        print("numpy가 없어 array 모듈 결과만 측정합니다")
+    report = []
+    for count in args.count:
+        for item in run_convert_case(count):
+            report.append(item)
+            print(
+                f"{item['case']:>13} n={count:<8} scalar={item['scalar_ns']}ns"
+                + (f" format={item['format_ns']}ns" if "format_ns" in item else "")
+                + "".join(
+                    f" {key}={item[f'{key}_ns']}ns (x{item[f'{key}_speedup']})"
+                    for key in ("array", "numpy")
+                    if f"{key}_ns" in item
+                )
+            )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def open_resume_client(port, room, fmt="binary", resume=None):
+    """
+    resume 기능을 알리는 클라이언트로 접속해서 room에 join을 보냄.
+    resume이 있으면 hello에 담아 빠진 이벤트만 요청
+    """
+    import protocol
+
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    fields = {"resume": resume} if resume else {}
+    hello = protocol.hello_message(
+        proto=(protocol.PROTO_BINARY,) if fmt == "binary" else (),
+        features=(protocol.FEATURE_SEGMENT, protocol.FEATURE_RESUME),
+        **fields,
+    )
+    # 두 번째 join의 "이미 ... 방에 있습니다" 안내가 오면 접속 처리가 끝난 것
+    # (resume으로 이미 room에 들어갔으면 두 번 다 안내만 옴)
+    join = json.dumps({"type": "join", "room": room}) + "\n"
+    sock.sendall((hello + "\n" + join + join).encode("utf-8"))
+    return sock
+
+
+def read_resume_sync(sock, timeout=120):
+    """
+    open_resume_client 이후 join 안내 줄이 올 때까지 읽고
+    (드로잉 프레임 수, clear 수, 마지막 resume 기준, 바이트 수)를 반환
+    """
+    import protocol
+
+    sock.settimeout(timeout)
+    framer = protocol.Framer(262144)
+    decoder = protocol.DeltaDecoder()
+    draws = clears = received = 0
+    resume = None
+    try:
+        while True:
+            count = framer.recv_from(sock)
+            if not count:
+                raise RuntimeError("서버 연결이 끊어졌습니다")
+            received += count
+            for frame in framer.pop_frames():
+                if protocol.is_binary(frame):
+                    message = decoder.decode(frame)
+                elif frame.startswith(b'{"type": '):
+                    message = json.loads(frame)
+                elif "방에 있습니다".encode("utf-8") in frame:
+                    return draws, clears, resume, received
+                else:
+                    continue
+                if message is None:
+                    continue
+                if message["type"] == "draw":
+                    draws += 1
+                elif message["type"] == "clear":
+                    clears += 1
+                elif message["type"] == "seq":
+                    if "epoch" in message:
+                        resume = {
+                            "room": message["room"],
+                            "seq": message["seq"],
+                            "epoch": message["epoch"],
+                        }
+                    elif resume is not None:
+                        resume["seq"] = message["seq"]
+    finally:
+        sock.settimeout(None)
+
+
+def run_resume_case(mode, history, gaps, window, fmt):
+    """
+    history개 이벤트가 있는 방에서 클라이언트가 기준 번호를 받고 끊긴 뒤 gap개가 더
+    그려졌을 때, 처음부터 다시 받는 경우와 resume으로 빠진 이벤트만 받는 경우의
+    바이트 수/시간 비교. gap이 window보다 크면 resume은 전체 히스토리로 되돌아가야 함
+    """
+    sys.path.insert(0, HERE)
+    from server import ChatServer
+
+    port = free_port()
+    server = ChatServer("127.0.0.1", port, mode=mode, replay_window=window)
+    server.log_message = lambda msg: None
+    server.start_server()
+    room = "studio"
+    events = make_stroke_events(history + sum(gaps))
+    results = []
+    drawer = None
+
+    def draw(batch):
+        # 자신에게 돌아오는 이벤트를 읽으면서 안내 줄을 기다리면 서버가 모두 기록한 것
+        data = b"".join((json.dumps(event) + "\n").encode("utf-8") for event in batch)
+        join = json.dumps({"type": "join", "room": room}) + "\n"
+        sender = threading.Thread(
+            target=drawer.sendall, args=(data + join.encode("utf-8"),), daemon=True
+        )
+        sender.start()
+        read_resume_sync(drawer)
+        sender.join()
+
+    try:
+        drawer = open_resume_client(port, room, "json")
+        read_resume_sync(drawer)
+        draw(events[:history])
+        written = history
+        for gap in gaps:
+            client = open_resume_client(port, room, fmt)
+            try:
+                _, _, resume, _ = read_resume_sync(client)
+            finally:
+                client.close()
+            draw(events[written : written + gap])
+            written += gap
+            item = {
+                "mode": mode,
+                "format": fmt,
+                "history_events": written,
+                "gap": gap,
+                "window": window,
+            }
+            for kind, request in (("full", None), ("resume", resume)):
+                started = time.perf_counter()
+                client = open_resume_client(port, room, fmt, request)
+                try:
+                    draws, clears, marker, received = read_resume_sync(client)
+                finally:
+                    client.close()
+                item[f"{kind}_bytes"] = received
+                item[f"{kind}_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                item[f"{kind}_draws"] = draws
+                item[f"{kind}_clears"] = clears
+                item[f"{kind}_seq"] = marker and marker["seq"]
+            # gap이 window 안이면 빠진 이벤트만, 밖이면 clear + 전체 히스토리
+            fallback = gap > window
+            expected_draws = item["full_draws"] if fallback else gap
+            item["fallback"] = fallback
+            item["ok"] = (
+                item["resume_draws"] == expected_draws
+                and item["resume_clears"] == (1 if fallback else 0)
+                and item["resume_seq"] == item["full_seq"] == resume["seq"] + gap
+            )
+            results.append(item)
+    finally:
+        if drawer:
+            drawer.close()
+        server.stop_server()
+    return results
+
+
+def cmd_resume(args):
+    report = []
+    for mode in args.modes:
+        for fmt in args.formats:
+            for item in run_resume_case(mode, args.history, args.gaps, args.window, fmt):
+                report.append(item)
+                print(
+                    f"{mode:>8} {fmt:>6} history={item['history_events']:<7} "
+                    f"gap={item['gap']:<6} full={item['full_bytes']}B/{item['full_ms']}ms "
+                    f"resume={item['resume_bytes']}B/{item['resume_ms']}ms "
+                    f"draws={item['resume_draws']}"
+                    f"{' (전체로 대체)' if item['fallback'] else ''} "
+                    f"{'OK' if item['ok'] else 'FAIL'}"
+                )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if not all(item["ok"] for item in report):
+        sys.exit(1)
+
+
+def run_compress_history(events, fmt, method, level, repeat=3):
+    """히스토리 재전송 bytes 하나를 압축/해제하는 비용과 줄어든 바이트"""
+    import protocol
+
+    stream = b"".join(protocol.encode_for(fmt, event) for event in events)
+    frames = len(protocol.split_frames(stream)[0])
+    compress_s = decompress_s = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        data = protocol.StreamCompressor(method, level).compress([stream])
+        elapsed = time.perf_counter() - started
+        compress_s = elapsed if compress_s is None else min(compress_s, elapsed)
+        started = time.perf_counter()
+        inflater = protocol.StreamDecompressor(method)
+        records, _ = protocol.split_frames(data)
+        restored = 0
+        for record in records:
+            restored += len(inflater.decompress(record))
+        elapsed = time.perf_counter() - started
+        decompress_s = elapsed if decompress_s is None else min(decompress_s, elapsed)
+    assert restored == frames
+    return {
+        "history_events": len(events),
+        "format": fmt,
+        "method": method,
+        "level": level,
+        "raw_bytes": len(stream),
+        "compressed_bytes": len(data),
+        "ratio": round(len(stream) / len(data), 2),
+        "compress_ms": round(compress_s * 1000, 3),
+        "decompress_ms": round(decompress_s * 1000, 3),
+        "compress_mb_per_s": round(len(stream) / compress_s / 1e6, 1),
+        # 압축에 쓴 CPU 1ms당 줄어든 바이트
+        "saved_bytes_per_cpu_ms": round((len(stream) - len(data)) / (compress_s * 1000)),
+    }
+
+
+def run_compress_live(events, fmt, method, batch):
+    """
+    실시간 이벤트를 송신 큐에서 batch개씩 꺼내 압축할 때 이벤트당 바이트와 CPU.
+    묶음마다 sync flush와 레코드 헤더가 붙으므로 batch가 작으면 오히려 커질 수 있음
+    """
+    import protocol
+
+    frames = [protocol.encode_for(fmt, event) for event in events]
+    compressor = protocol.StreamCompressor(method)
+    started = time.perf_counter()
+    sent = 0
+    for i in range(0, len(frames), batch):
+        sent += len(compressor.compress(frames[i : i + batch]))
+    elapsed = time.perf_counter() - started
+    raw = sum(len(frame) for frame in frames)
+    return {
+        "format": fmt,
+        "method": method,
+        "batch": batch,
+        "raw_bytes_per_event": round(raw / len(frames), 2),
+        "bytes_per_event": round(sent / len(frames), 2),
+        "ratio": round(raw / sent, 2),
+        "compress_us_per_event": round(elapsed / len(frames) * 1e6, 3),
+    }
+
+
+def open_compressed_client(port, fmt, method):
+    """method 압축을 알리는 클라이언트로 접속 (None이면 압축 없이)"""
+    import protocol
+
+    sock = socket.create_connection(("127.0.0.1", port))
+    features = (protocol.FEATURE_SEGMENT,) + ((method,) if method else ())
+    hello = protocol.hello_message(
+        proto=(protocol.PROTO_BINARY,) if fmt == "binary" else (), features=features
+    )
+    join = json.dumps({"type": "join", "room": "lobby"})
+    sock.sendall((hello + "\n" + join + "\n").encode("utf-8"))
+    return sock
+
+
+def read_compressed_join(sock, method, timeout=120):
+    """안내 줄이 올 때까지 (압축된 묶음은 풀어서) 읽고 (드로잉 프레임 수, 받은 바이트 수) 반환"""
+    import protocol
+
+    sock.settimeout(timeout)
+    framer = protocol.Framer(262144)
+    inflater = protocol.StreamDecompressor(method) if method else None
+    frames = received = 0
+    try:
+        while True:
+            count = framer.recv_from(sock)
+            if not count:
+                raise RuntimeError("서버 연결이 끊어졌습니다")
+            received += count
+            for frame in framer.pop_frames():
+                if protocol.is_binary(frame) and frame[2] == protocol.REC_DEFLATE:
+                    inner = inflater.decompress(frame)
+                else:
+                    inner = [frame]
+                for frame in inner:
+                    if protocol.is_binary(frame) or frame.startswith(b'{"type": "draw"'):
+                        frames += 1
+                    elif "방에 있습니다".encode("utf-8") in frame:
+                        return frames, received
+    finally:
+        sock.settimeout(None)
+
+
+def run_compress_join_case(mode, sizes, formats, methods):
+    """압축 방식별로 늦게 접속한 클라이언트가 히스토리를 모두 받는 데 걸린 시간과 받은 바이트"""
+    sys.path.insert(0, HERE)
+    from server import ChatServer
+
+    port = free_port()
+    server = ChatServer("127.0.0.1", port, mode=mode)
+    server.log_message = lambda msg: None
+    server.start_server()
+    results = []
+    drawer = None
+    try:
+        drawer = open_load_client(port)
+        read_until_joined(drawer)
+        events = make_stroke_events(max(sizes))
+        written = 0
+        for size in sorted(sizes):
+            data = b"".join(
+                (json.dumps(event) + "\n").encode("utf-8") for event in events[written:size]
+            )
+            sender = threading.Thread(
+                target=drawer.sendall,
+                args=(data + b'{"type": "join", "room": "lobby"}\n',),
+                daemon=True,
+            )
+            sender.start()
+            read_until_joined(drawer)
+            sender.join()
+            written = size
+            for fmt in formats:
+                for method in methods:
+                    started = time.perf_counter()
+                    joiner = open_compressed_client(port, fmt, method)
+                    try:
+                        frames, received = read_compressed_join(joiner, method)
+                    finally:
+                        joiner.close()
+                    elapsed = time.perf_counter() - started
+                    results.append(
+                        {
+                            "mode": mode,
+                            "history_events": size,
+                            "format": fmt,
+                            "method": method or "none",
+                            "replay_frames": frames,
+                            "received_bytes": received,
+                            "join_ms": round(elapsed * 1000, 2),
+                        }
+                    )
+    finally:
+        if drawer:
+            drawer.close()
+        server.stop_server()
+    return results
+
+
+def cmd_compress(args):
+    sys.path.insert(0, HERE)
+    import protocol
+
+    methods = list(protocol.COMPRESSION_METHODS)
+    report = {"history": [], "live": [], "join": []}
+    for size in args.history:
+        events = make_stroke_events(size)
+        for fmt in args.formats:
+            for method in methods:
+                for level in args.levels:
+                    item = run_compress_history(events, fmt, method, level)
+                    report["history"].append(item)
+                    print(
+                        f"history {size:<7} {fmt:>6} {method:>12} level={level} "
+                        f"{item['raw_bytes']}B -> {item['compressed_bytes']}B "
+                        f"(x{item['ratio']}) compress={item['compress_ms']}ms "
+                        f"({item['compress_mb_per_s']}MB/s) "
+                        f"decompress={item['decompress_ms']}ms "
+                        f"saved={item['saved_bytes_per_cpu_ms']}B/cpu-ms"
+                    )
+    events = make_stroke_events(args.live_events)
+    for fmt in args.formats:
+        for method in methods:
+            for batch in args.batches:
+                item = run_compress_live(events, fmt, method, batch)
+                report["live"].append(item)
+                print(
+                    f"live batch={batch:<4} {fmt:>6} {method:>12} "
+                    f"{item['raw_bytes_per_event']}B -> {item['bytes_per_event']}B/event "
+                    f"(x{item['ratio']}) {item['compress_us_per_event']}us/event"
+                )
+    if args.join:
+        for item in run_compress_join_case(
+            args.mode, args.join, args.formats, [None] + methods
+        ):
+            report["join"].append(item)
+            print(
+                f"join {item['history_events']:<7} {item['format']:>6} "
+                f"{item['method']:>12} frames={item['replay_frames']} "
+                f"received={item['received_bytes']}B join={item['join_ms']}ms"
+            )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def cmd_serve(args):
+    # 벤치마크용 서버 프로세스 (GUI 없이 실행, SIGTERM으로 종료)
+    raise_fd_limit()
+    sys.path.insert(0, HERE)
+    from server import ChatServer
+
+    options = dict(
+        mode=args.mode,
+        instrument=args.instrument,
+        metrics_port=args.metrics_port,
+        profile=args.profile,
+        profile_out=args.profile_out,
+    )
+    if args.draw_limit:
+        from throttle import DrawLimits
+
+        options["draw_limits"] = DrawLimits.parse(args.draw_limit)
+    if args.workers > 1:
+        from cluster import run_workers
+
+        run_workers(args.workers, host="127.0.0.1", port=args.port, **options)
+        return
+    server = ChatServer(host="127.0.0.1", port=args.port, **options)
+    # kill -USR1 <pid>로 실행 중에 프로파일 저장
+    signal.signal(signal.SIGUSR1, lambda signum, frame: server.dump_profile())
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    if not server.start_server():
+        sys.exit(1)
+    try:
+        while True:
+            time.sleep(1)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        if server.profiler:
+            server.profiler.stop()
+            server.dump_profile()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="채팅/그림판 서버 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("engines", help="thread 모드와 selector 모드 비교")
+    p.add_argument("--clients", type=int, nargs="+", default=[100, 500, 1000, 2000])
+    p.add_argument("--rounds", type=int, default=20)
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_engines)
+
+    p = sub.add_parser(
+        "syscalls", help="전달된 이벤트당 send 시스템 콜 수 (배치 전송 전/후)"
+    )
+    p.add_argument("--receivers", type=int, default=50)
+    p.add_argument("--drawers", type=int, default=4)
+    p.add_argument("--events", type=int, default=300, help="drawer당 move 이벤트 수")
+    p.add_argument("--rate", type=float, default=60, help="drawer당 초당 이벤트 수 (0이면 최대 속도)")
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_syscalls)
+
+    p = sub.add_parser("wire", help="JSON/바이너리 드로잉 프로토콜 크기와 파싱 비용")
+    p.add_argument("--events", type=int, default=100000)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_wire)
+
+    p = sub.add_parser("restart", help="저널 크기에 따른 서버 재시작(복구) 시간")
+    p.add_argument("--events", type=int, nargs="+", default=[10000, 100000, 1000000])
+    p.add_argument("--checkpoint-every", type=int, default=3000)
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_restart)
+
+    p = sub.add_parser(
+        "workers", help="SO_REUSEPORT 워커 수에 따른 드로잉 이벤트 전달 처리량"
+    )
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--receivers", type=int, default=200)
+    p.add_argument("--drawers", type=int, default=8)
+    p.add_argument("--events", type=int, default=500, help="drawer당 move 이벤트 수")
+    p.add_argument("--processes", type=int, default=4, help="수신 클라이언트를 나눠 맡을 프로세스 수")
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_workers)
+
+    p = sub.add_parser(
+        "backplane", help="여러 노드 사이의 방 이벤트 순서/늦은 접속자 동기화 확인"
+    )
+    p.add_argument("--backplane", nargs="+", choices=["local", "tcp"], default=["local", "tcp"])
+    p.add_argument("--nodes", type=int, default=3)
+    p.add_argument("--receivers", type=int, default=30)
+    p.add_argument("--drawers", type=int, default=3)
+    p.add_argument("--events", type=int, default=500, help="drawer당 move 이벤트 수")
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_backplane)
+
+    p = sub.add_parser("framer", help="히스토리 재전송 수신 시 프레임 분리 비용 (split_frames/Framer)")
+    p.add_argument("--events", type=int, default=100000, help="히스토리 드로잉 이벤트 수")
+    p.add_argument("--recv-size", type=int, default=65536)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_framer)
+
+    p = sub.add_parser(
+        "load", help="채팅/드로잉 부하에서의 전달 지연(p50/p99/p999), 처리량, 서버 CPU/RSS"
+    )
+    p.add_argument("--modes", nargs="+", choices=["thread", "selector"], default=["thread", "selector"])
+    p.add_argument("--clients", type=int, default=50, help="전체 접속 수 (모두 수신)")
+    p.add_argument("--drawers", type=int, default=4, help="그중 그림을 그리는 클라이언트 수")
+    p.add_argument("--chatters", type=int, default=4, help="그중 채팅을 보내는 클라이언트 수")
+    p.add_argument("--draw-rate", type=float, default=60, help="drawer당 초당 segment 수")
+    p.add_argument("--chat-rate", type=float, default=2, help="chatter당 초당 채팅 수")
+    p.add_argument("--duration", type=float, default=10, help="부하를 보내는 시간(초)")
+    p.add_argument(
+        "--history", type=int, nargs="*", default=[1000, 10000, 100000],
+        help="늦은 접속자 재전송을 측정할 히스토리 이벤트 수 (비우면 생략)",
+    )
+    p.add_argument("--formats", nargs="+", choices=["legacy", "json", "binary"], default=["json", "binary"])
+    p.add_argument(
+        "--instrument", action="store_true",
+        help="서버 계측을 켜고 처리 단계별 시간/이벤트 개수를 결과에 포함",
+    )
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_load)
+
+    p = sub.add_parser(
+        "coalesce", help="점마다 move를 보내는 drawer가 많을 때 드로잉 제한/합치기에 따른 전달량"
+    )
+    p.add_argument("--clients", type=int, default=50)
+    p.add_argument("--drawers", type=int, default=10)
+    p.add_argument("--move-rate", type=float, default=300, help="drawer당 초당 이벤트 수")
+    p.add_argument("--duration", type=float, default=5)
+    p.add_argument("--coalesce-ms", type=float, default=20)
+    p.add_argument("--rate", type=float, default=120, help="보낸 사람당 초당 제한 (0이면 생략)")
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_coalesce)
+
+    p = sub.add_parser(
+        "canvas", help="받은 드로잉 이벤트 수에 따른 클라이언트 캔버스 프레임 시간/아이템 수/메모리"
+    )
+    p.add_argument("--events", type=int, nargs="+", default=[1000, 10000, 50000, 100000])
+    p.add_argument("--renderers", nargs="+", choices=["items", "renderer"], default=["items", "renderer"])
+    p.add_argument("--batch", type=int, default=100, help="화면 갱신 한 번에 처리할 이벤트 수")
+    p.add_argument("--raster-strokes", type=int, default=1000)
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_canvas)
+
+    p = sub.add_parser(
+        "churn", help="브로드캐스트 중 접속/퇴장이 몰릴 때 클라이언트 목록 정합성과 비용"
+    )
+    p.add_argument("--modes", nargs="+", choices=["thread", "selector"], default=["thread", "selector"])
+    p.add_argument("--receivers", type=int, default=50, help="계속 접속해 있는 수신자 수")
+    p.add_argument("--churners", type=int, default=8, help="접속/퇴장을 반복하는 스레드 수")
+    p.add_argument("--duration", type=float, default=5)
+    p.add_argument("--rate", type=float, default=200, help="초당 채팅 줄 수")
+    p.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000], help="목록 비용을 비교할 접속 수")
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_churn)
+
+    p = sub.add_parser(
+        "convert", help="network_utils 배열 변환 함수와 값 하나씩 변환하는 방식 비교"
+    )
+    p.add_argument("--count", type=int, nargs="+", default=[10000, 1000000])
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_convert)
+
+    p = sub.add_parser(
+        "resume", help="재접속한 클라이언트의 전체 재전송과 resume(빠진 이벤트만) 비교"
+    )
+    p.add_argument("--modes", nargs="+", choices=["thread", "selector"], default=["thread", "selector"])
+    p.add_argument("--history", type=int, default=10000, help="처음 방에 그려 둘 이벤트 수")
+    p.add_argument(
+        "--gaps", type=int, nargs="+", default=[10, 100, 1000, 5000],
+        help="끊겨 있는 동안 더 그려지는 이벤트 수",
+    )
+    p.add_argument("--window", type=int, default=2000, help="서버의 --replay-window")
+    p.add_argument("--formats", nargs="+", choices=["json", "binary"], default=["json", "binary"])
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_resume)
+
+    p = sub.add_parser(
+        "compress", help="연결별 zlib 압축의 CPU 비용과 줄어든 바이트 (히스토리/실시간 묶음/늦은 접속)"
+    )
+    p.add_argument("--history", type=int, nargs="+", default=[1000, 10000, 100000])
+    p.add_argument("--formats", nargs="+", choices=["json", "binary"], default=["json", "binary"])
+    p.add_argument("--levels", type=int, nargs="+", default=[1, 6])
+    p.add_argument("--live-events", type=int, default=20000)
+    p.add_argument(
+        "--batches", type=int, nargs="+", default=[1, 4, 16, 64],
+        help="실시간 이벤트를 송신 큐에서 한 번에 꺼내는 개수",
+    )
+    p.add_argument(
+        "--join", type=int, nargs="*", default=[10000, 100000],
+        help="늦은 접속자 재전송을 측정할 히스토리 이벤트 수 (비우면 생략)",
+    )
+    p.add_argument("--mode", choices=["thread", "selector"], default="selector")
+    p.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    p.set_defaults(func=cmd_compress)
+
+    p = sub.add_parser("serve", help="(내부용) 벤치마크 대상 서버 실행")
+    p.add_argument("--mode", default="thread")
+    p.add_argument("--port", type=int, default=9000)
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--instrument", action="store_true")
+    p.add_argument("--metrics-port", type=int)
+    p.add_argument("--profile", choices=["cprofile", "sample"])
+    p.add_argument("--profile-out")
+    p.add_argument("--draw-limit")
+    p.set_defaults(func=cmd_serve)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+클라이언트 캔버스 렌더링.
+
+점 두 개마다 create_line을 하면 긴 세션 동안 캔버스 아이템이 수만 개가 되어
+다시 그리기와 canvas.delete("all")이 느려진다.
+
+- 진행 중인 획은 line 아이템 하나를 만들고 점이 올 때마다 coords()로 늘림
+- 끝난 획 아이템이 max_items개를 넘으면 Raster(RGB 픽셀 버퍼)에 그려 넣고
+  PhotoImage 하나로 바꾼 뒤 아이템을 지움. Raster에 그리는 일은 after()로
+  한 번에 flatten_budget_ms 동안만 나눠서 하므로 한 프레임이 오래 멈추지 않음.
+  캔버스 아이템 수는 합치는 동안만 잠시 (배경 이미지 1 + 끝난 획 max_items +
+  진행 중인 획 수)를 넘음
+"""
+
+import time
+import tkinter as tk
+
+
+class Raster:
+    """끝난 획을 그려 두는 RGB 픽셀 버퍼 (PPM으로 변환해서 PhotoImage에 올림)"""
+
+    def __init__(self, width, height, background=(255, 255, 255)):
+        self.width = width
+        self.height = height
+        self.background = bytes(background)
+        self.pixels = bytearray(self.background * (width * height))
+        self.header = b"P6 %d %d 255\n" % (width, height)
+
+    def clear(self):
+        self.pixels[:] = self.background * (self.width * self.height)
+
+    def draw_polyline(self, coords, width=2, color=(0, 0, 0)):
+        """[x0, y0, x1, y1, ...] 좌표를 잇는 선을 width 픽셀 두께로 그림"""
+        rgb = bytes(color)
+        size = max(1, int(width))
+        offset = size // 2
+        pixels = self.pixels
+        w, h = self.width, self.height
+        row = rgb * size
+        plotted = set()  # 같은 점을 여러 번 칠하지 않도록
+        for i in range(0, len(coords) - 2, 2):
+            x0, y0 = int(coords[i]), int(coords[i + 1])
+            x1, y1 = int(coords[i + 2]), int(coords[i + 3])
+            dx, dy = abs(x1 - x0), -abs(y1 - y0)
+            sx = 1 if x0 < x1 else -1
+            sy = 1 if y0 < y1 else -1
+            err = dx + dy
+            while True:
+                if (x0, y0) not in plotted:
+                    plotted.add((x0, y0))
+                    left = x0 - offset
+                    top = y0 - offset
+                    if left < w and top < h and left + size > 0 and top + size > 0:
+                        start = max(0, left)
+                        end = min(w, left + size)
+                        span = row[: (end - start) * 3]
+                        for y in range(max(0, top), min(h, top + size)):
+                            base = (y * w + start) * 3
+                            pixels[base : base + len(span)] = span
+                if x0 == x1 and y0 == y1:
+                    break
+                e2 = 2 * err
+                if e2 >= dy:
+                    err += dy
+                    x0 += sx
+                if e2 <= dx:
+                    err += dx
+                    y0 += sy
+
+    def to_ppm(self):
+        return self.header + bytes(self.pixels)
+
+
+class CanvasRenderer:
+    """
+    획 단위로 캔버스에 그림. key로 획을 구분 (로컬 드로잉 "local", 원격 "remote").
+    Tk 위젯을 다루므로 GUI 스레드에서만 호출
+    """
+
+    def __init__(
+        self,
+        canvas,
+        width,
+        height,
+        line_width=2,
+        color="black",
+        max_items=300,
+        max_stroke_points=512,
+        flatten_budget_ms=8,
+    ):
+        self.canvas = canvas
+        self.line_width = line_width
+        self.color = color
+        self.raster = Raster(width, height)
+        self.raster_color = tuple(c >> 8 for c in canvas.winfo_rgb(color))
+        self.photo = None  # Raster를 올린 PhotoImage (처음 합칠 때 생성)
+        self.image_item = None
+        self.max_items = max_items  # 남겨 둘 끝난 획 아이템 수 (넘으면 이미지로 합침)
+        self.max_stroke_points = max_stroke_points  # 아이템 하나의 최대 점 수 (넘으면 나눔)
+        self.active = {}  # key -> [아이템 id 또는 None, 좌표 목록]
+        self.finished = []  # 아직 아이템으로 남아 있는 끝난 획 (아이템 id, 좌표 목록)
+        self.rastered = 0  # finished 앞에서부터 Raster에 이미 그린 획 수
+        self.flatten_budget = flatten_budget_ms / 1000  # after() 한 번에 Raster에 그릴 최대 시간
+        self.flatten_job = None
+        self.flattened_strokes = 0
+        self.flatten_count = 0
+        self.flatten_seconds = 0.0
+
+    def begin(self, key, x, y):
+        if key in self.active:
+            self.end(key)
+        self.active[key] = [None, [x, y]]
+
+    def extend(self, key, points):
+        """진행 중인 획에 점들을 이어 그림 (start 없이 온 점은 무시)"""
+        stroke = self.active.get(key)
+        if stroke is None or not points:
+            return
+        coords = stroke[1]
+        for x, y in points:
+            coords.append(x)
+            coords.append(y)
+        if stroke[0] is None:
+            stroke[0] = self.canvas.create_line(
+                *coords, fill=self.color, width=self.line_width
+            )
+        else:
+            self.canvas.coords(stroke[0], coords)
+        if len(coords) >= 2 * self.max_stroke_points:
+            # 아주 긴 획은 coords() 비용이 커지지 않도록 끊어서 이어 그림
+            x, y = coords[-2], coords[-1]
+            self.end(key)
+            self.active[key] = [None, [x, y]]
+
+    def end(self, key):
+        stroke = self.active.pop(key, None)
+        if stroke is None or stroke[0] is None:
+            return
+        self.finished.append((stroke[0], stroke[1]))
+        if len(self.finished) > self.max_items and self.flatten_job is None:
+            self.flatten_job = self.canvas.after_idle(self.flatten_step)
+
+    def flatten_step(self):
+        """
+        끝난 획을 flatten_budget 동안만 Raster에 그리고, 남았으면 다음 after()로 넘김.
+        모두 그렸으면 PhotoImage를 한 번 갱신하고 그린 아이템을 지움
+        """
+        self.flatten_job = None
+        started = time.perf_counter()
+        deadline = started + self.flatten_budget
+        finished = self.finished
+        while self.rastered < len(finished):
+            coords = finished[self.rastered][1]
+            self.raster.draw_polyline(coords, self.line_width, self.raster_color)
+            self.rastered += 1
+            if time.perf_counter() >= deadline:
+                break
+        self.flatten_seconds += time.perf_counter() - started
+        if self.rastered < len(finished):
+            self.flatten_job = self.canvas.after(1, self.flatten_step)
+        else:
+            self.flatten()
+
+    def flatten(self):
+        """끝난 획 아이템을 모두 Raster에 그리고 PhotoImage 하나로 바꿈"""
+        if self.flatten_job is not None:
+            self.canvas.after_cancel(self.flatten_job)
+            self.flatten_job = None
+        if not self.finished:
+            return
+        started = time.perf_counter()
+        for _, coords in self.finished[self.rastered :]:
+            self.raster.draw_polyline(coords, self.line_width, self.raster_color)
+        self.canvas.delete(*[item for item, _ in self.finished])
+        self.flattened_strokes += len(self.finished)
+        self.finished = []
+        self.rastered = 0
+        data = self.raster.to_ppm()
+        if self.photo is None:
+            self.photo = tk.PhotoImage(master=self.canvas, data=data, format="PPM")
+        else:
+            self.photo.configure(data=data, format="PPM")
+        if self.image_item is None:
+            self.image_item = self.canvas.create_image(0, 0, image=self.photo, anchor="nw")
+            self.canvas.tag_lower(self.image_item)
+        self.flatten_count += 1
+        self.flatten_seconds += time.perf_counter() - started
+
+    def clear(self):
+        if self.flatten_job is not None:
+            self.canvas.after_cancel(self.flatten_job)
+            self.flatten_job = None
+        self.canvas.delete("all")
+        self.raster.clear()
+        self.image_item = None
+        self.active = {}
+        self.finished = []
+        self.rastered = 0
+
+    def item_count(self):
+        return len(self.finished) + len(self.active) + (self.image_item is not None)
+
+    def stats(self):
+        return {
+            "items": self.item_count(),
+            "active_strokes": len(self.active),
+            "vector_strokes": len(self.finished),
+            "flattened_strokes": self.flattened_strokes,
+            "flatten_count": self.flatten_count,
+            "flatten_ms": round(self.flatten_seconds * 1000, 2),
+        }
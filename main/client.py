@@ -2,79 +2,239 @@ import socket
 import threading
 import tkinter as tk
 import json
+import os
+import random
+import time
+from collections import deque
 from tkinter import scrolledtext
+import protocol
+from stroke import simplify
+from canvas_renderer import CanvasRenderer
+from logview import LogView, DEBUG, WARNING
+from netservice import NetService
 from network_utils import (
     get_ifconfig_info,
     convert_byte_order,
     convert_ip_address,
-    dns_lookup,
     get_netstat_info,
+    get_tcp_sockets,
+    format_tcp_sockets,
+    tcp_info,
+    PROC_NET_TCP,
 )
 
 
+UI_FRAME_MS = 16  # 수신 이벤트를 확인하는 간격
+UI_BUDGET_MS = 8  # 한 프레임에 수신 이벤트 반영에 쓸 최대 시간
+RECONNECT_BASE = 0.5  # 연결이 끊겼을 때 첫 재접속 대기 상한(초), 실패할 때마다 두 배
+RECONNECT_CAP = 30.0  # 재접속 대기 상한의 최댓값(초)
+
+
 class ChatClient:
-    def __init__(self, host="127.0.0.1", port=9000):
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=9000,
+        use_binary=True,
+        use_delta=True,
+        recv_size=65536,
+        auto_reconnect=True,
+        compression=True,
+    ):
         self.host = host
         self.port = port
         self.client_socket = None
         self.gui = None
         self.running = False
         self.local_port = None
+        # 접속하자마자 hello로 지원하는 형식/기능을 알리고, 서버가 hello로 답한 것만 사용
+        # (서버가 바이너리를 고르면 드로잉 이벤트를 바이너리로 주고받음)
+        self.use_binary = use_binary
+        self.use_delta = use_delta
+        self.recv_size = recv_size  # recv_into 한 번에 읽을 최대 바이트 수
+        self.binary = False
+        self.segments = False  # 서버가 여러 점을 묶은 segment 메시지를 지원하는지
+        self.encoder = None
+        self.decoder = None
+        # 서버가 지원하면 히스토리 재전송 등 큰 묶음을 zlib 스트림 압축으로 받음
+        self.compression = compression
+        self.inflater = None  # 협상한 protocol.StreamDecompressor
+        # 연결이 끊기면 지터를 준 지수 백오프로 다시 접속하고, 마지막으로 받은
+        # 방 이벤트 번호(resume)를 보내 빠진 이벤트만 받음
+        self.auto_reconnect = auto_reconnect
+        self.closing = threading.Event()  # 사용자가 연결을 해제함 (재접속 안 함)
+        self.resume = None  # {"room", "seq", "epoch"}: 서버가 알려 준 기준 + 마지막 번호
+        self.reconnects = 0
+        # 수신 스레드가 디코딩한 이벤트 ("draw", dict) / ("clear", None) / ("chat", 줄) /
+        # ("debug", 줄) / ("closed", 안내) / ("call", (콜백, 완료된 Future)) /
+        # ("status", 안내) / ("reconnected", 안내).
+        # GUI 스레드의 ClientGUI.pump_events가 프레임마다 꺼내서 반영
+        self.inbox = deque()
 
     def connect_to_server(self):
         if not self.running:
+            self.closing.clear()
+            self.resume = None  # 사용자가 새로 접속하면 처음부터 받음
             try:
-                self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self.client_socket.connect((self.host, self.port))
-                self.local_port = self.client_socket.getsockname()[1]
-                self.running = True
+                self.open_connection()
                 self.log_message("서버에 연결되었습니다.")
-                threading.Thread(target=self.receive_messages, daemon=True).start()
                 self.refresh_netstat()
                 return True
             except Exception as e:
                 self.log_message(f"서버 접속 실패: {e}")
-                if self.client_socket:
-                    self.client_socket.close()
-                self.client_socket = None
                 return False
 
+    def open_connection(self):
+        """소켓을 연결하고 수신 스레드를 시작 (GUI를 건드리지 않으므로 어느 스레드에서든 호출)"""
+        client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            client_socket.connect((self.host, self.port))
+        except:
+            client_socket.close()
+            raise
+        self.client_socket = client_socket
+        self.local_port = client_socket.getsockname()[1]
+        self.binary = False
+        self.segments = False
+        self.encoder = protocol.DeltaEncoder(self.use_delta)
+        self.decoder = protocol.DeltaDecoder()
+        self.inflater = None
+        try:
+            client_socket.sendall(self.hello().encode("utf-8"))
+        except:
+            self.client_socket = None
+            client_socket.close()
+            raise
+        self.running = True
+        threading.Thread(target=self.receive_messages, daemon=True).start()
+
     def receive_messages(self):
-        buffer = ""
+        framer = protocol.Framer(self.recv_size)
         while self.running:
             try:
-                data = self.client_socket.recv(1024)
-                if not data:
+                if not framer.recv_from(self.client_socket):
                     break
-                buffer += data.decode("utf-8")
-                while "\n" in buffer:
-                    line, buffer = buffer.split("\n", 1)
-                    if not line.strip():
-                        continue
-                    try:
-                        message_dict = json.loads(line)
-                        if isinstance(message_dict, dict) and "type" in message_dict:
-                            if message_dict["type"] == "draw":
-                                self.gui.master.after(
-                                    0, self.gui.handle_draw_event, message_dict
-                                )
-                                continue
-                            elif message_dict["type"] == "clear":
-                                self.gui.master.after(0, self.gui.handle_clear_event)
-                                continue
-                    except json.JSONDecodeError:
-                        pass
-                    # 일반 채팅 메시지 처리
-                    self.gui.master.after(0, self.append_message, line)
+                for frame in framer.pop_frames():
+                    if protocol.is_binary(frame) and frame[2] == protocol.REC_DEFLATE:
+                        # 압축된 묶음: 풀어낸 프레임들을 순서대로 처리
+                        if self.inflater is None:
+                            raise ValueError("협상하지 않은 압축 레코드")
+                        for inner in self.inflater.decompress(frame):
+                            self.handle_frame(inner)
+                    else:
+                        self.handle_frame(frame)
             except Exception as e:
-                self.log_debug(f"예외 발생: {e}")
+                if not self.closing.is_set():
+                    self.inbox.append(("debug", f"예외 발생: {e}"))
                 break
-        self.log_message("서버와의 연결이 종료되었습니다.")
         self.running = False
-        # GUI 버튼 상태 업데이트
-        if self.gui:
-            self.gui.update_connection_buttons(False)
-        self.refresh_netstat()
+        if self.auto_reconnect and not self.closing.is_set():
+            self.close_socket()
+            self.reconnect()
+            return
+        # 상태 표시/버튼/netstat 갱신은 GUI 스레드에서
+        self.inbox.append(("closed", "서버와의 연결이 종료되었습니다."))
+
+    def handle_frame(self, frame):
+        if protocol.is_binary(frame):
+            message_dict = self.decoder.decode(frame)
+            if message_dict is None:
+                return
+            if message_dict["type"] == "seq":
+                self.handle_seq(message_dict)
+            else:
+                self.dispatch_draw_event(message_dict)
+            return
+        line = frame.decode("utf-8").rstrip("\n")
+        if not line.strip():
+            return
+        try:
+            message_dict = json.loads(line)
+            if isinstance(message_dict, dict) and "type" in message_dict:
+                if message_dict["type"] in ("draw", "clear"):
+                    self.dispatch_draw_event(message_dict)
+                    return
+                elif message_dict["type"] == "seq":
+                    self.handle_seq(message_dict)
+                    return
+                elif message_dict["type"] == "hello":
+                    self.handle_hello(message_dict)
+                    return
+        except json.JSONDecodeError:
+            pass
+        # 일반 채팅 메시지 처리
+        self.inbox.append(("chat", line))
+
+    def reconnect(self):
+        """
+        사용자가 연결을 해제할 때까지 다시 접속 (수신 스레드에서 호출).
+        대기 시간은 0 ~ min(RECONNECT_CAP, RECONNECT_BASE * 2^시도) 사이에서 무작위로
+        골라서, 서버가 재시작될 때 클라이언트들이 한꺼번에 몰리지 않게 함
+        """
+        attempt = 0
+        while not self.closing.is_set():
+            self.inbox.append(("status", "연결이 끊겨 다시 접속하는 중..."))
+            delay = random.uniform(0, min(RECONNECT_CAP, RECONNECT_BASE * 2**attempt))
+            attempt += 1
+            if self.closing.wait(delay):
+                break
+            try:
+                self.open_connection()
+            except OSError as e:
+                self.inbox.append(("debug", f"재접속 실패 ({attempt}회): {e}"))
+                continue
+            if self.closing.is_set():
+                # 연결하는 사이에 사용자가 연결을 해제함
+                self.running = False
+                self.close_socket()
+                break
+            self.reconnects += 1
+            self.inbox.append(("reconnected", "서버에 다시 연결되었습니다."))
+            return
+        self.inbox.append(("closed", "서버와의 연결이 종료되었습니다."))
+
+    def handle_seq(self, message_dict):
+        """방 이벤트 번호 기록. room/epoch가 있으면 새 기준 (방 입장, 히스토리 수신 뒤)"""
+        seq = message_dict.get("seq")
+        if not isinstance(seq, int):
+            return
+        if "epoch" in message_dict:
+            self.resume = {
+                "room": message_dict.get("room"),
+                "seq": seq,
+                "epoch": message_dict["epoch"],
+            }
+        elif self.resume is not None:
+            self.resume["seq"] = seq
+
+    def dispatch_draw_event(self, message_dict):
+        if message_dict["type"] == "draw":
+            self.inbox.append(("draw", message_dict))
+        else:
+            self.inbox.append(("clear", None))
+
+    def hello(self):
+        """접속 직후 보내는 hello 줄 (지원하는 형식/기능, 재접속이면 resume)"""
+        proto = (protocol.PROTO_BINARY,) if self.use_binary else ()
+        features = (protocol.FEATURE_SEGMENT, protocol.FEATURE_RESUME)
+        if self.compression:
+            features += protocol.COMPRESSION_METHODS
+        fields = {}
+        if self.resume is not None:
+            # 재접속: 마지막으로 받은 번호 이후의 이벤트만 요청
+            fields["resume"] = self.resume
+        return protocol.hello_message(proto=proto, features=features, **fields) + "\n"
+
+    def handle_hello(self, message_dict):
+        # 서버가 고른 형식/기능 적용 (압축한 레코드는 이 응답 뒤부터 옴)
+        server_format = protocol.negotiate_format(message_dict)
+        self.binary = self.use_binary and server_format == "binary"
+        features = message_dict.get("features") or []
+        self.segments = protocol.FEATURE_SEGMENT in features
+        method = None
+        if self.compression:
+            method = protocol.negotiate_compression(protocol.COMPRESSION_METHODS, message_dict)
+        self.inflater = protocol.StreamDecompressor(method, self.recv_size) if method else None
 
     def send_message(self, message):
         if self.running and message.strip():
@@ -85,12 +245,33 @@ class ChatClient:
                 return True
             except:
                 self.log_message("메시지 전송 실패")
-                self.disconnect()
+                self.drop_connection()
                 return False
 
+    def join_room(self, room):
+        """다른 방(캔버스)으로 이동 요청. 서버가 새 방의 그림을 다시 보내줌"""
+        return self.send_control({"type": "join", "room": room})
+
+    def leave_room(self):
+        """기본 방으로 돌아감"""
+        return self.send_control({"type": "leave"})
+
+    def send_control(self, message):
+        if self.running:
+            try:
+                self.client_socket.sendall((json.dumps(message) + "\n").encode("utf-8"))
+                return True
+            except:
+                self.log_message("메시지 전송 실패")
+                self.drop_connection()
+        return False
+
     def send_draw_event(self, event_type, x, y):
         if self.running:
             try:
+                if self.binary:
+                    self.client_socket.sendall(self.encoder.encode(event_type, x, y))
+                    return True
                 draw_data = {"type": "draw", "action": event_type, "x": x, "y": y}
                 full_message = (
                     json.dumps(draw_data) + "\n"
@@ -101,9 +282,36 @@ class ChatClient:
                 self.log_message("드로잉 이벤트 전송 실패")
                 return False
 
+    def send_stroke_segment(self, points):
+        """획 중간의 여러 점을 한 메시지로 전송 (지원하지 않는 서버면 점마다 move)"""
+        if not self.running or not points:
+            return False
+        if not self.segments:
+            for x, y in points:
+                if not self.send_draw_event("move", x, y):
+                    return False
+            return True
+        try:
+            if self.binary:
+                self.client_socket.sendall(self.encoder.encode_segment(points))
+            else:
+                segment = {
+                    "type": "draw",
+                    "action": "segment",
+                    "points": [[x, y] for x, y in points],
+                }
+                self.client_socket.sendall((json.dumps(segment) + "\n").encode("utf-8"))
+            return True
+        except:
+            self.log_message("드로잉 이벤트 전송 실패")
+            return False
+
     def send_clear_event(self):
         if self.running:
             try:
+                if self.binary:
+                    self.client_socket.sendall(protocol.encode_clear())
+                    return True
                 clear_data = {"type": "clear"}
                 full_message = (
                     json.dumps(clear_data) + "\n"
@@ -116,11 +324,7 @@ class ChatClient:
 
     def append_message(self, msg):
         if self.gui:
-            self.gui.chat_area.config(state="normal")
-            self.gui.chat_area.insert(tk.END, msg + "\n")
-            self.gui.chat_area.see(tk.END)
-            self.gui.chat_area.config(state="disabled")
-        print(msg)
+            self.gui.append_message(msg)
 
     def log_message(self, msg):
         if self.gui:
@@ -128,16 +332,32 @@ class ChatClient:
         print(msg)
 
     def disconnect(self):
+        self.closing.set()
         self.running = False
-        if self.client_socket:
+        self.close_socket()
+        self.log_message("서버와의 연결이 해제되었습니다.")
+        self.refresh_netstat()
+
+    def drop_connection(self):
+        """전송 실패 등으로 연결만 끊음 (auto_reconnect면 수신 스레드가 다시 접속)"""
+        if not self.auto_reconnect:
+            self.disconnect()
+            return
+        client_socket = self.client_socket
+        if client_socket:
             try:
-                self.client_socket.shutdown(socket.SHUT_RDWR)
-                self.client_socket.close()
+                client_socket.shutdown(socket.SHUT_RDWR)
             except:
                 pass
-        self.client_socket = None
-        self.log_message("서버와의 연결이 해제되었습니다.")
-        self.refresh_netstat()
+
+    def close_socket(self):
+        client_socket, self.client_socket = self.client_socket, None
+        if client_socket:
+            try:
+                client_socket.shutdown(socket.SHUT_RDWR)
+            except:
+                pass
+            client_socket.close()
 
     def refresh_netstat(self):
         if self.gui:
@@ -145,10 +365,12 @@ class ChatClient:
 
 
 class ClientGUI:
-    def __init__(self, master, client: ChatClient):
+    def __init__(self, master, client: ChatClient, debug=False):
         self.master = master
         self.client = client
         self.client.gui = self
+        # DNS/네트워크 정보 조회용 워커 풀 (결과는 inbox를 거쳐 GUI 스레드에서 반영)
+        self.net = NetService()
 
         master.title("네트워크 채팅 클라이언트")
         master.configure(padx=10, pady=10)
@@ -161,6 +383,8 @@ class ClientGUI:
             chat_frame, state="disabled", width=50, height=20
         )
         self.chat_area.pack(fill=tk.BOTH, expand=True)
+        # 최근 1000줄만 위젯에 두고 이전 줄은 위로 스크롤하면 임시 파일에서 불러옴
+        self.chat_log = LogView(self.chat_area, capacity=1000)
 
         # 메시지 입력 및 전송
         input_frame = tk.Frame(chat_frame)
@@ -270,6 +494,13 @@ class ClientGUI:
         # 디버그용 텍스트 영역 추가
         self.debug_text = tk.Text(canvas_frame, height=5, state="disabled")
         self.debug_text.pack(side=tk.BOTTOM, fill=tk.X, pady=5)
+        # 디버그 창은 최근 200줄만 유지하고, debug=False면 드로잉 디버그 줄은 바로 버림
+        self.debug_log = LogView(
+            self.debug_text,
+            capacity=200,
+            level=DEBUG if debug else WARNING,
+            scrollback=False,
+        )
 
         # netstat 영역은 아래쪽(row=1)에 3컬럼을 모두 사용하도록 설정
         netstat_frame = tk.LabelFrame(master, text="포트 상태(netstat)", padx=5, pady=5)
@@ -286,10 +517,19 @@ class ClientGUI:
         self.netstat_button.pack()
 
         self.drawing = False
-        self.local_last_x = None  # 로컬 드로잉용 변수
-        self.local_last_y = None
-        self.last_x = None  # 원격 드로잉용 변수
-        self.last_y = None
+        # 획마다 line 아이템 하나를 coords()로 늘리고, 끝난 획이 많아지면 이미지로 합침
+        self.renderer = CanvasRenderer(self.canvas, 400, 300)
+        # move 좌표는 모아 두었다가 일정 시간/개수마다 segment 하나로 전송
+        self.pending_points = []
+        self.last_sent_point = None
+        self.flush_job = None
+        self.flush_interval_ms = 16
+        self.max_batch_points = 32
+        self.simplify_epsilon = 0.5  # RDP 허용 오차(픽셀), 0이면 사용 안 함
+        self.min_point_distance = 0  # 최소 점 간격(픽셀), 0이면 사용 안 함
+        # 수신 이벤트는 프레임(UI_FRAME_MS)마다 UI_BUDGET_MS 동안만 반영하고
+        # 남은 것은 입력 이벤트를 처리할 틈을 둔 뒤 이어서 처리
+        self.master.after(UI_FRAME_MS, self.pump_events)
 
         # Grid 설정 (3 컬럼 레이아웃)
         master.grid_columnconfigure(0, weight=1)
@@ -338,6 +578,15 @@ class ClientGUI:
 
     def send_message(self, event=None):
         message = self.entry_message.get().strip()
+        # /join 방이름, /leave 로 방 이동
+        if message.startswith("/join "):
+            self.client.join_room(message[len("/join "):].strip())
+            self.entry_message.delete(0, tk.END)
+            return
+        if message == "/leave":
+            self.client.leave_room()
+            self.entry_message.delete(0, tk.END)
+            return
         if message:
             if self.client.send_message(message):
                 self.entry_message.delete(0, tk.END)
@@ -345,139 +594,253 @@ class ClientGUI:
 
     def start_draw(self, event):
         self.drawing = True
-        self.local_last_x, self.local_last_y = event.x, event.y
+        self.renderer.begin("local", event.x, event.y)
+        self.pending_points = []
+        self.last_sent_point = (event.x, event.y)
         self.client.send_draw_event("start", event.x, event.y)
-        self.log_debug(f"start_draw at ({event.x}, {event.y})")
+        if self.debug_log.enabled(DEBUG):
+            self.log_debug(f"start_draw at ({event.x}, {event.y})")
 
     def draw(self, event):
         if self.drawing:
-            # 이전 좌표와 현재 좌표를 연결하는 선 그리기
-            self.canvas.create_line(
-                self.local_last_x,
-                self.local_last_y,
-                event.x,
-                event.y,
-                fill="black",
-                width=2,
-            )
-            self.client.send_draw_event("move", event.x, event.y)
-            self.log_debug(f"draw at ({event.x}, {event.y})")
-            self.local_last_x, self.local_last_y = event.x, event.y
+            # 진행 중인 획의 선을 현재 좌표까지 늘림
+            self.renderer.extend("local", [(event.x, event.y)])
+            self.pending_points.append((event.x, event.y))
+            if len(self.pending_points) >= self.max_batch_points:
+                self.flush_points()
+            elif self.flush_job is None:
+                self.flush_job = self.master.after(
+                    self.flush_interval_ms, self.flush_points
+                )
+
+    def flush_points(self):
+        """모아 둔 move 좌표를 간소화해서 segment 하나로 전송"""
+        if self.flush_job is not None:
+            self.master.after_cancel(self.flush_job)
+            self.flush_job = None
+        if not self.pending_points:
+            return
+        raw_count = len(self.pending_points)
+        points = simplify(
+            self.pending_points,
+            anchor=self.last_sent_point,
+            epsilon=self.simplify_epsilon,
+            min_distance=self.min_point_distance,
+        )
+        self.pending_points = []
+        if points:
+            self.client.send_stroke_segment(points)
+            self.last_sent_point = points[-1]
+        if self.debug_log.enabled(DEBUG):
+            self.log_debug(f"segment {len(points)}/{raw_count} points")
 
     def stop_draw(self, event):
         if self.drawing:
             self.drawing = False
+            self.renderer.end("local")
+            self.flush_points()
             self.client.send_draw_event("end", event.x, event.y)
-            self.log_debug(f"stop_draw at ({event.x}, {event.y})")
+            if self.debug_log.enabled(DEBUG):
+                self.log_debug(f"stop_draw at ({event.x}, {event.y})")
+
+    def pump_events(self):
+        """수신 스레드가 쌓은 이벤트를 시간 예산 안에서 꺼내 한꺼번에 반영 (GUI 스레드)"""
+        inbox = self.client.inbox
+        deadline = time.perf_counter() + UI_BUDGET_MS / 1000
+        draws = []
+        lines = []
+        while inbox:
+            # 시간 확인은 이벤트 몇 개마다 한 번만
+            for _ in range(min(len(inbox), 64)):
+                kind, value = inbox.popleft()
+                if kind == "draw":
+                    draws.append(value)
+                    continue
+                if draws:
+                    self.apply_draw_events(draws)
+                    draws = []
+                if kind == "chat":
+                    lines.append(value)
+                elif kind == "clear":
+                    self.handle_clear_event()
+                elif kind == "debug":
+                    self.log_debug(value, WARNING)
+                elif kind == "call":
+                    callback, future = value
+                    if future.cancelled():
+                        continue
+                    if future.exception() is not None:
+                        self.log_debug(f"조회 실패: {future.exception()}", WARNING)
+                    else:
+                        callback(future.result())
+                elif kind == "closed":
+                    self.client.log_message(value)
+                    self.update_connection_buttons(False)
+                    self.client.refresh_netstat()
+                elif kind == "status":
+                    self.client.log_message(value)
+                elif kind == "reconnected":
+                    self.client.log_message(value)
+                    self.update_connection_buttons(True)
+                    self.enable_canvas()
+                    self.client.refresh_netstat()
+            if time.perf_counter() >= deadline:
+                break
+        if draws:
+            self.apply_draw_events(draws)
+        if lines:
+            self.append_messages(lines)
+        self.master.after(1 if inbox else UI_FRAME_MS, self.pump_events)
+
+    def apply_draw_events(self, events):
+        """이어지는 move/segment 좌표는 모아서 renderer 호출 한 번으로 그림"""
+        points = []
+        for event_data in events:
+            action = event_data["action"]
+            if action == "move" and "remote" in self.renderer.active:
+                points.append((event_data["x"], event_data["y"]))
+            elif action == "segment" and points:
+                points.extend(event_data["points"])
+            else:
+                if points:
+                    self.renderer.extend("remote", points)
+                    points = []
+                self.handle_draw_event(event_data)
+        if points:
+            self.renderer.extend("remote", points)
 
     def handle_draw_event(self, event_data):
-        x, y = event_data["x"], event_data["y"]
-        if event_data["action"] == "start":
-            self.last_x = x
-            self.last_y = y
-        elif event_data["action"] == "move" and self.last_x is not None:
-            # 이전 좌표와 현재 좌표를 연결하는 선 그리기
-            self.canvas.create_line(
-                self.last_x, self.last_y, x, y, fill="black", width=2
-            )
-            self.last_x = x
-            self.last_y = y
-        elif event_data["action"] == "end":
-            self.last_x = None
-            self.last_y = None
+        action = event_data["action"]
+        if action == "start":
+            self.renderer.begin("remote", event_data["x"], event_data["y"])
+        elif action == "move":
+            # start 없이 온 move는 이을 점이 없으므로 무시
+            self.renderer.extend("remote", [(event_data["x"], event_data["y"])])
+        elif action == "segment" and event_data["points"]:
+            points = event_data["points"]
+            if "remote" not in self.renderer.active:
+                self.renderer.begin("remote", *points[0])
+                points = points[1:]
+            self.renderer.extend("remote", points)
+        elif action == "end":
+            self.renderer.end("remote")
 
     def clear_canvas(self):
-        self.canvas.delete("all")
+        self.renderer.clear()
         self.client.send_clear_event()
 
     def handle_clear_event(self):
-        self.canvas.delete("all")
+        self.renderer.clear()
 
     def append_message(self, msg):
-        self.chat_area.config(state="normal")
-        self.chat_area.insert(tk.END, msg + "\n")
-        self.chat_area.see(tk.END)
-        self.chat_area.config(state="disabled")
-        print(msg)
+        self.append_messages([msg])
+
+    def append_messages(self, lines):
+        """채팅 줄 여러 개를 모아서 Text.insert 한 번으로 추가 (LogView)"""
+        self.chat_log.extend(lines)
 
     def log_message(self, msg):
         print(msg)
         if self.gui:
             self.gui.status_label.config(text=msg)
 
-    def log_debug(self, message):
-        self.debug_text.config(state="normal")
-        self.debug_text.insert(tk.END, message + "\n")
-        self.debug_text.see(tk.END)
-        self.debug_text.config(state="disabled")
-        print(message)
+    def log_debug(self, message, level=DEBUG):
+        self.debug_log.write(message, level)
+
+    # 네트워크 정보 관련 메서드 (DNS/인터페이스/소켓 조회는 워커에서 실행하고 결과만 GUI에 반영)
+    def run_background(self, future, callback):
+        """Future가 끝나면 pump_events가 GUI 스레드에서 callback(결과)를 호출"""
+        future.add_done_callback(lambda f: self.client.inbox.append(("call", (callback, f))))
+
+    def set_text(self, widget, text):
+        widget.config(state="normal")
+        widget.delete("1.0", tk.END)
+        widget.insert(tk.END, text)
+        widget.config(state="disabled")
 
-    # 네트워크 정보 관련 메서드
     def show_ifconfig_info(self):
-        info = get_ifconfig_info()
-        self.ifconfig_text.config(state="normal")
-        self.ifconfig_text.delete("1.0", tk.END)
-        self.ifconfig_text.insert(tk.END, info)
-        self.ifconfig_text.config(state="disabled")
+        self.run_background(
+            self.net.submit(get_ifconfig_info),
+            lambda info: self.set_text(self.ifconfig_text, info),
+        )
 
     def show_byte_order_conversion(self):
         try:
             value = int(self.byte_order_entry.get())
-            result = convert_byte_order(value)
-            self.byte_order_result.config(state="normal")
-            self.byte_order_result.delete("1.0", tk.END)
-            self.byte_order_result.insert(tk.END, result)
-            self.byte_order_result.config(state="disabled")
+            self.set_text(self.byte_order_result, convert_byte_order(value))
         except ValueError:
-            self.byte_order_result.config(state="normal")
-            self.byte_order_result.delete("1.0", tk.END)
-            self.byte_order_result.insert(tk.END, "올바른 정수를 입력하세요")
-            self.byte_order_result.config(state="disabled")
+            self.set_text(self.byte_order_result, "올바른 정수를 입력하세요")
 
     def show_ip_conversion(self):
         ip = ".".join(block.get() for block in self.ip_blocks)
-        result = convert_ip_address(ip)
-        self.ip_result_text.config(state="normal")
-        self.ip_result_text.delete("1.0", tk.END)
-        self.ip_result_text.insert(tk.END, result)
-        self.ip_result_text.config(state="disabled")
+        self.set_text(self.ip_result_text, convert_ip_address(ip))
 
     def show_dns_conversion(self):
         domain = self.dns_entry.get()
-        result = dns_lookup(domain)
-        self.dns_result_text.config(state="normal")
-        self.dns_result_text.delete("1.0", tk.END)
-        self.dns_result_text.insert(tk.END, result)
-        self.dns_result_text.config(state="disabled")
+        self.set_text(self.dns_result_text, f"{domain} 조회 중...")
+        self.run_background(
+            self.net.dns_lookup(domain),
+            lambda result: self.set_text(self.dns_result_text, result),
+        )
 
     def show_netstat_info(self):
         port = self.client.port if self.client.running else None
         local_port = self.client.local_port if self.client.local_port else ""
+        self.run_background(
+            self.net.submit(self.netstat_report, port, local_port, self.client.client_socket),
+            lambda info: self.set_text(self.netstat_text, info),
+        )
 
+    def netstat_report(self, port, local_port, client_socket):
+        """현재 클라이언트 연결과 서버 리스닝 소켓 상태 (워커 스레드에서 실행)"""
+        if port and os.path.exists(PROC_NET_TCP[0][1]):
+            # 서버 포트의 소켓 중 현재 클라이언트 연결(양방향)과 리스닝 소켓만 표시
+            records = [
+                r
+                for r in get_tcp_sockets(port)
+                if local_port in (r["local_port"], r["remote_port"])
+                or (r["state"] == "LISTEN" and r["local_port"] == port)
+            ]
+            report = format_tcp_sockets(records)
+            info = tcp_info(client_socket) if client_socket else None
+            if info:
+                report += (
+                    f"\n\nRTT {info['rtt_us'] / 1000:.2f}ms "
+                    f"(편차 {info['rttvar_us'] / 1000:.2f}ms), "
+                    f"재전송 {info['total_retrans']}, cwnd {info['snd_cwnd']}, "
+                    f"미확인 {info['unacked']}"
+                )
+            return report
         info = get_netstat_info(port)
         # 현재 클라이언트의 local_port만 필터링
-        filtered_info = "\n".join(
+        return "\n".join(
             line
             for line in info.splitlines()
             if (f".{local_port}" in line and f".{port}" in line)  # 현재 클라이언트 연결
             or (f"*.{port}" in line and "LISTEN" in line)  # 서버 리스닝 상태만 표시
         )
 
-        self.netstat_text.config(state="normal")
-        self.netstat_text.delete("1.0", tk.END)
-        self.netstat_text.insert(tk.END, filtered_info)
-        self.netstat_text.config(state="disabled")
-
 
 if __name__ == "__main__":
 
     def on_closing():
         if client:
             client.disconnect()
+        gui.chat_log.close()
+        gui.debug_log.close()
+        gui.net.close()
         root.destroy()
 
+    import argparse
+
+    parser = argparse.ArgumentParser(description="채팅/그림판 클라이언트")
+    parser.add_argument(
+        "--debug", action="store_true", help="드로잉 디버그 줄을 캔버스 아래 창에 표시"
+    )
+    args = parser.parse_args()
+
     root = tk.Tk()
     client = ChatClient(host="127.0.0.1", port=9000)
-    gui = ClientGUI(root, client)
+    gui = ClientGUI(root, client, debug=args.debug)
     root.protocol("WM_DELETE_WINDOW", on_closing)
     root.mainloop()
@@ -0,0 +1,103 @@
+"""
+멀티 프로세스 서버 실행 (GUI 없음).
+
+워커 프로세스 N개가 SO_REUSEPORT로 같은 포트를 열고 커널이 새 연결을 워커들에
+나눠 준다. 부모 프로세스가 Unix 도메인 소켓으로 backplane 브로커를 열고, 워커들은
+이 브로커를 통해 방 이벤트를 같은 순서로 주고받으므로 서로 다른 워커에 접속한
+사용자도 같은 캔버스와 채팅을 공유한다.
+
+    python server.py --workers 4 --mode selector
+"""
+
+import multiprocessing
+import os
+import signal
+import shutil
+import tempfile
+import threading
+
+
+def worker_main(worker_id, workers, broker_path, server_kwargs):
+    from backplane import SocketBackplane
+    from instrument import PROFILE_OUTPUTS
+    from server import ChatServer, print_log
+
+    kwargs = dict(server_kwargs)
+    if kwargs.get("journal_dir"):
+        # 워커마다 전체 이벤트(다른 워커 것 포함)를 자신의 저널에 기록
+        kwargs["journal_dir"] = os.path.join(kwargs["journal_dir"], f"worker-{worker_id}")
+    if kwargs.get("metrics_port"):
+        kwargs["metrics_port"] += worker_id  # 워커마다 메트릭 포트를 하나씩 사용
+    if kwargs.get("profile"):
+        # 워커마다 따로 저장 (server.prof -> server.prof.1)
+        output = kwargs.get("profile_out") or PROFILE_OUTPUTS[kwargs["profile"]]
+        kwargs["profile_out"] = f"{output}.{worker_id}"
+    server = ChatServer(
+        reuse_port=True,
+        worker_id=worker_id,
+        workers=workers,
+        backplane=SocketBackplane(broker_path),
+        **kwargs,
+    )
+    server.add_observer(print_log)
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stopped.set())
+    signal.signal(signal.SIGUSR1, lambda signum, frame: server.dump_profile())
+    if not server.start_server():
+        os._exit(1)
+    while not stopped.wait(1):
+        pass
+    server.stop_server()
+
+
+def run_workers(workers, **server_kwargs):
+    """backplane 브로커와 워커 프로세스들을 시작하고 SIGINT/SIGTERM을 받을 때까지 대기"""
+    from backplane import BrokerServer
+
+    bus_dir = tempfile.mkdtemp(prefix="sns-bus-")
+    broker_path = os.path.join(bus_dir, "broker.sock")
+    broker = BrokerServer(
+        broker_path,
+        history_max_points=server_kwargs.get("history_max_points", 500000),
+    )
+    processes = [
+        multiprocessing.Process(
+            target=worker_main,
+            args=(worker_id, workers, broker_path, server_kwargs),
+            daemon=False,
+        )
+        for worker_id in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    broker.start()  # 워커를 fork한 뒤 시작 (워커는 브로커가 열릴 때까지 재시도)
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stopped.set())
+    # 부모가 받은 SIGUSR1은 워커들에게 전달 (각 워커가 프로파일 저장)
+    signal.signal(
+        signal.SIGUSR1,
+        lambda signum, frame: [
+            os.kill(process.pid, signal.SIGUSR1)
+            for process in processes
+            if process.is_alive()
+        ],
+    )
+    print(f"워커 {workers}개 시작 (pid: {', '.join(str(p.pid) for p in processes)})")
+    try:
+        while not stopped.is_set():
+            stopped.wait(1)
+            if not all(process.is_alive() for process in processes):
+                print("종료된 워커가 있어 전체를 중지합니다")
+                break
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.kill()
+        broker.close()
+        shutil.rmtree(bus_dir, ignore_errors=True)
@@ -0,0 +1,187 @@
+"""
+드로잉 히스토리 저장소.
+
+끝난 획은 점 목록(polyline) 하나로 압축해서 보관하고, 주기적으로 스냅샷
+(압축된 획 목록 + 시퀀스 번호)을 만들어 둔다. 새로 접속한 클라이언트에게는
+스냅샷과 그 이후의 짧은 tail을 한 덩어리로 보낸다.
+"""
+
+import protocol
+
+
+class DrawingHistory:
+    def __init__(self, max_points=500000, snapshot_every=500, max_stroke_points=2000):
+        self.max_points = max_points  # 저장할 전체 점 개수 상한 (넘으면 오래된 획부터 제거)
+        self.snapshot_every = snapshot_every  # tail이 이만큼 쌓이면 새 스냅샷
+        self.max_stroke_points = max_stroke_points  # 진행 중인 획이 이보다 길면 잘라서 압축
+        self.seq = 0  # 지금까지 추가된 이벤트 수 (clear 포함)
+        self.strokes = []  # 끝난 획들의 점 목록
+        self.active = {}  # 보낸 사람 -> (획을 시작한 tail 항목, 진행 중인 획의 점 목록)
+        self.tail = []  # 마지막 스냅샷 이후의 (seq, 이벤트, 보낸 사람)
+        self.snapshot_seq = 0
+        self.snapshot_strokes = ()
+        self.snapshot_cache = {}  # 형식 -> 인코딩된 스냅샷 bytes
+        self.points = 0
+        self.evicted_strokes = 0
+        self.evicted_points = 0
+
+    def __len__(self):
+        return len(self.snapshot_strokes) + len(self.tail)
+
+    def __iter__(self):
+        return iter(self.replay_events())
+
+    def append(self, event, sender=None):
+        """드로잉 이벤트 하나를 기록 (좌표를 먼저 읽어서 잘못된 이벤트는 seq를 올리기 전에 실패)"""
+        if event["type"] == "clear":
+            self.seq += 1
+            self.clear()
+            return
+        action = event.get("action")
+        if action == "segment":
+            new_points = [tuple(point) for point in event["points"]]
+        else:
+            new_points = [(event["x"], event["y"])]
+        self.seq += 1
+        if action == "start" or sender not in self.active:
+            if sender in self.active:
+                self._finish(sender)  # end 없이 새 획이 시작된 경우
+            entry = (self.seq, event, sender)
+            self.active[sender] = (entry, [])
+        else:
+            entry = (self.seq, event, sender)
+        self.tail.append(entry)
+        stroke = self.active[sender][1]
+        for point in new_points:
+            if not stroke or stroke[-1] != point:
+                stroke.append(point)
+                self.points += 1
+        if action == "end":
+            self._finish(sender)
+        elif len(stroke) >= self.max_stroke_points:
+            # 너무 긴 획은 지금까지를 압축하고 마지막 점에서 새 획으로 이어서 기록
+            self._finish(sender)
+            x, y = stroke[-1]
+            start = (self.seq, {"type": "draw", "action": "start", "x": x, "y": y}, sender)
+            self.active[sender] = (start, [(x, y)])
+            self.points += 1
+            self.tail.append(start)
+        self._evict()
+        if len(self.tail) >= self.snapshot_every:
+            self.take_snapshot()
+
+    def finish_sender(self, sender):
+        """보낸 사람이 end 없이 나간 경우 진행 중인 획을 끝난 것으로 처리"""
+        if sender in self.active:
+            self._finish(sender)
+
+    def _finish(self, sender):
+        _, stroke = self.active.pop(sender)
+        if stroke:
+            self.strokes.append(stroke)
+
+    def _evict(self):
+        # 상한을 넘으면 가장 오래된 끝난 획부터 제거
+        removed = 0
+        while self.points > self.max_points and removed < len(self.strokes):
+            self.points -= len(self.strokes[removed])
+            self.evicted_points += len(self.strokes[removed])
+            removed += 1
+        if removed:
+            del self.strokes[:removed]
+            self.evicted_strokes += removed
+            self.take_snapshot()
+
+    def clear(self):
+        self.strokes = []
+        self.active = {}
+        self.tail = []
+        self.points = 0
+        self.take_snapshot()
+
+    def take_snapshot(self):
+        """
+        현재의 끝난 획들로 스냅샷을 만들고 tail을 비움.
+        아직 진행 중인 획의 이벤트는 다음 tail로 넘긴다.
+        """
+        starts = {id(entry) for entry, _ in self.active.values()}
+        started = set()
+        carried = []
+        for entry in self.tail:
+            if id(entry) in starts:
+                started.add(entry[2])
+            if entry[2] in started:
+                carried.append(entry)
+        self.tail = carried
+        self.snapshot_strokes = tuple(self.strokes)
+        self.snapshot_seq = self.seq
+        self.snapshot_cache = {}
+
+    def export(self, sender_name=str):
+        """
+        체크포인트용 상태. 스냅샷을 새로 만든 뒤
+        (끝난 획 목록, [(보낸 사람 이름, 이벤트), ...] 형태의 tail)을 반환
+        """
+        self.take_snapshot()
+        tail = [(sender_name(sender), event) for _, event, sender in self.tail]
+        return self.snapshot_strokes, tail
+
+    def restore(self, seq, strokes, tail):
+        """체크포인트(export 결과와 seq)로 히스토리를 다시 만듦"""
+        self.clear()
+        self.strokes = list(strokes)
+        self.points = sum(len(stroke) for stroke in self.strokes)
+        for sender, event in tail:
+            self.append(event, sender)
+        self.seq = seq
+        self.take_snapshot()
+
+    @staticmethod
+    def stroke_events(stroke):
+        """압축된 획을 start + segment + end 이벤트로 복원"""
+        x, y = stroke[0]
+        events = [{"type": "draw", "action": "start", "x": x, "y": y}]
+        if len(stroke) > 1:
+            events.append(
+                {
+                    "type": "draw",
+                    "action": "segment",
+                    "points": [list(point) for point in stroke[1:]],
+                }
+            )
+        x, y = stroke[-1]
+        events.append({"type": "draw", "action": "end", "x": x, "y": y})
+        return events
+
+    def replay_events(self):
+        events = []
+        for stroke in self.snapshot_strokes:
+            events.extend(self.stroke_events(stroke))
+        events.extend(event for _, event, _ in self.tail)
+        return events
+
+    def replay_frames(self, fmt):
+        """스냅샷 + tail을 fmt 형식으로 인코딩한 bytes 하나 (스냅샷 부분은 캐시)"""
+        snapshot = self.snapshot_cache.get(fmt)
+        if snapshot is None:
+            snapshot = b"".join(
+                protocol.encode_for(fmt, event)
+                for stroke in self.snapshot_strokes
+                for event in self.stroke_events(stroke)
+            )
+            self.snapshot_cache[fmt] = snapshot
+        tail = b"".join(protocol.encode_for(fmt, event) for _, event, _ in self.tail)
+        return snapshot + tail
+
+    def stats(self):
+        return {
+            "seq": self.seq,
+            "snapshot_seq": self.snapshot_seq,
+            "strokes": len(self.strokes),
+            "active_strokes": len(self.active),
+            "tail_events": len(self.tail),
+            "points": self.points,
+            "max_points": self.max_points,
+            "evicted_strokes": self.evicted_strokes,
+            "evicted_points": self.evicted_points,
+        }
@@ -0,0 +1,252 @@
+"""
+메시지 처리 경로 계측과 프로파일러.
+
+- Instrumentation: 단계별 처리 시간 히스토그램, 이벤트 종류별 개수, 일부 프레임의
+  단계별 시각 기록(샘플링 추적). ChatServer(instrument=True)일 때만 만들어지며,
+  꺼져 있으면 처리 경로에서는 None 검사만 한다.
+    parse      프레임 디코딩 (json.loads / 바이너리 레코드)
+    route      프레임 하나를 받은 뒤 모든 큐에 넣을 때까지 (process_frame 전체)
+    history    방 히스토리(와 저널)에 기록
+    broadcast  방 멤버의 송신 큐에 넣기 (형식별 인코딩 포함)
+    send       send/sendmsg 한 번 (클라이언트별)
+- Profiler: 서버 스레드를 cProfile로 실행하거나("cprofile"), 일정 간격으로 모든 스레드의
+  스택을 모아서("sample") 결과를 파일로 저장. SIGUSR1 또는 서버 중지 시 저장
+"""
+
+import collections
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+
+STAGES = ("parse", "route", "history", "broadcast", "send")
+# 프로파일러 종류 -> 기본 저장 파일 (cprofile: pstats 형식, sample: 접힌 스택)
+PROFILE_OUTPUTS = {"cprofile": "server.prof", "sample": "server.folded"}
+BUCKETS = 32  # 히스토그램 구간 수. i번째 구간은 [2^(i-1), 2^i) 마이크로초 (0번은 1µs 미만)
+
+
+class Histogram:
+    """마이크로초 단위 log2 구간 히스토그램"""
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        us = seconds * 1e6
+        self.buckets[min(BUCKETS - 1, int(us).bit_length())] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """q 분위수가 들어 있는 구간의 상한(초)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return (1 << i) / 1e6
+        return self.max
+
+    def stats(self):
+        return {
+            "count": self.count,
+            "mean_us": round(self.total / self.count * 1e6, 3) if self.count else None,
+            "p50_us": round(self.quantile(0.5) * 1e6, 3) if self.count else None,
+            "p99_us": round(self.quantile(0.99) * 1e6, 3) if self.count else None,
+            "max_us": round(self.max * 1e6, 3),
+            # 구간별 개수 (i번째 구간의 상한은 2^i 마이크로초)
+            "buckets": list(self.buckets),
+            "sum_seconds": self.total,
+        }
+
+
+class Instrumentation:
+    def __init__(self, trace_every=1000, trace_size=200):
+        self.lock = threading.Lock()
+        self.histograms = {stage: Histogram() for stage in STAGES}
+        self.events = collections.Counter()  # 이벤트 종류 -> 개수
+        self.trace_every = trace_every  # 이 개수의 프레임마다 하나씩 추적 (0이면 안 함)
+        self.traces = collections.deque(maxlen=trace_size)
+        self.frames = 0
+        self.local = threading.local()  # 스레드별 현재 추적 중인 프레임
+        self.started = time.time()
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            self.histograms[stage].add(seconds)
+
+    def count(self, kind):
+        with self.lock:
+            self.events[kind] += 1
+
+    # ---- 샘플링 추적 ----
+
+    def begin_trace(self):
+        """프레임 처리를 시작할 때 호출. 이번 프레임을 추적하면 기록용 dict를 반환"""
+        with self.lock:
+            self.frames += 1
+            sampled = self.trace_every and self.frames % self.trace_every == 0
+        trace = None
+        if sampled:
+            trace = {"frame": self.frames, "start_ns": time.monotonic_ns(), "marks": []}
+        self.local.trace = trace
+        return trace
+
+    def mark(self, name, **fields):
+        """추적 중인 프레임이면 현재 시각(시작 기준 ns)과 함께 단계 이름을 기록"""
+        trace = getattr(self.local, "trace", None)
+        if trace is not None:
+            mark = {"stage": name, "at_ns": time.monotonic_ns() - trace["start_ns"]}
+            mark.update(fields)
+            trace["marks"].append(mark)
+
+    def end_trace(self, trace):
+        self.local.trace = None
+        if trace is not None:
+            trace["total_ns"] = time.monotonic_ns() - trace["start_ns"]
+            with self.lock:
+                self.traces.append(trace)
+
+    def stats(self, traces=True):
+        with self.lock:
+            item = {
+                "since": self.started,
+                "frames": self.frames,
+                "stages": {stage: h.stats() for stage, h in self.histograms.items()},
+                "events": dict(self.events),
+            }
+            if traces:
+                item["traces"] = list(self.traces)
+        return item
+
+
+class Profiler:
+    """
+    kind="cprofile": wrap()으로 감싼 스레드마다 cProfile을 켜고, dump 때 합쳐서 저장
+    kind="sample": interval초마다 모든 스레드의 스택을 모아 접힌 스택(flamegraph) 형식으로 저장
+    """
+
+    KINDS = tuple(PROFILE_OUTPUTS)
+
+    def __init__(self, kind, output=None, interval=0.005):
+        if kind not in self.KINDS:
+            raise ValueError(f"지원하지 않는 프로파일러: {kind}")
+        self.kind = kind
+        self.output = output or PROFILE_OUTPUTS[kind]
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.profiles = set()  # cprofile: 실행 중인 스레드별 cProfile.Profile
+        self.finished = None  # cprofile: 끝난 스레드들의 결과를 합친 pstats.Stats
+        self.stacks = collections.Counter()  # sample: 접힌 스택 -> 샘플 수
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.kind == "sample":
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self.run_sampler, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def wrap(self, target):
+        """cprofile 모드면 target을 프로파일링하면서 실행하는 함수를 반환"""
+        if self.kind != "cprofile":
+            return target
+
+        def run(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+는 프로파일러를 동시에 하나만 켤 수 있음 (처음 켠 스레드만 기록)
+                return target(*args, **kwargs)
+            with self.lock:
+                self.profiles.add(profile)
+            try:
+                return target(*args, **kwargs)
+            finally:
+                profile.disable()
+                self.merge(profile)
+
+        return run
+
+    def merge(self, profile):
+        """끝난 스레드의 결과를 finished에 합치고 Profile 객체는 버림 (접속마다 쌓이지 않게)"""
+        stats = pstats.Stats(_ProfileSnapshot(profile))
+        with self.lock:
+            self.profiles.discard(profile)
+            if self.finished is None:
+                self.finished = stats
+            else:
+                self.finished.add(stats)
+
+    def run_sampler(self):
+        me = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{os.path.basename(code.co_filename)}:{code.co_name}"
+                    )
+                    frame = frame.f_back
+                with self.lock:
+                    self.stacks[";".join(reversed(stack))] += 1
+                    self.samples += 1
+
+    def dump(self):
+        """결과를 output 파일에 저장하고 저장한 경로를 반환"""
+        if self.kind == "cprofile":
+            with self.lock:
+                profiles = list(self.profiles)
+                if self.finished is None and not profiles:
+                    return None
+                # finished는 계속 합쳐 나가야 하므로 복사본에 실행 중인 스레드를 더함
+                stats = pstats.Stats()
+                if self.finished is not None:
+                    stats.add(self.finished)
+            for profile in profiles:
+                stats.add(_ProfileSnapshot(profile))
+            stats.dump_stats(self.output)
+            text = io.StringIO()
+            stats.stream = text
+            stats.sort_stats("cumulative").print_stats(40)
+            with open(self.output + ".txt", "w") as f:
+                f.write(text.getvalue())
+            return self.output
+        with self.lock:
+            stacks = self.stacks.most_common()
+        with open(self.output, "w") as f:
+            for stack, count in stacks:
+                f.write(f"{stack} {count}\n")
+        return self.output
+
+
+class _ProfileSnapshot:
+    """실행 중인 cProfile.Profile을 끄지 않고 pstats.Stats에 넘기기 위한 래퍼"""
+
+    def __init__(self, profile):
+        profile.snapshot_stats()
+        self.stats = profile.stats
+
+    def create_stats(self):
+        pass
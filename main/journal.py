@@ -0,0 +1,326 @@
+"""
+드로잉/채팅 기록을 디스크에 남기는 append-only 저널.
+
+- 세그먼트 파일: segment-<첫 레코드 번호>.log
+  레코드 = 헤더(길이 uint32, crc32 uint32, 레코드 번호 uint64, 종류 uint8) + 본문(JSON)
+- 체크포인트 파일: checkpoint-<마지막 레코드 번호>.ckpt
+  압축된 획 목록(int16 좌표 배열), 진행 중인 획의 이벤트, 최근 채팅을 담는다.
+
+기록은 호출한 스레드에서 메모리 목록에 넣기만 하고, 실제 파일 쓰기와 fsync는
+백그라운드 스레드가 모아서(group commit) 처리하므로 브로드캐스트 경로를 막지 않는다.
+재시작할 때는 가장 최근 체크포인트를 mmap으로 읽고 그 이후의 레코드만 다시 적용한다.
+"""
+
+import array
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+
+from protocol import clamp16
+
+KIND_DRAW = 1  # {"u": 보낸 사람, "e": 드로잉 이벤트}
+KIND_CHAT = 2  # 채팅 줄 (UTF-8)
+KIND_FINISH = 3  # 보낸 사람이 end 없이 나감 (UTF-8 이름)
+
+RECORD_HEADER = struct.Struct("<IIQB")
+CHECKPOINT_MAGIC = b"SNSCKPT1"
+CHECKPOINT_HEADER = struct.Struct("<QQII")  # 레코드 번호, 히스토리 seq, 획 개수, 부가 JSON 길이
+
+# fsync 정책
+# - "always": 모아서 쓸 때마다 fsync
+# - "interval": fsync_interval초에 한 번 fsync (기본값)
+# - "never": fsync 하지 않음 (OS에 맡김)
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+def _to_little(values):
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class Journal:
+    def __init__(
+        self,
+        directory,
+        segment_bytes=16 << 20,
+        fsync_policy="interval",
+        fsync_interval=1.0,
+        commit_interval=0.005,
+    ):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"지원하지 않는 fsync 정책: {fsync_policy}")
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.commit_interval = commit_interval
+        self.cond = threading.Condition()
+        self.pending = []  # (레코드 번호, 종류, 본문 bytes 또는 JSON으로 쓸 값)
+        self.pending_checkpoint = None
+        self.next_record = 1
+        self.closed = False
+        self.thread = None
+        self.segment = None
+        self.segment_size = 0
+        self.last_fsync = 0
+        self.unsynced = False  # 마지막 fsync 이후 쓴 데이터가 있는지
+        # 통계
+        self.records_written = 0
+        self.bytes_written = 0
+        self.commits = 0
+        self.fsyncs = 0
+        self.checkpoints = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # ---- 기록 (브로드캐스트 경로에서 호출) ----
+
+    def append(self, kind, payload):
+        """레코드를 쓰기 대기 목록에 추가하고 레코드 번호를 반환 (디스크 I/O 없음)"""
+        with self.cond:
+            number = self.next_record
+            self.next_record += 1
+            self.pending.append((number, kind, payload))
+            if len(self.pending) == 1:
+                self.cond.notify()  # 쓰기 스레드는 첫 레코드에서만 깨움
+            return number
+
+    def append_json(self, kind, value):
+        """JSON 직렬화는 쓰기 스레드에서 하므로 value는 이후에 변경하지 않아야 함"""
+        return self.append(kind, value)
+
+    def checkpoint(self, strokes, history_seq, extra):
+        """
+        현재까지의 레코드를 대신하는 체크포인트 저장을 요청.
+        strokes는 끝난 획의 점 목록들, extra는 JSON으로 저장할 부가 상태
+        """
+        with self.cond:
+            self.pending_checkpoint = (
+                self.next_record - 1,
+                history_seq,
+                list(strokes),
+                extra,
+            )
+            self.cond.notify()
+
+    # ---- 백그라운드 쓰기 ----
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            with self.cond:
+                if not self.pending and self.pending_checkpoint is None:
+                    if self.closed:
+                        break
+                    self.cond.wait(self.fsync_interval)
+                    # 첫 레코드가 들어온 뒤 잠깐 더 모아서 한 번에 씀
+                    if self.pending and not self.closed:
+                        self.cond.wait(self.commit_interval)
+                batch, self.pending = self.pending, []
+                checkpoint, self.pending_checkpoint = self.pending_checkpoint, None
+            if checkpoint:
+                # 체크포인트에 포함된 레코드까지만 쓰고 세그먼트를 나눈 뒤 나머지를 씀
+                covered = [record for record in batch if record[0] <= checkpoint[0]]
+                batch = batch[len(covered):]
+                if covered:
+                    self.write_records(covered)
+                self.write_checkpoint(*checkpoint)
+            if batch:
+                self.write_records(batch)
+            self.maybe_fsync(force=self.fsync_policy == "always" and bool(batch))
+        self.maybe_fsync(force=self.fsync_policy != "never")
+        if self.segment:
+            self.segment.close()
+            self.segment = None
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def write_records(self, batch):
+        chunks = []
+        for number, kind, payload in batch:
+            if not isinstance(payload, bytes):
+                payload = json.dumps(payload).encode("utf-8")
+            crc = zlib.crc32(payload, zlib.crc32(bytes([kind])))
+            chunks.append(RECORD_HEADER.pack(len(payload), crc, number, kind))
+            chunks.append(payload)
+        data = b"".join(chunks)
+        if self.segment is None or self.segment_size >= self.segment_bytes:
+            self.open_segment(batch[0][0])
+        self.segment.write(data)
+        self.segment.flush()
+        self.unsynced = True
+        self.segment_size += len(data)
+        self.records_written += len(batch)
+        self.bytes_written += len(data)
+        self.commits += 1
+
+    def maybe_fsync(self, force=False):
+        if self.segment is None or self.fsync_policy == "never" or not self.unsynced:
+            return
+        now = time.monotonic()
+        if force or now - self.last_fsync >= self.fsync_interval:
+            os.fsync(self.segment.fileno())
+            self.unsynced = False
+            self.last_fsync = now
+            self.fsyncs += 1
+
+    def open_segment(self, first_record):
+        if self.segment:
+            self.maybe_fsync(force=self.fsync_policy != "never")
+            self.segment.close()
+        path = os.path.join(self.directory, f"segment-{first_record:016d}.log")
+        self.segment = open(path, "ab")
+        self.segment_size = self.segment.tell()
+
+    def write_checkpoint(self, last_record, history_seq, strokes, extra):
+        counts = _to_little(array.array("I", (len(stroke) for stroke in strokes)))
+        points = _to_little(
+            array.array(
+                "h",
+                (clamp16(c) for stroke in strokes for point in stroke for c in point),
+            )
+        )
+        extra_bytes = json.dumps(extra).encode("utf-8")
+        path = os.path.join(self.directory, f"checkpoint-{last_record:016d}.ckpt")
+        with open(path + ".tmp", "wb") as f:
+            f.write(CHECKPOINT_MAGIC)
+            f.write(
+                CHECKPOINT_HEADER.pack(
+                    last_record, history_seq, len(strokes), len(extra_bytes)
+                )
+            )
+            f.write(counts.tobytes())
+            f.write(points.tobytes())
+            f.write(extra_bytes)
+            f.flush()
+            if self.fsync_policy != "never":
+                os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        self.checkpoints += 1
+        # 체크포인트 이후 레코드는 새 세그먼트에 쓰고, 필요 없어진 파일은 삭제
+        if self.segment:
+            self.maybe_fsync(force=self.fsync_policy != "never")
+            self.segment.close()
+            self.segment = None
+        for name in os.listdir(self.directory):
+            number = self._file_number(name)
+            if number is None:
+                continue
+            if name.startswith("checkpoint-") and number < last_record:
+                os.remove(os.path.join(self.directory, name))
+            elif name.startswith("segment-") and number <= last_record:
+                os.remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _file_number(name):
+        stem, _, ext = name.partition(".")
+        if ext not in ("log", "ckpt"):
+            return None
+        try:
+            return int(stem.rsplit("-", 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+    # ---- 복구 (start_server에서 호출) ----
+
+    def recover(self):
+        """
+        (체크포인트, 레코드 목록)을 반환. 체크포인트는 없으면 None이며
+        (히스토리 seq, 획 목록, 부가 상태) 형태, 레코드는 (종류, 본문 bytes) 목록.
+        """
+        checkpoint = None
+        last_record = 0
+        names = sorted(os.listdir(self.directory))
+        checkpoints = [n for n in names if n.startswith("checkpoint-") and n.endswith(".ckpt")]
+        for name in reversed(checkpoints):
+            try:
+                last_record, checkpoint = self.read_checkpoint(
+                    os.path.join(self.directory, name)
+                )
+                break
+            except (ValueError, struct.error, OSError):
+                continue  # 손상된 체크포인트는 건너뛰고 이전 것을 사용
+        records = []
+        for name in names:
+            if name.startswith("segment-") and name.endswith(".log"):
+                records.extend(
+                    self.read_segment(os.path.join(self.directory, name), last_record)
+                )
+        records.sort(key=lambda record: record[0])
+        if records:
+            last_record = max(last_record, records[-1][0])
+        self.next_record = last_record + 1
+        return checkpoint, [(kind, payload) for _, kind, payload in records]
+
+    @staticmethod
+    def read_checkpoint(path):
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[: len(CHECKPOINT_MAGIC)] != CHECKPOINT_MAGIC:
+                raise ValueError("체크포인트 형식 오류")
+            pos = len(CHECKPOINT_MAGIC)
+            last_record, history_seq, stroke_count, extra_size = (
+                CHECKPOINT_HEADER.unpack_from(mm, pos)
+            )
+            pos += CHECKPOINT_HEADER.size
+            counts = array.array("I")
+            counts.frombytes(mm[pos : pos + 4 * stroke_count])
+            _to_little(counts)
+            pos += 4 * stroke_count
+            total = sum(counts)
+            coords = array.array("h")
+            coords.frombytes(mm[pos : pos + 4 * total])
+            _to_little(coords)
+            pos += 4 * total
+            extra = json.loads(mm[pos : pos + extra_size].decode("utf-8"))
+        strokes = []
+        index = 0
+        for count in counts:
+            flat = coords[index : index + 2 * count]
+            strokes.append(list(zip(flat[0::2], flat[1::2])))
+            index += 2 * count
+        return last_record, (history_seq, strokes, extra)
+
+    @staticmethod
+    def read_segment(path, after_record):
+        """세그먼트에서 after_record 이후의 정상 레코드를 읽음 (잘린 마지막 레코드는 무시)"""
+        records = []
+        with open(path, "rb") as f:
+            data = f.read()
+        pos = 0
+        while pos + RECORD_HEADER.size <= len(data):
+            size, crc, number, kind = RECORD_HEADER.unpack_from(data, pos)
+            start = pos + RECORD_HEADER.size
+            payload = data[start : start + size]
+            if len(payload) < size or zlib.crc32(payload, zlib.crc32(bytes([kind]))) != crc:
+                break
+            if number > after_record:
+                records.append((number, kind, payload))
+            pos = start + size
+        return records
+
+    def stats(self):
+        with self.cond:
+            pending = len(self.pending)
+        return {
+            "pending": pending,
+            "records_written": self.records_written,
+            "bytes_written": self.bytes_written,
+            "commits": self.commits,
+            "fsyncs": self.fsyncs,
+            "checkpoints": self.checkpoints,
+            "fsync_policy": self.fsync_policy,
+        }
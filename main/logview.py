@@ -0,0 +1,190 @@
+"""
+채팅/로그 Text 위젯용 출력 창.
+
+위젯에 줄을 계속 추가하면 몇 시간 뒤에는 위젯 메모리와 insert 비용이 커진다.
+
+- LogView: 최근 capacity줄만 링 버퍼(deque)와 위젯에 유지. 줄은 모아 두었다가
+  flush_ms마다 insert 한 번으로 추가하고, level보다 낮은 줄(디버그 등)은 바로 버림
+- LogStore: 지나간 줄을 임시 파일에 보관. 위젯을 맨 위까지 스크롤하면 page_size줄씩
+  파일에서 읽어 위에 붙이고, 다시 맨 아래로 내려오면 capacity줄로 줄임
+Tk 위젯을 다루므로 GUI 스레드에서만 호출
+"""
+
+import tempfile
+from array import array
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+
+
+class LogStore:
+    """줄 단위로 추가하고 번호로 읽는 디스크 저장소 (닫으면 파일도 삭제)"""
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile("w+b")
+        self.offsets = array("Q", [0])  # i번째 줄의 시작 위치 (마지막은 파일 끝)
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def extend(self, lines):
+        data = "".join(line + "\n" for line in lines).encode("utf-8")
+        self.file.seek(0, 2)
+        self.file.write(data)
+        end = self.offsets[-1]
+        for line in lines:
+            end += len(line.encode("utf-8")) + 1
+            self.offsets.append(end)
+        self.dirty = True
+
+    def read(self, start, count):
+        """start번째 줄부터 count줄"""
+        end = min(len(self), start + count)
+        if start >= end:
+            return []
+        if self.dirty:
+            self.file.flush()
+            self.dirty = False
+        self.file.seek(self.offsets[start])
+        data = self.file.read(self.offsets[end] - self.offsets[start])
+        return data.decode("utf-8").split("\n")[:-1]
+
+    def close(self):
+        self.file.close()
+
+
+class LogView:
+    def __init__(
+        self,
+        widget,
+        capacity=1000,
+        level=INFO,
+        page_size=200,
+        flush_ms=50,
+        scrollback=True,
+        scrollbar=None,
+    ):
+        self.widget = widget
+        self.capacity = capacity  # 위젯에 유지할 줄 수
+        self.level = level  # 이보다 낮은 수준의 줄은 버림
+        self.page_size = page_size  # 위로 스크롤할 때 한 번에 불러올 줄 수
+        self.flush_ms = flush_ms
+        self.recent = deque(maxlen=capacity)  # 위젯 아래쪽에 보이는 최근 줄
+        self.pending = []  # 아직 위젯에 넣지 않은 줄
+        self.flush_job = None
+        self.store = LogStore() if scrollback else None
+        self.first = 0  # 위젯 첫 줄의 저장소 번호
+        self.lines = 0  # 위젯에 있는 줄 수
+        self.total = 0  # 지금까지 추가된 줄 수
+        # 스크롤 위치를 보고 맨 위에 닿으면 이전 줄을 불러옴
+        self.scrollbar = scrollbar or getattr(widget, "vbar", None)
+        if self.store is not None:
+            widget.configure(yscrollcommand=self.on_scroll)
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def write(self, line, level=INFO):
+        if level < self.level:
+            return
+        self.pending.append(line)
+        self.schedule()
+
+    def extend(self, lines, level=INFO):
+        if level < self.level or not lines:
+            return
+        self.pending.extend(lines)
+        self.schedule()
+
+    def schedule(self):
+        if self.flush_job is None:
+            self.flush_job = self.widget.after(self.flush_ms, self.flush)
+
+    def flush(self):
+        """모아 둔 줄을 insert 한 번으로 추가하고, 맨 아래를 보고 있으면 capacity줄로 줄임"""
+        if self.flush_job is not None:
+            self.widget.after_cancel(self.flush_job)
+            self.flush_job = None
+        if not self.pending:
+            return
+        lines, self.pending = self.pending, []
+        if self.store is not None:
+            self.store.extend(lines)
+        self.recent.extend(lines)
+        self.total += len(lines)
+        # 위로 스크롤해서 이전 줄을 보고 있으면 줄이지 않음 (맨 아래로 오면 trim)
+        following = self.widget.yview()[1] >= 0.999
+        if following and len(lines) > self.capacity:
+            # 한 번에 capacity보다 많이 들어오면 마지막 capacity줄만 넣음
+            lines = lines[-self.capacity :]
+        state = self.widget.cget("state")
+        self.widget.configure(state="normal")
+        self.widget.insert("end", "\n".join(lines) + "\n")
+        self.lines += len(lines)
+        if following:
+            excess = self.lines - self.capacity
+            if excess > 0:
+                self.widget.delete("1.0", f"{excess + 1}.0")
+                self.lines -= excess
+            self.first = self.total - self.lines
+            self.widget.see("end")
+        self.widget.configure(state=state)
+
+    def on_scroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if float(first) <= 0.0 and self.first > 0 and float(last) < 1.0:
+            self.widget.after_idle(self.load_older)
+        elif float(last) >= 0.999 and self.lines > self.capacity and not self.pending:
+            self.widget.after_idle(self.trim)
+
+    def load_older(self):
+        """저장소에서 이전 page_size줄을 읽어 위젯 맨 위에 붙임"""
+        if self.first <= 0 or self.store is None:
+            return
+        start = max(0, self.first - self.page_size)
+        lines = self.store.read(start, self.first - start)
+        if not lines:
+            return
+        state = self.widget.cget("state")
+        self.widget.configure(state="normal")
+        self.widget.insert("1.0", "\n".join(lines) + "\n")
+        self.widget.configure(state=state)
+        self.first = start
+        self.lines += len(lines)
+        # 보고 있던 줄이 그대로 맨 위에 오도록
+        self.widget.yview(f"{len(lines) + 1}.0")
+
+    def trim(self):
+        """맨 아래로 돌아오면 위에 불러온 줄을 지우고 capacity줄로 줄임"""
+        excess = self.lines - self.capacity
+        if excess <= 0:
+            return
+        state = self.widget.cget("state")
+        self.widget.configure(state="normal")
+        self.widget.delete("1.0", f"{excess + 1}.0")
+        self.widget.configure(state=state)
+        self.lines -= excess
+        self.first += excess
+        self.widget.see("end")
+
+    def clear(self):
+        self.pending = []
+        self.recent.clear()
+        state = self.widget.cget("state")
+        self.widget.configure(state="normal")
+        self.widget.delete("1.0", "end")
+        self.widget.configure(state=state)
+        self.lines = 0
+        self.first = self.total
+
+    def close(self):
+        if self.flush_job is not None:
+            self.widget.after_cancel(self.flush_job)
+            self.flush_job = None
+        if self.store is not None:
+            self.store.close()
+            self.store = None
@@ -0,0 +1,201 @@
+"""
+연결별 송수신 통계와 Prometheus 형식 메트릭.
+
+- ConnectionStats: 클라이언트 소켓 하나의 수신 바이트/프레임 수, 마지막 수신 시각과
+  주기적으로 조회한 커널 소켓 상태(TCP_INFO, 소켓 버퍼, 커널 큐)
+- MetricsServer: ChatServer.connection_stats()/room_stats()/pipeline_stats()를 로컬 HTTP 포트로 제공
+    GET /metrics  Prometheus 텍스트 형식
+    GET /stats    JSON
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from network_utils import socket_buffers, tcp_info
+
+
+class ConnectionStats:
+    __slots__ = ("connected_at", "last_seen", "bytes_in", "frames_in", "sample")
+
+    def __init__(self):
+        self.connected_at = time.time()
+        self.last_seen = self.connected_at
+        self.bytes_in = 0
+        self.frames_in = 0
+        self.sample = None  # 마지막으로 조회한 커널 소켓 상태 (sample_socket)
+
+    def received(self, size, frames):
+        """수신 스레드/이벤트 루프에서 호출 (한 연결은 한 스레드만 갱신)"""
+        self.bytes_in += size
+        self.frames_in += frames
+        self.last_seen = time.time()
+
+
+def sample_socket(sock):
+    """소켓 하나의 커널 상태. 닫힌 소켓이면 None"""
+    sample = socket_buffers(sock)
+    if sample is None:
+        return None
+    info = tcp_info(sock)
+    if info:
+        sample.update(
+            state=info["state"],
+            rtt_us=info["rtt_us"],
+            rttvar_us=info["rttvar_us"],
+            total_retrans=info["total_retrans"],
+            snd_cwnd=info["snd_cwnd"],
+            unacked=info["unacked"],
+            lost=info["lost"],
+        )
+    sample["sampled_at"] = time.time()
+    return sample
+
+
+# (이름, 종류, 설명, connection_stats 항목 키, 배율)
+CLIENT_METRICS = (
+    ("sns_client_bytes_received_total", "counter", "클라이언트에게서 받은 바이트", "bytes_in", 1),
+    ("sns_client_frames_received_total", "counter", "클라이언트에게서 받은 프레임", "frames_in", 1),
+    ("sns_client_bytes_sent_total", "counter", "클라이언트에게 보낸 바이트", "sent_bytes", 1),
+    ("sns_client_frames_sent_total", "counter", "클라이언트에게 보낸 메시지", "sent_messages", 1),
+    ("sns_client_send_calls_total", "counter", "send/sendmsg 시스템 콜 수", "send_calls", 1),
+    ("sns_client_queue_bytes", "gauge", "송신 큐에 쌓인 바이트", "bytes", 1),
+    ("sns_client_queue_messages", "gauge", "송신 큐에 쌓인 메시지", "messages", 1),
+    ("sns_client_dropped_total", "counter", "느린 클라이언트 정책으로 버린 메시지", "dropped", 1),
+    ("sns_client_coalesced_total", "counter", "느린 클라이언트 정책으로 합친 메시지", "coalesced", 1),
+    ("sns_client_compressed_in_bytes_total", "counter", "압축한 메시지 바이트", "compressed_in", 1),
+    ("sns_client_compressed_out_bytes_total", "counter", "압축 결과 바이트", "compressed_out", 1),
+    ("sns_client_compress_seconds_total", "counter", "압축에 쓴 시간", "compress_ms", 1e-3),
+    ("sns_client_last_seen_timestamp_seconds", "gauge", "마지막으로 데이터를 받은 시각", "last_seen", 1),
+    ("sns_client_last_sent_timestamp_seconds", "gauge", "마지막으로 전송을 마친 시각", "last_sent", 1),
+    ("sns_client_rtt_seconds", "gauge", "TCP_INFO 평활 RTT", "rtt_us", 1e-6),
+    ("sns_client_rttvar_seconds", "gauge", "TCP_INFO RTT 편차", "rttvar_us", 1e-6),
+    ("sns_client_retransmits_total", "counter", "TCP_INFO 누적 재전송 세그먼트", "total_retrans", 1),
+    ("sns_client_snd_cwnd_segments", "gauge", "TCP_INFO 혼잡 윈도", "snd_cwnd", 1),
+    ("sns_client_unacked_segments", "gauge", "TCP_INFO 확인되지 않은 세그먼트", "unacked", 1),
+    ("sns_client_sndbuf_bytes", "gauge", "SO_SNDBUF", "sndbuf", 1),
+    ("sns_client_rcvbuf_bytes", "gauge", "SO_RCVBUF", "rcvbuf", 1),
+    ("sns_client_kernel_outq_bytes", "gauge", "커널 송신 큐(SIOCOUTQ)", "outq", 1),
+    ("sns_client_kernel_inq_bytes", "gauge", "커널 수신 큐(SIOCINQ)", "inq", 1),
+)
+
+
+def _number(value):
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(server):
+    """ChatServer 상태를 Prometheus 텍스트 형식으로 변환"""
+    connections = server.connection_stats()
+    rooms = server.room_stats()
+    lines = [
+        "# HELP sns_clients 접속한 클라이언트 수",
+        "# TYPE sns_clients gauge",
+        f"sns_clients {len(connections)}",
+    ]
+    for name, kind, help_text, key, scale in CLIENT_METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for item in connections:
+            value = item.get(key)
+            if value is None:
+                continue
+            lines.append(
+                f'{name}{{client="{_label(item["name"])}",room="{_label(item["room"])}"}} '
+                f"{_number(value * scale)}"
+            )
+    lines.append("# HELP sns_room_members 방에 있는 클라이언트 수")
+    lines.append("# TYPE sns_room_members gauge")
+    for item in rooms:
+        lines.append(f'sns_room_members{{room="{_label(item["name"])}"}} {item["members"]}')
+    for name, key, help_text in (
+        ("sns_room_draw_shed_total", "shed", "드로잉 제한을 넘어 버린 이벤트"),
+        ("sns_room_draw_merged_total", "merged", "segment로 합친 move 이벤트"),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for item in rooms:
+            lines.append(f'{name}{{room="{_label(item["name"])}"}} {item["throttle"][key]}')
+    pipeline = server.pipeline_stats(traces=False)
+    if pipeline:
+        lines.extend(_pipeline_lines(pipeline))
+    return "\n".join(lines) + "\n"
+
+
+def _pipeline_lines(pipeline):
+    """instrument.Instrumentation.stats()를 Prometheus 히스토그램/카운터로 변환"""
+    lines = [
+        "# HELP sns_stage_seconds 처리 단계별 소요 시간",
+        "# TYPE sns_stage_seconds histogram",
+    ]
+    for stage, item in pipeline["stages"].items():
+        total = 0
+        # 마지막 구간은 그보다 긴 시간도 모두 포함하므로 +Inf로만 표시
+        for i, count in enumerate(item["buckets"][:-1]):
+            total += count
+            le = _number((1 << i) / 1e6)
+            lines.append(f'sns_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {total}')
+        lines.append(f'sns_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {item["count"]}')
+        lines.append(f'sns_stage_seconds_sum{{stage="{stage}"}} {_number(item["sum_seconds"])}')
+        lines.append(f'sns_stage_seconds_count{{stage="{stage}"}} {item["count"]}')
+    lines.append("# HELP sns_events_total 받은 이벤트 종류별 개수")
+    lines.append("# TYPE sns_events_total counter")
+    for kind, count in sorted(pipeline["events"].items()):
+        lines.append(f'sns_events_total{{type="{_label(kind)}"}} {count}')
+    return lines
+
+
+class MetricsServer:
+    """ChatServer 메트릭을 제공하는 HTTP 서버 (별도 스레드, 로컬 주소 권장)"""
+
+    def __init__(self, server, host="127.0.0.1", port=9100):
+        self.server = server
+        chat_server = server
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = render_prometheus(chat_server).encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path == "/stats":
+                    body = json.dumps(
+                        {
+                            "connections": chat_server.connection_stats(),
+                            "rooms": chat_server.room_stats(),
+                            "pipeline": chat_server.pipeline_stats(),
+                        },
+                        ensure_ascii=False,
+                    ).encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # 요청마다 표준 에러에 출력하지 않음
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.address = self.httpd.server_address
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
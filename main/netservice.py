@@ -0,0 +1,207 @@
+"""
+DNS 조회와 네트워크 정보 조회를 워커 스레드에서 실행하는 서비스.
+
+클라이언트 GUI가 Tk 스레드에서 gethostbyname/gethostbyaddr를 바로 부르면
+느린 DNS 서버 하나 때문에 채팅과 캔버스가 모두 멈춘다.
+
+- Resolver: getaddrinfo(IPv4/IPv6)/getnameinfo 결과를 ttl 동안 캐시하고, 실패도
+  negative_ttl 동안 캐시. 같은 이름을 동시에 조회하면 한 번만 조회하고 나머지는 결과를 기다림
+- NetService: 워커 풀(ThreadPoolExecutor)에서 조회를 실행하고 Future를 반환.
+  resolve_many로 이름/IP 여러 개를 한꺼번에 조회 (스크립트에서도 사용)
+
+    python netservice.py example.com localhost 127.0.0.1 ::1
+"""
+
+import ipaddress
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from network_utils import format_dns_lookup, resolve_host, reverse_host
+
+
+class Resolver:
+    """조회 결과 캐시 (여러 스레드에서 호출해도 됨, 호출한 스레드에서 조회)"""
+
+    def __init__(self, ttl=300.0, negative_ttl=30.0, max_entries=1024):
+        self.ttl = ttl  # 성공한 결과를 재사용하는 시간(초)
+        self.negative_ttl = negative_ttl  # 실패(이름 없음 등)를 재사용하는 시간(초)
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.cache = {}  # (종류, 이름) -> (만료 시각, 결과, 예외)
+        self.inflight = {}  # (종류, 이름) -> 조회 중인 Future
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.joined = 0  # 다른 스레드의 조회 결과를 기다린 횟수
+
+    def resolve(self, host):
+        """호스트 이름 -> 주소 목록 (IPv4, IPv6 순서)"""
+        return self.cached("addr", host, resolve_host)
+
+    def reverse(self, ip):
+        """IP -> 호스트 이름"""
+        return self.cached("name", ip, reverse_host)
+
+    def cached(self, kind, name, lookup):
+        key = (kind, name)
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                if entry[2] is not None:
+                    self.negative_hits += 1
+                    raise entry[2]
+                self.hits += 1
+                return entry[1]
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self.inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.joined += 1
+        if not owner:
+            return future.result()
+        try:
+            value = lookup(name)
+        except OSError as e:
+            self.store(key, None, e, self.negative_ttl)
+            future.set_exception(e)
+            raise
+        except BaseException as e:
+            # 캐시하지 않는 오류도 기다리던 스레드에는 전달
+            with self.lock:
+                self.inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        self.store(key, value, None, self.ttl)
+        future.set_result(value)
+        return value
+
+    def store(self, key, value, error, ttl):
+        with self.lock:
+            self.inflight.pop(key, None)
+            self.cache.pop(key, None)
+            self.cache[key] = (time.monotonic() + ttl, value, error)
+            while len(self.cache) > self.max_entries:
+                # 가장 오래전에 저장한 항목부터 버림
+                del self.cache[next(iter(self.cache))]
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.cache),
+                "inflight": len(self.inflight),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "joined": self.joined,
+            }
+
+
+def is_ip(text):
+    try:
+        ipaddress.ip_address(text)
+        return True
+    except ValueError:
+        return False
+
+
+class NetService:
+    """
+    조회를 워커 풀에서 실행하고 concurrent.futures.Future를 반환.
+    GUI는 Future의 완료 콜백에서 결과를 자신의 이벤트 큐로 넘겨 GUI 스레드에서 반영
+    """
+
+    def __init__(self, workers=4, resolver=None):
+        self.resolver = resolver or Resolver()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="net")
+
+    def submit(self, func, *args):
+        """아무 함수나 워커에서 실행 (인터페이스/소켓 정보 조회 등)"""
+        return self.pool.submit(func, *args)
+
+    def lookup(self, host):
+        return self.pool.submit(self.resolver.resolve, host)
+
+    def reverse(self, ip):
+        return self.pool.submit(self.resolver.reverse, ip)
+
+    def dns_lookup(self, domain):
+        """network_utils.dns_lookup과 같은 형식의 결과 문자열 (캐시 사용)"""
+        return self.pool.submit(self._dns_lookup, domain)
+
+    def _dns_lookup(self, domain):
+        try:
+            addresses = self.resolver.resolve(domain)
+        except OSError as e:
+            return f"DNS 변환 오류: {e}"
+        try:
+            reverse = self.resolver.reverse(addresses[0])
+        except OSError as e:
+            reverse = f"(역변환 실패: {e})"
+        return format_dns_lookup(domain, addresses, reverse)
+
+    def resolve_many(self, items, timeout=None):
+        """
+        이름과 IP를 한꺼번에 조회. 이름은 주소 목록, IP는 호스트 이름으로 변환해서
+        {항목: 결과 또는 예외} 반환 (timeout 안에 끝나지 않은 항목은 TimeoutError)
+        """
+        futures = {
+            item: self.reverse(item) if is_ip(item) else self.lookup(item)
+            for item in dict.fromkeys(items)
+        }
+        wait(futures.values(), timeout)
+        results = {}
+        for item, future in futures.items():
+            if not future.done():
+                results[item] = TimeoutError("조회 시간 초과")
+            elif future.exception() is not None:
+                results[item] = future.exception()
+            else:
+                results[item] = future.result()
+        return results
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="이름/IP 여러 개를 한꺼번에 DNS 조회")
+    parser.add_argument("items", nargs="+", help="호스트 이름 또는 IPv4/IPv6 주소")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args()
+
+    service = NetService(workers=args.workers)
+    started = time.perf_counter()
+    results = service.resolve_many(args.items, args.timeout)
+    elapsed = time.perf_counter() - started
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    item: value if not isinstance(value, Exception) else {"error": str(value)}
+                    for item, value in results.items()
+                },
+                ensure_ascii=False,
+                indent=2,
+            )
+        )
+    else:
+        for item, value in results.items():
+            if isinstance(value, Exception):
+                value = f"오류: {value}"
+            elif isinstance(value, list):
+                value = ", ".join(value)
+            print(f"{item}: {value}")
+        print(f"({len(results)}개, {elapsed * 1000:.1f}ms, 캐시 {service.resolver.stats()})")
+    service.close()
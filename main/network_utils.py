@@ -1,17 +1,34 @@
-import subprocess
+import ipaddress
+import os
 import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy가 없으면 배열 변환은 array 모듈로 처리
+    np = None
 
 
 def get_ifconfig_info():
     """
-    ifconfig 명령어 실행 결과를 문자열로 반환하는 함수.
-    Unix 계열에서 동작한다고 가정 (Windows라면 ipconfig로 변경 필요)
+    네트워크 인터페이스 정보(주소, 송수신 통계)를 문자열로 반환하는 함수.
+    리눅스에서는 /proc/net/dev를 직접 읽고, 그 외에는 ifconfig 실행 결과를 사용
     """
+    if not os.path.exists(PROC_NET_DEV):
+        try:
+            result = subprocess.check_output(["ifconfig"], stderr=subprocess.STDOUT)
+            return result.decode("utf-8")
+        except Exception as e:
+            return f"ifconfig 실행 오류: {e}"
     try:
-        result = subprocess.check_output(["ifconfig"], stderr=subprocess.STDOUT)
-        return result.decode("utf-8")
-    except Exception as e:
-        return f"ifconfig 실행 오류: {e}"
+        return format_interfaces(read_interfaces())
+    except OSError as e:
+        return f"인터페이스 정보 조회 오류: {e}"
 
 
 def convert_byte_order(value):
@@ -19,8 +36,6 @@ def convert_byte_order(value):
     호스트 바이트 순서 -> 네트워크 바이트 순서 (htonl), 다시 ntohl로 변환해 예시를 보여줌
     value는 정수형으로 가정.
     """
-    import struct
-
     network_order = socket.htonl(value)
     host_order = socket.ntohl(network_order)
     return (
@@ -43,24 +58,294 @@ def convert_ip_address(ip_str):
         return f"IP 변환 오류: {e}"
 
 
+def resolve_host(host):
+    """
+    호스트 이름의 IPv4/IPv6 주소 목록 (getaddrinfo, IPv4 먼저, 중복 제거).
+    블로킹 호출이므로 GUI에서는 netservice.NetService를 통해 워커에서 실행
+    """
+    infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    addresses = dict.fromkeys(
+        info[4][0] for info in sorted(infos, key=lambda info: info[0] != socket.AF_INET)
+    )
+    return list(addresses)
+
+
+def reverse_host(ip):
+    """IP(IPv4/IPv6)의 호스트 이름 (getnameinfo, 이름이 없으면 socket.gaierror)"""
+    return socket.getnameinfo((ip, 0), socket.NI_NAMEREQD)[0]
+
+
+def format_dns_lookup(domain, addresses, reverse_domain):
+    ip = addresses[0]
+    others = f" (그 외 {', '.join(addresses[1:])})" if len(addresses) > 1 else ""
+    return f"도메인: {domain}, IP: {ip}{others}, Reverse DNS: {reverse_domain}"
+
+
 def dns_lookup(domain):
     """
     도메인을 IP로 변환, IP를 도메인으로 다시 역변환하는 예제
     """
     try:
-        ip = socket.gethostbyname(domain)
-        reverse_domain = socket.gethostbyaddr(ip)[0]
-        return f"도메인: {domain}, IP: {ip}, Reverse DNS: {reverse_domain}"
+        addresses = resolve_host(domain)
+        return format_dns_lookup(domain, addresses, reverse_host(addresses[0]))
     except socket.error as e:
         return f"DNS 변환 오류: {e}"
 
 
+# /proc/net/tcp의 st 열 값
+TCP_STATES = {
+    0x01: "ESTABLISHED",
+    0x02: "SYN_SENT",
+    0x03: "SYN_RECV",
+    0x04: "FIN_WAIT1",
+    0x05: "FIN_WAIT2",
+    0x06: "TIME_WAIT",
+    0x07: "CLOSE",
+    0x08: "CLOSE_WAIT",
+    0x09: "LAST_ACK",
+    0x0A: "LISTEN",
+    0x0B: "CLOSING",
+    0x0C: "NEW_SYN_RECV",
+}
+PROC_NET_TCP = (("tcp", "/proc/net/tcp"), ("tcp6", "/proc/net/tcp6"))
+PROC_NET_DEV = "/proc/net/dev"
+PROC_IF_INET6 = "/proc/net/if_inet6"
+CACHE_TTL = 1.0  # 소켓 목록을 다시 읽기 전까지 재사용하는 시간(초)
+
+# struct tcp_info (linux/tcp.h) 앞부분: u8 8개 + u32 24개
+TCP_INFO_STRUCT = struct.Struct("8B24I")
+
+
+def _parse_address(text):
+    """ "0100007F:1F90" 형식(네트워크 순서 32비트 단위를 호스트 순서로 쓴 16진수) -> (IP, 포트)"""
+    host, port = text.split(":")
+    raw = bytes.fromhex(host)
+    # 32비트 단위마다 바이트 순서가 뒤집혀 있음
+    raw = b"".join(raw[i : i + 4][::-1] for i in range(0, len(raw), 4))
+    family = socket.AF_INET if len(raw) == 4 else socket.AF_INET6
+    return socket.inet_ntop(family, raw), int(port, 16)
+
+
+def read_tcp_sockets():
+    """
+    /proc/net/tcp, /proc/net/tcp6의 모든 TCP 소켓을 레코드(dict) 목록으로 반환.
+    retransmits는 아직 확인되지 않은 세그먼트의 재전송 횟수
+    """
+    records = []
+    for proto, path in PROC_NET_TCP:
+        try:
+            with open(path) as f:
+                lines = f.readlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            fields = line.split()
+            if len(fields) < 10:
+                continue
+            tx_queue, rx_queue = fields[4].split(":")
+            local_ip, local_port = _parse_address(fields[1])
+            remote_ip, remote_port = _parse_address(fields[2])
+            state = int(fields[3], 16)
+            records.append(
+                {
+                    "proto": proto,
+                    "local_ip": local_ip,
+                    "local_port": local_port,
+                    "remote_ip": remote_ip,
+                    "remote_port": remote_port,
+                    "state": TCP_STATES.get(state, str(state)),
+                    "tx_queue": int(tx_queue, 16),
+                    "rx_queue": int(rx_queue, 16),
+                    "retransmits": int(fields[6], 16),
+                    "uid": int(fields[7]),
+                    "inode": int(fields[9]),
+                }
+            )
+    return records
+
+
+class SocketTable:
+    """
+    read_tcp_sockets 결과를 CACHE_TTL 동안 재사용하고 포트별 색인을 만들어 두는 캐시.
+    여러 스레드에서 호출해도 됨
+    """
+
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.loaded = None  # 마지막으로 읽은 시각 (monotonic)
+        self.records = []
+        self.by_port = {}  # 포트 -> 로컬 또는 원격 포트가 같은 레코드 목록
+
+    def refresh(self):
+        records = read_tcp_sockets()
+        by_port = {}
+        for record in records:
+            by_port.setdefault(record["local_port"], []).append(record)
+            if record["remote_port"] != record["local_port"]:
+                by_port.setdefault(record["remote_port"], []).append(record)
+        self.records, self.by_port = records, by_port
+        self.loaded = time.monotonic()
+
+    def get(self, port=None):
+        """port가 주어지면 로컬 또는 원격 포트가 port인 소켓만 반환"""
+        with self.lock:
+            if self.loaded is None or time.monotonic() - self.loaded >= self.ttl:
+                self.refresh()
+            if port is None:
+                return list(self.records)
+            return list(self.by_port.get(port, ()))
+
+
+socket_table = SocketTable()
+
+
+def get_tcp_sockets(port=None):
+    return socket_table.get(port)
+
+
+def format_tcp_sockets(records):
+    lines = [
+        f"{'Proto':<5} {'Recv-Q':>6} {'Send-Q':>6} {'Local Address':<28} "
+        f"{'Foreign Address':<28} {'State':<12} Retrans"
+    ]
+    for r in records:
+        lines.append(
+            f"{r['proto']:<5} {r['rx_queue']:>6} {r['tx_queue']:>6} "
+            f"{r['local_ip'] + ':' + str(r['local_port']):<28} "
+            f"{r['remote_ip'] + ':' + str(r['remote_port']):<28} "
+            f"{r['state']:<12} {r['retransmits']}"
+        )
+    return "\n".join(lines)
+
+
+def tcp_info(sock):
+    """
+    연결된 TCP 소켓의 커널 통계(getsockopt TCP_INFO). 지원하지 않는 플랫폼이면 None.
+    시간 단위는 마이크로초
+    """
+    if not hasattr(socket, "TCP_INFO"):
+        return None
+    try:
+        raw = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, TCP_INFO_STRUCT.size)
+    except OSError:
+        return None
+    if len(raw) < TCP_INFO_STRUCT.size:
+        return None
+    values = TCP_INFO_STRUCT.unpack(raw)
+    state, _, retransmits = values[0], values[1], values[2]
+    (
+        rto, _, snd_mss, _, unacked, _, lost, retrans, _,
+        _, _, _, _,
+        pmtu, _, rtt, rttvar, _, snd_cwnd, _, _,
+        _, _, total_retrans,
+    ) = values[8:]
+    return {
+        "state": TCP_STATES.get(state, str(state)),
+        "rtt_us": rtt,
+        "rttvar_us": rttvar,
+        "rto_us": rto,
+        "retransmits": retransmits,
+        "retrans": retrans,
+        "total_retrans": total_retrans,
+        "lost": lost,
+        "unacked": unacked,
+        "snd_cwnd": snd_cwnd,
+        "snd_mss": snd_mss,
+        "pmtu": pmtu,
+    }
+
+
+def read_interfaces():
+    """/proc/net/dev의 인터페이스별 송수신 통계와 주소 목록"""
+    with open(PROC_NET_DEV) as f:
+        lines = f.readlines()[2:]
+    addresses = {}
+    for index, name in socket.if_nameindex():
+        address = _ipv4_address(name)
+        if address:
+            addresses.setdefault(name, []).append(address)
+    try:
+        with open(PROC_IF_INET6) as f:
+            for line in f:
+                fields = line.split()
+                raw = bytes.fromhex(fields[0])
+                addresses.setdefault(fields[5], []).append(
+                    f"{socket.inet_ntop(socket.AF_INET6, raw)}/{int(fields[2], 16)}"
+                )
+    except OSError:
+        pass
+    interfaces = []
+    for line in lines:
+        name, _, data = line.partition(":")
+        name = name.strip()
+        values = [int(v) for v in data.split()]
+        interfaces.append(
+            {
+                "name": name,
+                "addresses": addresses.get(name, []),
+                "rx_bytes": values[0],
+                "rx_packets": values[1],
+                "rx_errors": values[2],
+                "rx_dropped": values[3],
+                "tx_bytes": values[8],
+                "tx_packets": values[9],
+                "tx_errors": values[10],
+                "tx_dropped": values[11],
+            }
+        )
+    return interfaces
+
+
+def _ipv4_address(name):
+    """SIOCGIFADDR ioctl로 인터페이스의 IPv4 주소를 조회 (없으면 None)"""
+    import fcntl
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        try:
+            packed = fcntl.ioctl(
+                s.fileno(), 0x8915, struct.pack("256s", name.encode("utf-8")[:15])
+            )
+        except OSError:
+            return None
+    return socket.inet_ntoa(packed[20:24])
+
+
+def format_interfaces(interfaces):
+    blocks = []
+    for item in interfaces:
+        lines = [f"{item['name']}:"]
+        for address in item["addresses"]:
+            lines.append(f"    inet {address}")
+        lines.append(
+            f"    RX packets {item['rx_packets']}  bytes {item['rx_bytes']}  "
+            f"errors {item['rx_errors']}  dropped {item['rx_dropped']}"
+        )
+        lines.append(
+            f"    TX packets {item['tx_packets']}  bytes {item['tx_bytes']}  "
+            f"errors {item['tx_errors']}  dropped {item['tx_dropped']}"
+        )
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
 def get_netstat_info(port=None):
     """
-    netstat 결과를 반환하는 함수.
-    port가 주어지면 해당 포트와 관련된 라인만 필터링.
-    Linux 계열에서 netstat -a -n -p tcp로 TCP 소켓 상태를 확인한다고 가정.
+    TCP 소켓 상태를 문자열로 반환하는 함수.
+    port가 주어지면 로컬 또는 원격 포트가 port인 소켓만 표시.
+    리눅스에서는 /proc/net/tcp를 직접 읽고(CACHE_TTL 동안 캐시), 그 외에는
+    netstat -a -n -p tcp 결과에서 해당 포트가 들어간 줄을 사용
     """
+    if not os.path.exists(PROC_NET_TCP[0][1]):
+        return _netstat_subprocess(port)
+    records = get_tcp_sockets(port)
+    if not records:
+        return "해당 포트 관련 netstat 정보가 없습니다."
+    return format_tcp_sockets(records)
+
+
+def _netstat_subprocess(port=None):
+    """/proc이 없는 플랫폼용: netstat 실행 결과에서 port가 들어간 줄만 필터링"""
     try:
         result = subprocess.check_output(
             ["netstat", "-a", "-n", "-p", "tcp"], stderr=subprocess.STDOUT
@@ -79,3 +364,292 @@ def get_netstat_info(port=None):
         )
     except Exception as e:
         return f"netstat 실행 오류: {e}"
+
+
+# 커널 소켓 큐에 남은 바이트 수 조회용 ioctl (리눅스)
+SIOCINQ = 0x541B  # FIONREAD: 받았지만 아직 읽지 않은 바이트
+SIOCOUTQ = 0x5411  # TIOCOUTQ: 보냈지만 상대가 아직 확인(ACK)하지 않은 바이트 포함
+
+
+def socket_buffers(sock):
+    """
+    소켓 버퍼 크기(SO_SNDBUF/SO_RCVBUF)와 커널 큐에 쌓인 바이트(SIOCOUTQ/SIOCINQ).
+    큐 크기는 리눅스에서만 조회하며, 닫힌 소켓이면 None
+    """
+    try:
+        item = {
+            "sndbuf": sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF),
+            "rcvbuf": sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF),
+        }
+        if sys.platform.startswith("linux"):
+            import fcntl
+
+            for key, request in (("outq", SIOCOUTQ), ("inq", SIOCINQ)):
+                raw = fcntl.ioctl(sock.fileno(), request, b"\0\0\0\0")
+                item[key] = struct.unpack("i", raw)[0]
+    except (OSError, ValueError):
+        return None
+    return item
+
+
+# ---------------------------------------------------------------------------
+# 배열 단위 변환 (로그의 주소 열, /proc/net/tcp 덤프 등 대량 처리용)
+#
+# convert_byte_order/convert_ip_address는 값 하나를 받아 설명 문자열을 만든다.
+# 아래 함수들은 값 목록(또는 numpy 배열)을 받아 배열을 반환한다.
+# numpy가 있으면 numpy 배열, 없으면 array.array/bytes/list를 반환하고
+# use_numpy=False로 numpy가 있어도 array 모듈을 쓰게 할 수 있다.
+# ---------------------------------------------------------------------------
+
+LITTLE_ENDIAN = sys.byteorder == "little"
+UINT32 = "I" if array("I").itemsize == 4 else "L"
+ADDRESS_SIZES = {socket.AF_INET: 4, socket.AF_INET6: 16}
+
+
+def _numpy(use_numpy):
+    if use_numpy is None:
+        return np is not None
+    if use_numpy and np is None:
+        raise RuntimeError("numpy가 설치되어 있지 않습니다")
+    return use_numpy
+
+
+def swap_byte_order(values, bits=32, use_numpy=None):
+    """
+    배열 전체에 htonl/ntohl(bits=32) 또는 htons/ntohs(bits=16) 적용.
+    두 변환은 같은 연산이라 리틀 엔디언 호스트에서는 바이트를 뒤집고, 빅 엔디언이면 그대로 복사
+    """
+    if _numpy(use_numpy):
+        out = np.asarray(values, dtype=np.uint32 if bits == 32 else np.uint16)
+        return out.byteswap() if LITTLE_ENDIAN else out.copy()
+    out = array(UINT32 if bits == 32 else "H", values)
+    if LITTLE_ENDIAN:
+        out.byteswap()
+    return out
+
+
+def htonl_array(values, use_numpy=None):
+    return swap_byte_order(values, 32, use_numpy)
+
+
+def htons_array(values, use_numpy=None):
+    return swap_byte_order(values, 16, use_numpy)
+
+
+ntohl_array = htonl_array
+ntohs_array = htons_array
+
+
+def _pton_all(family, addresses, skip_invalid=False):
+    """
+    주소 목록을 inet_pton해서 붙인 bytes. 변환할 수 없는 주소가 있으면 OSError
+    (skip_invalid면 그 주소만 건너뜀)
+    """
+    pton = socket.inet_pton
+    try:
+        return b"".join([pton(family, a) for a in addresses])
+    except (OSError, TypeError):
+        if not skip_invalid:
+            raise
+    packed = []
+    for a in addresses:
+        try:
+            packed.append(pton(family, a))
+        except (OSError, TypeError):
+            continue
+    return b"".join(packed)
+
+
+def inet_pton_many(addresses, family=socket.AF_INET, use_numpy=None):
+    """
+    주소 문자열 목록 -> 네트워크 순서 주소를 이어 붙인 bytes
+    (numpy면 (n, 4) 또는 (n, 16) uint8 배열). 잘못된 주소가 있으면 OSError
+    """
+    return _packed_array(_pton_all(family, addresses), family, use_numpy)
+
+
+def _packed_array(packed, family, use_numpy):
+    if _numpy(use_numpy):
+        return np.frombuffer(packed, dtype=np.uint8).reshape(-1, ADDRESS_SIZES[family])
+    return packed
+
+
+def inet_ntop_many(packed, family=socket.AF_INET):
+    """inet_pton_many 결과(bytes 또는 numpy 배열) -> 주소 문자열 목록"""
+    size = ADDRESS_SIZES[family]
+    data = packed.tobytes() if hasattr(packed, "tobytes") else bytes(packed)
+    ntop = socket.inet_ntop
+    return [ntop(family, data[i : i + size]) for i in range(0, len(data), size)]
+
+
+def _be32_to_ints(packed, use_numpy):
+    if _numpy(use_numpy):
+        return np.frombuffer(packed, dtype=">u4").astype(np.uint32)
+    out = array(UINT32, packed)
+    if LITTLE_ENDIAN:
+        out.byteswap()
+    return out
+
+
+def ipv4_to_ints(addresses, use_numpy=None):
+    """IPv4 문자열 목록 -> 주소 값 배열 (127.0.0.1 -> 0x7F000001). 잘못된 주소가 있으면 OSError"""
+    return _be32_to_ints(_pton_all(socket.AF_INET, addresses), use_numpy)
+
+
+def ints_to_ipv4(values):
+    """주소 값 배열 -> IPv4 문자열 목록"""
+    if np is not None and isinstance(values, np.ndarray):
+        data = values.astype(">u4").tobytes()
+    else:
+        swapped = array(UINT32, values)
+        if LITTLE_ENDIAN:
+            swapped.byteswap()
+        data = swapped.tobytes()
+    return inet_ntop_many(data, socket.AF_INET)
+
+
+def _is_ints(values):
+    if np is not None and isinstance(values, np.ndarray):
+        return values.dtype.kind in "ui"
+    if isinstance(values, array):
+        return values.typecode in "IL"
+    return isinstance(values, (list, tuple)) and bool(values) and isinstance(values[0], int)
+
+
+def cidr_contains(network, addresses, use_numpy=None):
+    """
+    addresses 각각이 network('10.0.0.0/8', '2001:db8::/32')에 속하는지.
+    addresses는 주소 문자열 목록, 또는 IPv4면 ipv4_to_ints 결과, IPv6면 inet_pton_many 결과.
+    numpy bool 배열(numpy가 없으면 bool 목록)을 반환
+    """
+    net = ipaddress.ip_network(network, strict=False)
+    numpy = _numpy(use_numpy)
+    if net.version == 4:
+        values = addresses if _is_ints(addresses) else ipv4_to_ints(addresses, numpy)
+        mask, base = int(net.netmask), int(net.network_address)
+        if numpy:
+            return (np.asarray(values, dtype=np.uint32) & np.uint32(mask)) == np.uint32(base)
+        return [(v & mask) == base for v in values]
+    if isinstance(addresses, (bytes, bytearray)) or (
+        np is not None and isinstance(addresses, np.ndarray)
+    ):
+        packed = addresses
+    else:
+        packed = _pton_all(socket.AF_INET6, addresses)
+    prefix = net.network_address.packed
+    full, rest = divmod(net.prefixlen, 8)
+    if numpy:
+        data = packed.tobytes() if hasattr(packed, "tobytes") else bytes(packed)
+        rows = np.frombuffer(data, dtype=np.uint8).reshape(-1, 16)
+        result = np.all(rows[:, :full] == np.frombuffer(prefix[:full], dtype=np.uint8), axis=1)
+        if rest:
+            bits = (0xFF << (8 - rest)) & 0xFF
+            result &= (rows[:, full] & bits) == prefix[full]
+        return result
+    data = packed.tobytes() if hasattr(packed, "tobytes") else bytes(packed)
+    shift = 128 - net.prefixlen
+    base = int(net.network_address) >> shift
+    return [
+        int.from_bytes(data[i : i + 16], "big") >> shift == base
+        for i in range(0, len(data), 16)
+    ]
+
+
+def _chunks(lines, chunk_size):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_address_column(
+    lines, column=0, sep=None, family=socket.AF_INET, chunk_size=65536, use_numpy=None
+):
+    """
+    로그 파일(또는 줄 iterable)의 주소 열을 chunk_size줄씩 변환해서 내보냄.
+    IPv4는 ipv4_to_ints 배열, IPv6는 inet_pton_many 결과. 빈 줄, 열이 모자란 줄,
+    다른 주소 체계나 잘못된 주소는 건너뜀 (파일 전체를 메모리에 올리지 않음)
+    """
+    for chunk in _chunks(lines, chunk_size):
+        addresses = []
+        for line in chunk:
+            fields = line.split(sep)
+            if len(fields) > column:
+                addresses.append(fields[column].strip())
+        packed = _pton_all(family, addresses, skip_invalid=True)
+        if family == socket.AF_INET:
+            yield _be32_to_ints(packed, use_numpy)
+        else:
+            yield _packed_array(packed, family, use_numpy)
+
+
+def iter_tcp_dump(lines, chunk_size=65536, use_numpy=None):
+    """
+    /proc/net/tcp, /proc/net/tcp6 형식의 덤프를 chunk_size줄씩 열 배열로 변환해서 내보냄.
+    {"family", "local_ip", "local_port", "remote_ip", "remote_port", "state", "tx_queue", "rx_queue"}
+    IPv4 주소는 ipv4_to_ints와 같은 값 배열, IPv6 주소는 inet_pton_many와 같은 packed 형식.
+    덤프는 이 호스트와 같은 바이트 순서의 기계에서 만든 것으로 가정
+    """
+    numpy = _numpy(use_numpy)
+    for chunk in _chunks(lines, chunk_size):
+        rows = {4: [], 16: []}
+        for line in chunk:
+            fields = line.split()
+            if len(fields) < 10 or ":" not in fields[1] or fields[0] == "sl":
+                continue
+            local, local_port = fields[1].split(":")
+            remote, remote_port = fields[2].split(":")
+            tx_queue, rx_queue = fields[4].split(":")
+            size = len(local) // 2
+            if size in rows:
+                rows[size].append(
+                    (local, local_port, remote, remote_port, fields[3], tx_queue, rx_queue)
+                )
+        for size, items in rows.items():
+            if items:
+                yield _tcp_columns(size, items, numpy)
+
+
+def _tcp_columns(size, items, numpy):
+    # 16진수 열을 bytes.fromhex로 한 번에 바꾼 뒤 배열로 해석
+    # (주소는 32비트 단위마다 호스트 순서, 포트/상태/큐는 고정 길이 16진수 숫자)
+    local, local_port, remote, remote_port, state, tx_queue, rx_queue = (
+        bytes.fromhex("".join(column)) for column in zip(*items)
+    )
+    columns = {"family": socket.AF_INET if size == 4 else socket.AF_INET6}
+    for name, raw in (("local_ip", local), ("remote_ip", remote)):
+        if numpy:
+            words = np.frombuffer(raw, dtype="=u4")
+            if size == 4:
+                columns[name] = words.astype(np.uint32)
+            else:
+                columns[name] = words.astype(">u4").view(np.uint8).reshape(-1, 16)
+        else:
+            words = array(UINT32, raw)
+            if size == 4:
+                columns[name] = words
+            else:
+                if LITTLE_ENDIAN:
+                    words.byteswap()
+                columns[name] = words.tobytes()
+    for name, raw, typecode in (
+        ("local_port", local_port, "H"),
+        ("remote_port", remote_port, "H"),
+        ("state", state, "B"),
+        ("tx_queue", tx_queue, UINT32),
+        ("rx_queue", rx_queue, UINT32),
+    ):
+        # 16진수 숫자는 빅 엔디언 바이트열
+        if numpy:
+            width = array(typecode).itemsize
+            columns[name] = np.frombuffer(raw, dtype=f">u{width}").astype(f"=u{width}")
+        else:
+            values = array(typecode, raw)
+            if LITTLE_ENDIAN and typecode != "B":
+                values.byteswap()
+            columns[name] = values
+    return columns
@@ -0,0 +1,260 @@
+import threading
+import time
+from collections import deque
+
+# 느린 클라이언트(송신 큐가 한계치를 넘은 경우) 처리 정책
+# - "drop_oldest": 가장 오래된 드로잉 move 이벤트부터 버림
+# - "coalesce": 같은 사용자의 연속된 move 이벤트를 마지막 좌표 하나로 합침
+# - "disconnect": 즉시 연결 종료
+SLOW_CLIENT_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+# sendmsg 한 번에 넘길 최대 버퍼 개수 (리눅스 IOV_MAX는 1024)
+MAX_IOV = 512
+
+
+def send_buffers(sock, buffers):
+    """여러 버퍼를 sendmsg(writev) 한 번으로 전송하고 보낸 바이트 수를 반환"""
+    if len(buffers) == 1:
+        return sock.send(buffers[0])
+    return sock.sendmsg(buffers)
+
+
+def remaining_buffers(buffers, sent):
+    """sent 바이트만큼 전송된 뒤 남은 버퍼 목록 (복사 없이 memoryview로 자름)"""
+    for i, buf in enumerate(buffers):
+        size = len(buf)
+        if sent < size:
+            rest = [memoryview(buf)[sent:]] if sent else [buf]
+            rest.extend(buffers[i + 1 :])
+            return rest
+        sent -= size
+    return []
+
+
+class OutboundQueue:
+    """
+    클라이언트 한 명에게 보낼 메시지를 담는 송신 큐.
+    브로드캐스트하는 쪽은 push만 하고, 실제 전송은 클라이언트별 송신 스레드
+    (thread 모드) 또는 이벤트 루프(selector 모드)가 take로 꺼내서 처리한다.
+    """
+
+    def __init__(self, max_bytes=1 << 20, max_messages=10000, policy="drop_oldest"):
+        if policy not in SLOW_CLIENT_POLICIES:
+            raise ValueError(f"지원하지 않는 정책: {policy}")
+        self.max_bytes = max_bytes
+        self.max_messages = max_messages
+        self.policy = policy
+        self.frames = deque()  # (data, sender, droppable)
+        self.head = []  # 일부만 전송되고 남은 버퍼 (항상 가장 먼저 전송)
+        self.bytes = 0
+        self.inflight = 0  # 꺼내 갔지만 아직 전송 완료되지 않은 바이트
+        # force로 넣은 뒤 아직 전송되지 않은 바이트 (한계치 계산에서 제외).
+        # 한계치보다 큰 히스토리를 받은 직후의 일반 메시지로 연결이 끊기지 않게 함
+        self.forced = 0
+        self.closed = False
+        self.cond = threading.Condition()
+        # 통계
+        self.peak_bytes = 0
+        self.peak_messages = 0
+        self.sent_messages = 0
+        self.sent_bytes = 0
+        self.send_calls = 0  # send/sendmsg 시스템 콜 횟수
+        self.dropped = 0
+        self.coalesced = 0
+        self.last_sent = None  # 마지막으로 전송을 마친 시각 (time.time)
+        # 연결별 스트림 압축 (protocol.StreamCompressor). 꺼낼 때 한 번에 꺼낸 메시지가
+        # compress_min 바이트 이상이면 묶어서 압축 (히스토리 재전송은 항상 해당).
+        # 버리거나 합친 뒤 실제로 보내는 순서대로 압축해야 하므로 take에서 처리
+        self.compressor = None
+        self.compress_min = 512
+        self.raw_frames = 0  # 압축을 켜기 전에 들어온 메시지 수 (그대로 보냄)
+        self.compressed_batches = 0
+        self.compressed_in = 0  # 압축한 메시지 바이트
+        self.compressed_out = 0  # 압축 결과 바이트
+        self.compress_time = 0.0  # 압축에 쓴 시간(초)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def set_compressor(self, compressor, min_size=512):
+        """
+        이후에 넣는 메시지부터 압축 (None이면 압축하지 않음).
+        이미 큐에 있는 메시지(압축 방식을 알리는 응답 등)는 그대로 보냄
+        """
+        with self.cond:
+            self.compressor = compressor
+            self.compress_min = min_size
+            self.raw_frames = len(self.frames)
+
+    def push(self, data, sender=None, droppable=False, force=False):
+        """
+        메시지를 큐에 추가. 정책을 적용해도 한계치를 넘으면 False를 반환하며,
+        이 경우 호출한 쪽에서 연결을 끊어야 한다.
+        droppable은 버리거나 합쳐도 되는 드로잉 move 이벤트 여부,
+        force는 한계치 검사 없이 무조건 넣어야 하는 메시지(히스토리 등) 여부.
+        """
+        with self.cond:
+            if self.closed:
+                return True
+            self.frames.append((data, sender, droppable))
+            self.bytes += len(data)
+            if force:
+                self.forced += len(data)
+            elif self._over_limit():
+                self._relieve()
+                if self._over_limit():
+                    return False
+            self.peak_bytes = max(self.peak_bytes, self.bytes)
+            self.peak_messages = max(self.peak_messages, len(self.frames))
+            self.cond.notify()
+            return True
+
+    def _over_limit(self):
+        return (
+            self.bytes - self.forced > self.max_bytes
+            or len(self.frames) > self.max_messages
+        )
+
+    def _relieve(self):
+        if self.policy == "drop_oldest":
+            kept = deque()
+            while self.frames and self._over_limit():
+                frame = self.frames.popleft()
+                if frame[2]:
+                    self.bytes -= len(frame[0])
+                    self.dropped += 1
+                else:
+                    kept.append(frame)
+            kept.extend(self.frames)
+            self.frames = kept
+        elif self.policy == "coalesce":
+            # 뒤에서부터 보면서, 같은 사용자의 더 나중 move가 있으면 이전 move는 제거
+            # (move가 아닌 메시지는 그 사용자의 합치기 경계가 됨)
+            later_move = set()
+            kept = []
+            for frame in reversed(self.frames):
+                data, sender, droppable = frame
+                if droppable:
+                    if sender in later_move:
+                        self.bytes -= len(data)
+                        self.coalesced += 1
+                        continue
+                    later_move.add(sender)
+                else:
+                    later_move.discard(sender)
+                kept.append(frame)
+            kept.reverse()
+            self.frames = deque(kept)
+
+    def take(self, limit=65536, max_frames=MAX_IOV):
+        """
+        전송할 버퍼 목록을 limit 바이트 또는 max_frames개까지 꺼내서 반환.
+        메시지는 복사하지 않고 브로드캐스트 때 인코딩된 객체를 그대로 넘긴다.
+        """
+        with self.cond:
+            return self._take(limit, max_frames)
+
+    def wait_take(self, limit=65536, max_frames=MAX_IOV, timeout=None):
+        """데이터가 들어올 때까지 기다렸다가 꺼냄. 큐가 닫히면 None"""
+        with self.cond:
+            while not self.head and not self.frames:
+                if self.closed:
+                    return None
+                if not self.cond.wait(timeout):
+                    return []
+            return self._take(limit, max_frames)
+
+    def _take(self, limit, max_frames):
+        buffers = self.head
+        self.head = []
+        size = sum(len(buf) for buf in buffers)
+        first = len(buffers)  # head는 이미 압축했거나 보내던 그대로
+        pending = size
+        while self.frames and size < limit and len(buffers) < max_frames:
+            data = self.frames.popleft()[0]
+            buffers.append(data)
+            size += len(data)
+            self.sent_messages += 1
+        self.bytes -= size
+        if self.raw_frames:
+            # 압축을 켜기 전에 들어온 메시지는 압축하지 않음 (버려진 만큼은 다음 메시지도
+            # 그대로 나가지만, 압축하지 않은 프레임은 언제 보내도 됨)
+            skip = min(self.raw_frames, len(buffers) - first)
+            self.raw_frames = min(self.raw_frames - skip, len(self.frames))
+            pending += sum(len(buf) for buf in buffers[first : first + skip])
+            first += skip
+        raw = size - pending
+        if self.compressor is not None and raw >= self.compress_min:
+            started = time.perf_counter()
+            data = self.compressor.compress(buffers[first:])
+            self.compress_time += time.perf_counter() - started
+            self.compressed_batches += 1
+            self.compressed_in += raw
+            self.compressed_out += len(data)
+            # force로 넣은 히스토리도 압축된 크기만큼만 보내면 됨
+            self.forced = max(0, self.forced - (raw - len(data)))
+            buffers[first:] = [data]
+            size = pending + len(data)
+        self.inflight += size
+        return buffers
+
+    def unsend(self, buffers):
+        """전송하지 못한 나머지 버퍼를 큐 맨 앞에 되돌림"""
+        if not buffers:
+            return
+        size = sum(len(buf) for buf in buffers)
+        with self.cond:
+            self.head = buffers + self.head
+            self.bytes += size
+            self.inflight -= size
+
+    def mark_sent(self, size, calls=1):
+        with self.cond:
+            self.sent_bytes += size
+            self.send_calls += calls
+            self.inflight -= size
+            self.forced = max(0, self.forced - size)
+            self.last_sent = time.time()
+            self.cond.notify_all()
+
+    def is_empty(self):
+        with self.cond:
+            return not self.head and not self.frames
+
+    def wait_empty(self, timeout):
+        """큐에 쌓인 데이터가 모두 전송될 때까지 최대 timeout초 대기"""
+        with self.cond:
+            return self.cond.wait_for(
+                lambda: self.closed
+                or (not self.head and not self.frames and self.inflight <= 0),
+                timeout,
+            )
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.frames.clear()
+            self.head = []
+            self.bytes = 0
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            return {
+                "messages": len(self.frames),
+                "bytes": self.bytes,
+                "peak_messages": self.peak_messages,
+                "peak_bytes": self.peak_bytes,
+                "sent_messages": self.sent_messages,
+                "sent_bytes": self.sent_bytes,
+                "send_calls": self.send_calls,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "last_sent": self.last_sent,
+                "policy": self.policy,
+                "compression": self.compressor.method if self.compressor else None,
+                "compressed_batches": self.compressed_batches,
+                "compressed_in": self.compressed_in,
+                "compressed_out": self.compressed_out,
+                "compress_ms": round(self.compress_time * 1000, 3),
+            }
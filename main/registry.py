@@ -0,0 +1,67 @@
+"""
+접속한 클라이언트 목록 (copy-on-write).
+
+수신/송신 스레드와 이벤트 루프가 동시에 목록을 순회하고, 접속/퇴장 때마다 목록이 바뀐다.
+
+- 바꾸는 쪽(add/remove)만 잠금을 잡고 dict를 고친 뒤 스냅샷을 버림
+- 읽는 쪽은 snapshot()으로 바뀌지 않는 튜플을 받아 잠금이나 복사 없이 순회
+  (바뀐 뒤 처음 읽을 때 한 번만 다시 만들기 때문에 접속/퇴장이 몰려도 비용이 O(1))
+- remove는 처음 호출한 스레드만 이름을 받으므로 같은 연결을 두 번 정리하지 않음
+"""
+
+import threading
+
+
+class ClientRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()  # 바꾸는 쪽만 사용
+        self.names = {}  # 소켓 -> 사용자 이름 (접속 순서 유지)
+        self.sockets = {}  # 사용자 이름 -> 소켓
+        self.members = ()  # 마지막 스냅샷 (None이면 다시 만들어야 함)
+        self.rebuilds = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, client_socket):
+        return client_socket in self.names
+
+    def add(self, client_socket, name):
+        with self.lock:
+            self.names[client_socket] = name
+            self.sockets[name] = client_socket
+            self.members = None
+
+    def remove(self, client_socket):
+        """목록에서 빼고 이름을 반환 (이미 빠졌으면 None)"""
+        with self.lock:
+            name = self.names.pop(client_socket, None)
+            if name is None:
+                return None
+            if self.sockets.get(name) is client_socket:
+                del self.sockets[name]
+            self.members = None
+        return name
+
+    def snapshot(self):
+        """지금 접속한 소켓 튜플 (순회 중에 목록이 바뀌어도 영향 없음)"""
+        members = self.members
+        if members is None:
+            with self.lock:
+                members = self.members
+                if members is None:
+                    members = self.members = tuple(self.names)
+                    self.rebuilds += 1
+        return members
+
+    def name(self, client_socket, default="Unknown"):
+        return self.names.get(client_socket, default)
+
+    def socket(self, name):
+        return self.sockets.get(name)
+
+    def clear(self):
+        with self.lock:
+            self.names = {}
+            self.sockets = {}
+            self.members = ()
@@ -0,0 +1,225 @@
+"""
+대화방(캔버스) 단위 상태.
+
+방마다 멤버 목록, 드로잉 히스토리, 최근 채팅, 저널을 따로 가지며
+드로잉/채팅 이벤트는 같은 방의 멤버에게만 전달된다.
+방마다 잠금이 따로 있어서 서로 다른 방의 이벤트는 동시에 처리된다.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+from history import DrawingHistory
+from journal import Journal, KIND_DRAW, KIND_CHAT, KIND_FINISH
+from throttle import DrawThrottle
+
+DEFAULT_ROOM = "lobby"
+ROOM_NAME = re.compile(r"^[\w-]{1,32}$")
+
+
+def valid_room_name(name):
+    return isinstance(name, str) and ROOM_NAME.match(name) is not None
+
+
+class Room:
+    def __init__(
+        self,
+        name,
+        history_max_points=500000,
+        snapshot_every=500,
+        chat_history_size=200,
+        checkpoint_every=5000,
+        draw_limits=None,
+        replay_window=2000,
+    ):
+        self.name = name
+        # 이 방에 있는 클라이언트 소켓. lock 안에서 새 튜플로 바꾸므로
+        # 브로드캐스트는 복사 없이 순회 (registry.ClientRegistry와 같은 방식)
+        self.members = ()
+        self.lock = threading.RLock()  # 멤버/히스토리/저널 보호
+        # 드로잉 히스토리 (끝난 획은 압축, 스냅샷 + tail로 새 멤버에게 전송)
+        self.drawing_events = DrawingHistory(
+            max_points=history_max_points, snapshot_every=snapshot_every
+        )
+        self.chat_history = deque(maxlen=chat_history_size)  # 최근 채팅 줄
+        self.checkpoint_every = checkpoint_every  # 이 개수의 드로잉 레코드마다 체크포인트
+        self.journal = None
+        self.since_checkpoint = 0
+        self.recovery_stats = None
+        # 보낸 사람(소켓) -> 저널에 남길 이름
+        self.sender_names = {}
+        # backplane을 쓸 때 마지막으로 적용한 방 이벤트의 시퀀스 번호
+        self.seq = 0
+        self.resyncing = False  # 빠진 이벤트가 있어 스냅샷을 다시 요청한 상태
+        # 보낸 사람별 드로잉 이벤트 제한과 move 합치기 (lock 안에서 사용)
+        self.throttle = DrawThrottle(draw_limits)
+        # 재접속한 클라이언트에게 빠진 이벤트만 보내기 위한 방 이벤트 번호와 최근 이벤트.
+        # epoch는 이 방 상태의 식별자로, 서버가 다시 시작되거나 backplane 스냅샷으로
+        # 히스토리가 바뀌면 달라지므로 이전 번호로는 이어 받을 수 없음
+        self.epoch = os.urandom(4).hex()
+        self.event_seq = 0
+        self.replay = deque(maxlen=replay_window)  # (번호, 드로잉 이벤트 dict 또는 채팅 줄)
+
+    def add_member(self, client_socket):
+        with self.lock:
+            if client_socket not in self.members:
+                self.members += (client_socket,)
+
+    def remove_member(self, client_socket):
+        with self.lock:
+            if client_socket in self.members:
+                self.members = tuple(c for c in self.members if c is not client_socket)
+
+    def record_draw(self, message, sender, name):
+        """드로잉 이벤트를 히스토리와 저널에 기록하고 방 이벤트 번호를 반환 (lock 안에서 호출)"""
+        self.drawing_events.append(message, sender=sender)
+        self.event_seq += 1
+        self.replay.append((self.event_seq, message))
+        if self.journal:
+            self.sender_names[sender] = name
+            self.journal.append_json(KIND_DRAW, {"u": name, "e": message})
+            self.since_checkpoint += 1
+            if self.since_checkpoint >= self.checkpoint_every:
+                self.request_checkpoint()
+        return self.event_seq
+
+    def record_chat(self, line):
+        with self.lock:
+            self.chat_history.append(line)
+            if self.journal:
+                self.journal.append(KIND_CHAT, line.encode("utf-8"))
+            self.event_seq += 1
+            self.replay.append((self.event_seq, line))
+            return self.event_seq
+
+    def events_since(self, resume):
+        """
+        재접속한 클라이언트가 마지막으로 받은 번호 이후의 이벤트 목록 (lock 안에서 호출).
+        다른 방 상태(epoch)이거나 replay에 남아 있지 않을 만큼 오래되었으면 None
+        (이때는 전체 히스토리를 다시 보냄)
+        """
+        seq = resume.get("seq")
+        if resume.get("epoch") != self.epoch or not isinstance(seq, int):
+            return None
+        if seq > self.event_seq:
+            return None
+        oldest = self.replay[0][0] if self.replay else self.event_seq + 1
+        if seq + 1 < oldest:
+            return None
+        # replay의 번호는 이어져 있으므로 위치를 바로 계산
+        return list(islice(self.replay, seq + 1 - oldest, None))
+
+    def finish_sender(self, sender):
+        """보낸 사람이 방을 나갈 때 진행 중인 획을 끝낸 것으로 기록"""
+        with self.lock:
+            self.drawing_events.finish_sender(sender)
+            name = self.sender_names.pop(sender, None)
+            if self.journal and name is not None:
+                self.journal.append(KIND_FINISH, name.encode("utf-8"))
+
+    def apply_snapshot(self, snapshot):
+        """backplane 스냅샷(backplane.RoomState.snapshot)으로 방 상태를 바꿈 (lock 안에서 호출)"""
+        strokes = [[tuple(point) for point in stroke] for stroke in snapshot["strokes"]]
+        tail = [(sender, event) for sender, event in snapshot["tail"]]
+        self.drawing_events.restore(snapshot["history_seq"], strokes, tail)
+        self.chat_history.clear()
+        self.chat_history.extend(snapshot["chat"])
+        self.seq = snapshot["seq"]
+        self.resyncing = False
+        # 히스토리가 통째로 바뀌었으므로 이전 번호로는 이어 받을 수 없음
+        self.epoch = os.urandom(4).hex()
+        self.replay.clear()
+
+    def request_checkpoint(self):
+        """
+        현재 히스토리를 체크포인트로 저장하도록 저널에 요청 (lock 안에서 호출).
+        획 목록은 참조만 넘기고 파일 쓰기는 저널 스레드가 처리
+        """
+        strokes, tail = self.drawing_events.export(
+            lambda sender: self.sender_names.get(sender, "Unknown")
+        )
+        self.journal.checkpoint(
+            strokes,
+            self.drawing_events.seq,
+            {"tail": tail, "chat": list(self.chat_history)},
+        )
+        self.since_checkpoint = 0
+
+    def open_journal(self, directory, fsync_policy="interval"):
+        """
+        저널을 열고 마지막 체크포인트 + 이후 레코드로 드로잉/채팅 기록을 복구.
+        복구에 걸린 시간은 recovery_stats에 기록
+        """
+        started = time.perf_counter()
+        journal = Journal(directory, fsync_policy=fsync_policy)
+        checkpoint, records = journal.recover()
+        loaded = time.perf_counter()
+        history = self.drawing_events
+        with self.lock:
+            self.chat_history.clear()
+            if checkpoint:
+                seq, strokes, extra = checkpoint
+                history.restore(seq, strokes, [tuple(item) for item in extra["tail"]])
+                self.chat_history.extend(extra["chat"])
+            else:
+                history.restore(0, [], [])
+            for kind, payload in records:
+                if kind == KIND_DRAW:
+                    record = json.loads(payload)
+                    history.append(record["e"], sender=record["u"])
+                elif kind == KIND_CHAT:
+                    self.chat_history.append(payload.decode("utf-8"))
+                elif kind == KIND_FINISH:
+                    history.finish_sender(payload.decode("utf-8"))
+            # 이전 실행의 사용자는 모두 나갔으므로 진행 중인 획도 끝난 것으로 처리
+            for sender in list(history.active):
+                history.finish_sender(sender)
+            history.take_snapshot()
+            self.journal = journal
+            self.since_checkpoint = len(records)
+        journal.start()
+        self.recovery_stats = {
+            "checkpoint_strokes": len(checkpoint[1]) if checkpoint else 0,
+            "records": len(records),
+            "strokes": len(history.strokes),
+            "chat_lines": len(self.chat_history),
+            "load_seconds": loaded - started,
+            "total_seconds": time.perf_counter() - started,
+        }
+        return self.recovery_stats
+
+    def close_journal(self):
+        """마지막 체크포인트를 남기고 저널 스레드를 종료 (다음 시작 시 복구가 빨라짐)"""
+        with self.lock:
+            if not self.journal:
+                return
+            if self.since_checkpoint:
+                self.request_checkpoint()
+            journal, self.journal = self.journal, None
+        journal.close()
+
+    def stats(self):
+        with self.lock:
+            item = self.drawing_events.stats()
+            item["name"] = self.name
+            item["members"] = len(self.members)
+            item["chat_lines"] = len(self.chat_history)
+            item["room_seq"] = self.seq
+            item["event_seq"] = self.event_seq
+            item["replay_events"] = len(self.replay)
+            item["throttle"] = self.throttle.stats()
+            if self.journal:
+                item["journal"] = self.journal.stats()
+        return item
+
+
+def journal_path(base, name):
+    """방의 저널 디렉터리 (기본 방은 base 그대로 사용)"""
+    if name == DEFAULT_ROOM:
+        return base
+    return os.path.join(base, "rooms", name)
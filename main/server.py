@@ -1,123 +1,1153 @@
 import socket
 import threading
-import tkinter as tk
+import selectors
+import select
 import json
-from tkinter import scrolledtext
-from network_utils import get_netstat_info
+import signal
+from collections import deque
+from outbound import (
+    OutboundQueue,
+    SLOW_CLIENT_POLICIES,
+    send_buffers,
+    remaining_buffers,
+)
+import protocol
+from journal import FSYNC_POLICIES
+from room import Room, DEFAULT_ROOM, valid_room_name, journal_path
+from metrics import ConnectionStats, MetricsServer, sample_socket
+from instrument import Instrumentation, Profiler
+from throttle import DrawLimits
+from registry import ClientRegistry
 import time  # 추가
 
 
+# 서버 동작 방식
+# - "thread": 클라이언트마다 수신 스레드를 하나씩 생성 (기존 방식)
+# - "selector": selectors(epoll/kqueue) 기반 단일 스레드 이벤트 루프
+SERVER_MODES = ("thread", "selector")
+
+
 class ChatServer:
-    def __init__(self, host="0.0.0.0", port=9000):
+    def __init__(
+        self,
+        host="0.0.0.0",
+        port=9000,
+        mode="thread",
+        queue_max_bytes=1 << 20,
+        queue_max_messages=10000,
+        slow_client_policy="drop_oldest",
+        batch_writes=True,
+        allow_binary=True,
+        history_max_points=500000,
+        snapshot_every=500,
+        hello_timeout=0.5,
+        journal_dir=None,
+        checkpoint_every=5000,
+        fsync_policy="interval",
+        chat_history_size=200,
+        reuse_port=False,
+        worker_id=0,
+        workers=1,
+        backplane=None,
+        recv_size=65536,
+        metrics_port=None,
+        metrics_interval=5.0,
+        instrument=False,
+        trace_every=1000,
+        profile=None,
+        profile_out=None,
+        draw_limits=None,
+        room_limits=None,
+        replay_window=2000,
+        compression=protocol.COMPRESSION_METHODS,
+        compress_min=512,
+    ):
+        if mode not in SERVER_MODES:
+            raise ValueError(f"지원하지 않는 서버 모드: {mode}")
+        if slow_client_policy not in SLOW_CLIENT_POLICIES:
+            raise ValueError(f"지원하지 않는 정책: {slow_client_policy}")
         self.host = host
         self.port = port
-        self.clients = []
-        self.client_names = {}
+        self.mode = mode
+        # 접속한 소켓과 사용자 이름 (copy-on-write, 순회할 때는 clients.snapshot())
+        self.clients = ClientRegistry()
+        # 브로드캐스트 중 전송에 실패한 연결은 바로 정리하지 않고 모았다가
+        # 바깥 호출에서 차례로 정리 (remove_clients, 스레드마다 따로)
+        self.removal = threading.local()
         self.server_socket = None
-        self.gui = None
+        # 서버 이벤트를 받을 observer 목록. observer(kind, value)는 네트워크 스레드에서
+        # 호출되므로 바로 반환해야 하며 GUI 위젯을 직접 건드리면 안 됨
+        # (GUI는 server_gui.EventQueue에 쌓인 이벤트를 after()로 꺼내서 반영)
+        # - "log": 로그 한 줄
+        # - "clients": 현재 클라이언트 수
+        # - "netstat": 포트 상태가 바뀜 (접속/퇴장/시작/중지)
+        self.observers = []
         self.running = False
         self.user_count = 0
-        self.drawing_events = []  # 모든 드로잉 이벤트 저장
+        # 방(캔버스)마다 멤버, 드로잉 히스토리, 저널을 따로 관리
+        # (클라이언트는 {"type": "join", "room": 이름} / {"type": "leave"}로 이동)
+        self.history_max_points = history_max_points
+        self.snapshot_every = snapshot_every
+        self.chat_history_size = chat_history_size
+        # 보낸 사람별 드로잉 이벤트 제한과 move 합치기 (throttle.DrawLimits).
+        # room_limits에 없는 방은 draw_limits를 사용 (기본값은 제한/합치기 없음)
+        self.draw_limits = draw_limits or DrawLimits()
+        self.room_limits = dict(room_limits or {})  # 방 이름 -> DrawLimits
+        self.draw_flusher = None
+        # 방마다 재접속한 클라이언트에게 다시 보낼 수 있는 최근 이벤트 수 (넘으면 전체 히스토리)
+        self.replay_window = replay_window
+        self.rooms = {}  # 이름 -> Room
+        self.client_rooms = {}  # 소켓 -> 현재 Room
+        self.rooms_lock = threading.Lock()
+        # 히스토리를 아직 받지 못한 클라이언트 -> 전송 기한
+        # (hello 응답 또는 첫 메시지가 오면 협상한 형식으로, 기한이 지나면 기존 형식으로 전송)
+        self.hello_timeout = hello_timeout
+        self.sync_pending = {}
+        # 디스크 저널 (journal_dir가 있으면 방마다 기록하고 재시작 시 복구)
+        self.journal_dir = journal_dir
+        self.checkpoint_every = checkpoint_every  # 이 개수의 드로잉 레코드마다 체크포인트
+        self.fsync_policy = fsync_policy
+        # 멀티 프로세스 모드: 같은 포트를 SO_REUSEPORT로 공유하는 워커 중 하나
+        self.reuse_port = reuse_port
+        self.worker_id = worker_id
+        self.workers = workers
+        # 여러 노드(워커/서버)가 방 이벤트를 공유할 backplane (backplane.py).
+        # 있으면 방 이벤트를 backplane에 publish하고, backplane이 방마다 시퀀스 번호를
+        # 붙여 돌려준 순서대로 적용해서 로컬 클라이언트에게만 전달
+        self.backplane = backplane
+        # 클라이언트별 송신 큐 설정
+        self.queue_max_bytes = queue_max_bytes
+        self.queue_max_messages = queue_max_messages
+        self.slow_client_policy = slow_client_policy
+        self.outbound = {}  # 소켓 -> OutboundQueue
+        # True면 쌓인 메시지를 sendmsg 한 번으로 모아서 전송,
+        # False면 메시지마다 send 한 번 (비교용)
+        self.batch_writes = batch_writes
+        self.max_frames_per_write = 512 if batch_writes else 1
+        # 드로잉 이벤트 전송 형식 (hello로 협상, 응답이 없으면 "legacy")
+        self.allow_binary = allow_binary
+        self.client_formats = {}  # 소켓 -> "legacy" | "json" | "binary"
+        # hello로 "resume"을 알린 클라이언트 (방 이벤트마다 시퀀스 번호를 붙여 전송)
+        self.resumable = set()
+        self.decoders = {}  # 소켓 -> 수신용 protocol.DeltaDecoder
+        # hello로 협상하는 연결별 스트림 압축 방식 (우선순위 순, 비어 있으면 압축 안 함).
+        # 송신 큐에서 한 번에 꺼낸 메시지가 compress_min 바이트 이상일 때만 압축하므로
+        # 히스토리 재전송과 밀린 메시지는 압축하고, 하나씩 나가는 실시간 이벤트는 그대로 보냄
+        self.compression = tuple(compression or ())
+        self.compress_min = compress_min
+        self.recv_size = recv_size  # recv_into 한 번에 읽을 최대 바이트 수
+        # 연결별 수신 통계와 주기적으로 조회하는 커널 소켓 상태 (connection_stats)
+        self.connections = {}  # 소켓 -> metrics.ConnectionStats
+        self.metrics_interval = metrics_interval  # 커널 소켓 상태 조회 간격(초, 0이면 안 함)
+        self.sampler_stop = threading.Event()
+        # metrics_port가 있으면 127.0.0.1:metrics_port에서 /metrics, /stats 제공
+        self.metrics_port = metrics_port
+        self.metrics_server = None
+        # 처리 단계별 시간/이벤트 종류별 개수/샘플링 추적 (instrument.py, 꺼져 있으면 None)
+        self.instrument = Instrumentation(trace_every) if instrument else None
+        # 서버 스레드 프로파일링 ("cprofile" | "sample"). dump_profile()로 profile_out에 저장
+        self.profiler = None
+        if profile:
+            self.profiler = Profiler(profile, profile_out)
+        # selector 모드 전용 상태
+        self.selector = None
+        self.loop_thread_id = None
+        self.recv_buffers = {}  # 소켓 -> protocol.Framer (미완성 수신 데이터)
+        self.writing = set()  # 쓰기 이벤트를 기다리는 소켓
+        self.dirty = set()  # 이번 루프에서 새 메시지가 쌓인 소켓
+        # 다른 스레드(워커 버스 등)에서 메시지를 쌓은 소켓. waker로 루프를 깨워서 전송
+        self.wake_lock = threading.Lock()
+        self.wake_pending = set()
+        self.waker = None  # (루프가 읽는 소켓, 다른 스레드가 쓰는 소켓)
 
     def accept_clients(self):
         while self.running:
             try:
                 client_socket, addr = self.server_socket.accept()
-                self.clients.append(client_socket)
-                self.user_count += 1
-                username = f"User{self.user_count}"
-                self.client_names[client_socket] = username
-
-                self.log_message(f"{username} 접속: {addr}")
-                # 새로운 사용자 접속을 모든 클라이언트에게 알림
-                self.broadcast_message(f"### {username} 접속 ###")
+                self.add_client(client_socket, addr)
                 threading.Thread(
-                    target=self.handle_client, args=(client_socket,), daemon=True
+                    target=self.thread_target(self.handle_client),
+                    args=(client_socket,),
+                    daemon=True,
                 ).start()
-                self.update_client_count()
-                self.refresh_netstat()
-                # 새 클라이언트에게 현재까지의 그리기 데이터 전송
-                if self.drawing_events:
-                    try:
-                        for event in self.drawing_events:
-                            message = json.dumps(event) + "\n"
-                            client_socket.sendall(message.encode("utf-8"))
-                    except:
-                        pass
             except:
                 break
 
-    def handle_client(self, client_socket):
-        username = self.client_names.get(client_socket, "Unknown")
+    def add_client(self, client_socket, addr):
+        queue = OutboundQueue(
+            self.queue_max_bytes, self.queue_max_messages, self.slow_client_policy
+        )
+        self.outbound[client_socket] = queue
+        self.connections[client_socket] = ConnectionStats()
+        self.user_count += 1
+        # 워커가 여러 개면 워커 번호로 구분해서 전체에서 겹치지 않는 이름 사용
+        username = f"User{self.user_count * self.workers + self.worker_id}"
+        # 송신 스레드가 전송에 실패해서 정리할 때 목록에 있도록 먼저 등록
+        self.clients.add(client_socket, username)
+        if self.mode == "thread":
+            threading.Thread(
+                target=self.thread_target(self.write_client),
+                args=(client_socket, queue),
+                daemon=True,
+            ).start()
+
+        self.log_message(f"{username} 접속: {addr}")
+        # 처음에는 기본 방에 입장. 재접속한 클라이언트는 hello의 resume으로 다른 방을
+        # 고를 수 있으므로 멤버 추가와 접속 알림은 히스토리를 보낼 때(sync_history) 함
+        self.client_rooms[client_socket] = self.get_room(DEFAULT_ROOM)
+        self.update_client_count()
+        self.refresh_netstat()
+        # 현재까지의 그리기 데이터는 접속 처리와 분리해서 나중에 한 번에 전송
+        self.sync_pending[client_socket] = time.time() + self.hello_timeout
+
+    def sync_history(self, client_socket, resume=None):
+        """
+        현재 방의 스냅샷 + tail을 클라이언트가 협상한 형식의 bytes 하나로 전송.
+        재접속한 클라이언트(resume)는 마지막으로 받은 번호 이후의 이벤트만 보내고,
+        replay에 남아 있지 않으면 캔버스를 지운 뒤 전체 히스토리를 보냄.
+        같은 lock 안에서 방의 멤버로 추가하므로 스냅샷 이후의 이벤트부터 받고,
+        그 뒤에 방에 접속을 알림
+        """
+        room = self.client_rooms.get(client_socket)
+        if room is None:
+            self.sync_pending.pop(client_socket, None)
+            return
+        with room.lock:
+            if self.sync_pending.pop(client_socket, None) is None:
+                return
+            room.add_member(client_socket)
+            fmt = self.client_formats.get(client_socket, "legacy")
+            if client_socket not in self.resumable:
+                data = room.drawing_events.replay_frames(fmt) if room.drawing_events else b""
+            else:
+                events = room.events_since(resume) if resume else None
+                if events is not None:
+                    data = self.encode_replay(fmt, events)
+                elif resume:
+                    data = protocol.encode_for(fmt, {"type": "clear"})
+                    data += room.drawing_events.replay_frames(fmt)
+                else:
+                    data = room.drawing_events.replay_frames(fmt)
+                data += self.room_marker(room)
+        if data:
+            try:
+                self.send_to(client_socket, data, force=True)
+            except:
+                self.remove_client(client_socket)
+                return
+        # 새로운 사용자 접속을 같은 방의 클라이언트에게 알림
+        self.announce(room, f"### {self.clients.name(client_socket)} 접속 ###")
 
-        buffer = ""
+    def expire_pending_syncs(self):
+        now = time.time()
+        for c, deadline in list(self.sync_pending.items()):
+            if deadline <= now:
+                self.sync_history(c)
+
+    def handle_client(self, client_socket):
+        framer = protocol.Framer(self.recv_size)
+        stats = self.connections.get(client_socket) or ConnectionStats()
+        # hello 응답이 없는 기존 클라이언트는 기한이 지나면 히스토리 전송
+        try:
+            ready, _, _ = select.select([client_socket], [], [], self.hello_timeout)
+        except (OSError, ValueError):
+            # 송신 스레드가 전송 실패로 이미 연결을 정리함 (닫힌 소켓)
+            self.remove_client(client_socket)
+            return
+        if not ready:
+            self.sync_history(client_socket)
         while self.running:
             try:
-                data = client_socket.recv(1024)
-                if not data:
+                count = framer.recv_from(client_socket)
+                if not count:
                     break
-                buffer += data.decode("utf-8")
-                while "\n" in buffer:
-                    line, buffer = buffer.split("\n", 1)
-                    if not line.strip():
-                        continue
-                    try:
-                        # JSON 메시지 파싱 시도
-                        message = json.loads(line)
-                        if isinstance(message, dict) and "type" in message:
-                            if message["type"] in ["draw", "clear"]:
-                                # 드로잉 이벤트 저장 및 브로드캐스트
-                                if message["type"] == "clear":
-                                    self.drawing_events.clear()
-                                else:
-                                    self.drawing_events.append(message)
-                                self.broadcast_message(line, exclude=None)
-                                continue
-                    except json.JSONDecodeError:
-                        pass
-                    # 일반 채팅 메시지 처리
-                    message = line
-                    send_msg = f"[{username}] {message}"
-                    self.broadcast_message(send_msg, exclude=client_socket)
-                    self.log_message(send_msg)
+                frames = framer.pop_frames()
+                stats.received(count, len(frames))
+                for frame in frames:
+                    self.process_frame(client_socket, frame)
             except:
                 break
         self.remove_client(client_socket)
 
-    def broadcast_message(self, message, exclude=None):
+    def write_client(self, client_socket, queue):
+        """
+        thread 모드의 클라이언트별 송신 스레드.
+        큐에 쌓인 메시지들을 sendmsg(writev) 한 번으로 모아서 전송
+        """
+        while True:
+            buffers = queue.wait_take(max_frames=self.max_frames_per_write)
+            if buffers is None:
+                break
+            size = sum(len(buf) for buf in buffers)
+            calls = 0
+            inst = self.instrument
+            try:
+                while buffers:
+                    if inst:
+                        started = time.perf_counter()
+                    sent = send_buffers(client_socket, buffers)
+                    if inst:
+                        inst.observe("send", time.perf_counter() - started)
+                    calls += 1
+                    buffers = remaining_buffers(buffers, sent)
+                queue.mark_sent(size, calls)
+            except:
+                self.remove_client(client_socket)
+                break
+
+    def process_frame(self, client_socket, frame):
+        """
+        수신한 프레임(텍스트 줄 또는 바이너리 레코드)을 처리.
+        계측이 켜져 있으면 전체 처리 시간(route)을 기록하고 일부 프레임은 단계별로 추적
+        """
+        inst = self.instrument
+        if inst is None:
+            self.dispatch_frame(client_socket, frame)
+            return
+        trace = inst.begin_trace()
+        started = time.perf_counter()
+        try:
+            self.dispatch_frame(client_socket, frame)
+        finally:
+            inst.observe("route", time.perf_counter() - started)
+            inst.end_trace(trace)
+
+    def dispatch_frame(self, client_socket, frame):
+        """프레임 종류에 따라 처리. 드로잉 이벤트는 다시 직렬화하지 않고 받은 bytes를 그대로 전달"""
+        inst = self.instrument
+        if protocol.is_binary(frame):
+            self.sync_history(client_socket)
+            decoder = self.decoders.get(client_socket)
+            if inst:
+                started = time.perf_counter()
+            event = decoder.decode(frame) if decoder else None
+            if inst:
+                inst.observe("parse", time.perf_counter() - started)
+                inst.count(
+                    f"binary:{event.get('action') or event.get('type')}"
+                    if event
+                    else "binary:invalid"
+                )
+                inst.mark("parse")
+            if event is not None and not protocol.valid_draw_event(event):
+                # JSON 경로와 같이 히스토리/다른 노드에 넘기기 전에 버림
+                if inst:
+                    inst.count("draw:invalid")
+                return
+            if event is not None and event["type"] in ("draw", "clear"):
+                # delta 레코드는 보낸 사람 기준이므로 절대 좌표로 다시 인코딩
+                absolute = frame[2] != protocol.REC_DELTA
+                self.relay_draw_event(
+                    client_socket, event, {"binary": frame} if absolute else {}
+                )
+            return
+        try:
+            line = frame.decode("utf-8").rstrip("\n")
+        except UnicodeDecodeError:
+            return
+        if not line.strip():
+            return
+        if inst:
+            started = time.perf_counter()
+        try:
+            # JSON 메시지 파싱 시도
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            message = None
+        if inst:
+            inst.observe("parse", time.perf_counter() - started)
+            inst.mark("parse")
+        if isinstance(message, dict) and "type" in message:
+            if inst:
+                kind = message["type"]
+                if kind == "draw":
+                    kind = f"draw:{message.get('action')}"
+                inst.count(kind)
+            if message["type"] in ["draw", "clear"]:
+                self.sync_history(client_socket)
+                if not protocol.valid_draw_event(message):
+                    # 좌표가 없거나 잘못된 이벤트는 히스토리/다른 노드에 넘기기 전에 버림
+                    if inst:
+                        inst.count("draw:invalid")
+                    return
+                frames = {"json": frame}
+                if message.get("action") != "segment":
+                    frames["legacy"] = frame
+                self.relay_draw_event(client_socket, message, frames)
+                return
+            if message["type"] == "hello":
+                self.handle_hello(client_socket, message)
+                return
+            if message["type"] in ("join", "leave"):
+                self.sync_history(client_socket)
+                name = message.get("room") if message["type"] == "join" else None
+                self.join_room(client_socket, name or DEFAULT_ROOM)
+                return
+        elif inst:
+            inst.count("chat")
+        self.sync_history(client_socket)
+        room = self.client_rooms.get(client_socket)
+        if room is None:
+            return
+        # 일반 채팅 메시지 처리 (같은 방에만 전달)
+        username = self.clients.name(client_socket)
+        send_msg = f"[{username}] {line}"
+        if self.backplane:
+            self.backplane.publish(
+                room.name, {"k": "chat", "u": username, "m": send_msg}
+            )
+        else:
+            if inst:
+                started = time.perf_counter()
+            seq = room.record_chat(send_msg)
+            if inst:
+                inst.observe("history", time.perf_counter() - started)
+                inst.mark("history")
+            self.broadcast_message(send_msg, exclude=client_socket, room=room, seq=seq)
+        self.log_message(send_msg)
+
+    def handle_hello(self, client_socket, message):
+        """
+        클라이언트가 먼저 보낸 hello로 드로잉 이벤트 전송 형식을 정하고, 고른 형식/기능을
+        hello로 답함 (hello를 보내지 않는 기존 클라이언트에게는 hello 줄을 보내지 않음).
+        재접속한 클라이언트가 resume({"room", "seq", "epoch"})을 보내면 그 방으로 옮긴 뒤
+        빠진 이벤트만 전송
+        """
+        fmt = protocol.negotiate_format(message)
+        if fmt == "binary" and not self.allow_binary:
+            fmt = "json"
+        self.client_formats[client_socket] = fmt
+        if fmt == "binary":
+            self.decoders[client_socket] = protocol.DeltaDecoder()
+        method = protocol.negotiate_compression(self.compression, message)
+        reply = protocol.hello_message(
+            proto=(protocol.PROTO_BINARY,) if fmt == "binary" else (),
+            features=(protocol.FEATURE_SEGMENT, protocol.FEATURE_RESUME)
+            + ((method,) if method else ()),
+        )
+        try:
+            self.send_to(client_socket, (reply + "\n").encode("utf-8"), force=True)
+        except:
+            self.remove_client(client_socket)
+            return
+        queue = self.outbound.get(client_socket)
+        if method and queue is not None:
+            # 응답 hello까지는 그대로 보내고, 히스토리부터 압축
+            queue.set_compressor(protocol.StreamCompressor(method), self.compress_min)
+        resume = None
+        if protocol.FEATURE_RESUME in (message.get("features") or []):
+            self.resumable.add(client_socket)
+            resume = message.get("resume")
+            if not isinstance(resume, dict):
+                resume = None
+            elif client_socket in self.sync_pending:
+                name = resume.get("room")
+                room = self.client_rooms.get(client_socket)
+                if valid_room_name(name) and room is not None and room.name != name:
+                    # 아직 히스토리를 받기 전이라 join_room은 방만 바꾸고 안내 줄만 보냄
+                    # (기본 방에는 들어가거나 접속을 알리지 않음)
+                    self.join_room(client_socket, name)
+        self.sync_history(client_socket, resume)
+
+    def encode_replay(self, fmt, events):
+        """Room.events_since 결과를 시퀀스 번호를 붙인 프레임으로 인코딩"""
+        parts = []
+        for seq, event in events:
+            if isinstance(event, str):
+                parts.append((event + "\n").encode("utf-8"))
+            else:
+                parts.append(protocol.encode_for(fmt, event))
+            parts.append(protocol.encode_seq(fmt, seq))
+        return b"".join(parts)
+
+    def room_marker(self, room):
+        """방의 현재 번호와 epoch를 알리는 줄 (resume 클라이언트가 이어 받을 기준)"""
+        return protocol.seq_message(room.event_seq, room.name, room.epoch).encode("utf-8")
+
+    def relay_draw_event(self, client_socket, message, frames):
+        """
+        드로잉 이벤트를 방의 제한/합치기(room.throttle)를 거쳐 기록하고 전달.
+        frames에는 받은 형식의 원본 프레임을 담아서 넘긴다 (다시 직렬화하지 않음)
+        """
+        room = self.client_rooms.get(client_socket)
+        if room is None:
+            return
+        with room.lock:
+            for sender, event in room.throttle.submit(client_socket, message):
+                self.emit_draw(room, sender, event, frames if event is message else {})
+
+    def emit_draw(self, room, client_socket, message, frames):
+        """드로잉 이벤트를 방의 히스토리에 저장하고 같은 방에 브로드캐스트 (room.lock 안에서 호출)"""
+        username = self.clients.name(client_socket)
+        # move/segment 이벤트는 느린 클라이언트 큐에서 버리거나 합칠 수 있음
+        droppable = message.get("action") in ("move", "segment")
+        if self.backplane:
+            self.backplane.publish(
+                room.name, {"k": "draw", "u": username, "m": message}, droppable
+            )
+            return
+        inst = self.instrument
+        if inst:
+            started = time.perf_counter()
+        seq = room.record_draw(message, client_socket, username)
+        if inst:
+            inst.observe("history", time.perf_counter() - started)
+            inst.mark("history")
+        self.broadcast_event(
+            room, message, frames, sender=client_socket, droppable=droppable, seq=seq
+        )
+
+    def flush_draws(self):
+        """합치는 중인 move 좌표 중 기한이 지난 것을 내보냄 (coalesce 타이머 스레드)"""
+        with self.rooms_lock:
+            rooms = list(self.rooms.values())
+        for room in rooms:
+            if room.throttle.next_deadline is None:
+                continue
+            with room.lock:
+                for sender, event in room.throttle.expire():
+                    self.emit_draw(room, sender, event, {})
+
+    def run_draw_flusher(self):
+        # 가장 빠른 기한까지 (최대 10ms) 기다렸다가 내보냄
+        while self.running:
+            with self.rooms_lock:
+                deadlines = [
+                    room.throttle.next_deadline
+                    for room in self.rooms.values()
+                    if room.throttle.next_deadline is not None
+                ]
+            delay = min(deadlines) - time.monotonic() if deadlines else 0.01
+            time.sleep(min(max(delay, 0.001), 0.01))
+            self.flush_draws()
+
+    def start_draw_flusher(self):
+        """합치기를 쓰는 방이 있으면 타이머 스레드 시작 (이미 실행 중이면 그대로)"""
+        coalescing = self.draw_limits.coalesce_ms or any(
+            limits.coalesce_ms for limits in self.room_limits.values()
+        )
+        if self.running and coalescing and self.draw_flusher is None:
+            self.draw_flusher = threading.Thread(target=self.run_draw_flusher, daemon=True)
+            self.draw_flusher.start()
+
+    def set_room_limits(self, name, limits):
+        """방의 드로잉 제한/합치기 설정을 바꿈 (None이면 서버 기본값으로)"""
+        if limits is None:
+            self.room_limits.pop(name, None)
+        else:
+            self.room_limits[name] = limits
+        room = self.rooms.get(name)
+        if room is not None:
+            with room.lock:
+                for sender, event in room.throttle.flush_all():
+                    self.emit_draw(room, sender, event, {})
+                room.throttle.set_limits(self.room_limits.get(name, self.draw_limits))
+        self.start_draw_flusher()
+
+    def on_room_event(self, name, seq, message):
+        """
+        backplane이 순서를 정해 보낸 방 이벤트를 적용하고 이 노드의 멤버에게 전달.
+        seq가 이어지지 않으면(빠진 이벤트) 스냅샷을 다시 요청
+        """
+        room = self.rooms.get(name)
+        if room is None:
+            return
+        with room.lock:
+            if seq <= room.seq:
+                return  # 이미 스냅샷에 포함된 이벤트
+            if seq != room.seq + 1:
+                if not room.resyncing:
+                    room.resyncing = True
+                    self.backplane.resync(name)
+                return
+            room.seq = seq
+            kind = message["k"]
+            inst = self.instrument
+            if inst:
+                inst.count(f"room:{kind}")
+                started = time.perf_counter()
+            if kind == "draw":
+                event = message["m"]
+                event_seq = room.record_draw(event, message["u"], message["u"])
+                if inst:
+                    inst.observe("history", time.perf_counter() - started)
+                self.broadcast_event(
+                    room,
+                    event,
+                    {},
+                    sender=message["u"],
+                    droppable=event.get("action") in ("move", "segment"),
+                    seq=event_seq,
+                )
+            elif kind == "chat":
+                event_seq = room.record_chat(message["m"])
+                if inst:
+                    inst.observe("history", time.perf_counter() - started)
+                exclude = self.clients.socket(message["u"])
+                self.broadcast_message(message["m"], exclude=exclude, room=room, seq=event_seq)
+            elif kind == "notice":
+                exclude = self.clients.socket(message.get("x"))
+                self.broadcast_message(message["m"], exclude=exclude, room=room)
+            elif kind == "finish":
+                room.finish_sender(message["u"])
+
+    def on_room_snapshot(self, name, snapshot):
+        """backplane의 방 스냅샷으로 방 상태를 바꾸고, 이미 있는 멤버의 캔버스도 다시 전송"""
+        room = self.rooms.get(name)
+        if room is None:
+            return
+        failed = []
+        with room.lock:
+            room.apply_snapshot(snapshot)
+            for c in room.members:
+                if c in self.sync_pending:
+                    continue
+                fmt = self.client_formats.get(c, "legacy")
+                data = protocol.encode_for(fmt, {"type": "clear"})
+                data += room.drawing_events.replay_frames(fmt)
+                if c in self.resumable:
+                    data += self.room_marker(room)
+                try:
+                    self.send_to(c, data, force=True)
+                except:
+                    failed.append(c)
+        if failed:
+            self.remove_clients(failed)
+
+    def announce(self, room, text, exclude=None):
+        """접속/퇴장 알림을 방의 멤버(다른 노드 포함)에게 전달"""
+        if self.backplane:
+            self.backplane.publish(
+                room.name,
+                {"k": "notice", "m": text, "x": self.clients.name(exclude, None)},
+            )
+        else:
+            self.broadcast_message(text, exclude=exclude, room=room)
+
+    def leave_room(self, client_socket, room, username):
+        """방의 멤버 목록에서 빼고 진행 중이던 획을 끝냄"""
+        with room.lock:
+            room.remove_member(client_socket)
+            # 합치는 중이던 좌표는 획을 끝내기 전에 기록
+            for sender, event in room.throttle.forget(client_socket):
+                self.emit_draw(room, sender, event, {})
+        if self.backplane:
+            self.backplane.publish(room.name, {"k": "finish", "u": username})
+        else:
+            room.finish_sender(client_socket)
+
+    def get_room(self, name):
+        """이름에 해당하는 방을 반환 (없으면 만들고, 저널이 있으면 복구)"""
+        with self.rooms_lock:
+            room = self.rooms.get(name)
+            if room is None:
+                room = Room(
+                    name,
+                    history_max_points=self.history_max_points,
+                    snapshot_every=self.snapshot_every,
+                    chat_history_size=self.chat_history_size,
+                    checkpoint_every=self.checkpoint_every,
+                    draw_limits=self.room_limits.get(name, self.draw_limits),
+                    replay_window=self.replay_window,
+                )
+                if self.journal_dir:
+                    stats = room.open_journal(
+                        journal_path(self.journal_dir, name), self.fsync_policy
+                    )
+                    self.log_message(
+                        f"[{name}] 저널 복구: 획 {stats['strokes']}개, "
+                        f"레코드 {stats['records']}개, 채팅 {stats['chat_lines']}줄 "
+                        f"({stats['total_seconds']:.3f}초)"
+                    )
+                self.rooms[name] = room
+                created = True
+            else:
+                created = False
+        if created and self.backplane:
+            # 다른 노드에서 쌓인 방 상태를 스냅샷으로 받은 뒤 이후 이벤트를 이어서 받음
+            self.backplane.subscribe(name)
+        return room
+
+    def join_room(self, client_socket, name):
+        """클라이언트를 다른 방으로 옮기고 새 방의 캔버스(clear + 스냅샷 + tail)를 전송"""
+        old = self.client_rooms.get(client_socket)
+        if old is None:
+            return
+        if not valid_room_name(name):
+            self.send_notice(client_socket, f"### 잘못된 방 이름: {name} ###")
+            return
+        if old.name == name:
+            self.send_notice(client_socket, f"### 이미 {name} 방에 있습니다 ###")
+            return
+        username = self.clients.name(client_socket)
+        room = self.get_room(name)
+        if client_socket in self.sync_pending:
+            # 아직 이전 방에 들어가지 않았으므로 (재접속한 클라이언트의 resume)
+            # 방만 바꾸고 멤버 추가와 접속 알림은 sync_history에 맡김
+            self.client_rooms[client_socket] = room
+            self.send_notice(
+                client_socket, f"### {name} 방 입장 (현재 {len(room.members) + 1}명) ###"
+            )
+            self.log_message(f"{username}: {name} 방으로 재접속")
+            return
+        self.leave_room(client_socket, old, username)
+        self.announce(old, f"### {username} 퇴장 ###")
+        with room.lock:
+            self.client_rooms[client_socket] = room
+            room.add_member(client_socket)
+            data = f"### {name} 방 입장 (현재 {len(room.members)}명) ###\n".encode("utf-8")
+            if client_socket not in self.sync_pending:
+                # 히스토리를 이미 받은 클라이언트는 이전 방의 그림을 지우고 새 방 것을 받음
+                fmt = self.client_formats.get(client_socket, "legacy")
+                data += protocol.encode_for(fmt, {"type": "clear"})
+                data += room.drawing_events.replay_frames(fmt)
+                if client_socket in self.resumable:
+                    data += self.room_marker(room)
+            try:
+                self.send_to(client_socket, data, force=True)
+            except:
+                self.remove_client(client_socket)
+                return
+        self.announce(room, f"### {username} 접속 ###", exclude=client_socket)
+        self.log_message(f"{username}: {old.name} -> {name} 방 이동")
+
+    def send_notice(self, client_socket, text):
+        try:
+            self.send_to(client_socket, (text + "\n").encode("utf-8"))
+        except:
+            self.remove_client(client_socket)
+
+    def broadcast_event(
+        self, room, message, frames, exclude=None, sender=None, droppable=False, seq=None
+    ):
+        """
+        드로잉 이벤트를 방의 각 멤버가 협상한 형식으로 전송.
+        형식마다 최대 한 번만 인코딩하고 같은 bytes를 모든 큐가 공유
+        (resume 클라이언트에게는 방 이벤트 번호를 붙인 bytes를 형식마다 한 번 만들어 공유)
+        """
+        inst = self.instrument
+        if inst:
+            started = time.perf_counter()
+        members = room.members  # 바뀌지 않는 튜플이라 복사하지 않고 순회
+        failed = None
+        unencodable = None  # 인코딩에 실패한 형식 (멤버마다 다시 시도하지 않음)
+        for c in members:
+            if c == exclude or c in self.sync_pending:
+                continue  # 히스토리 전송 전이면 이 이벤트도 히스토리에 포함되어 전송됨
+            fmt = self.client_formats.get(c, "legacy")
+            key = (fmt, seq) if seq is not None and c in self.resumable else fmt
+            try:
+                data = frames.get(key)
+                if data is None:
+                    if unencodable and fmt in unencodable:
+                        continue
+                    data = frames.get(fmt)
+                    if data is None:
+                        data = frames[fmt] = protocol.encode_for(fmt, message)
+                    if key is not fmt:
+                        data = frames[key] = data + protocol.encode_seq(fmt, seq)
+            except Exception as e:
+                # 이벤트를 이 형식으로 표현할 수 없음 (예: int16 범위를 넘는 좌표):
+                # 연결 문제가 아니므로 끊지 않고 이 형식의 멤버에게만 이벤트를 건너뜀
+                if unencodable is None:
+                    unencodable = set()
+                unencodable.add(fmt)
+                if inst:
+                    inst.count("broadcast:encode_error")
+                self.log_message(f"{fmt} 형식으로 인코딩할 수 없는 이벤트를 건너뜀: {e!r}")
+                continue
+            try:
+                self.send_to(c, data, sender, droppable)
+            except:
+                if failed is None:
+                    failed = []
+                failed.append(c)
+        if inst:
+            inst.observe("broadcast", time.perf_counter() - started)
+            inst.mark("broadcast", members=len(members))
+        if failed:
+            self.remove_clients(failed)
+
+    def broadcast_message(
+        self, message, exclude=None, sender=None, droppable=False, room=None, seq=None
+    ):
         message += "\n"  # 메시지 구분을 위한 개행 추가
-        encoded_message = message.encode("utf-8")
-        for c in self.clients[:]:
-            if c != exclude:
+        self.broadcast_frame(
+            message.encode("utf-8"), exclude, sender, droppable, room, seq
+        )
+
+    def broadcast_frame(
+        self, frame, exclude=None, sender=None, droppable=False, room=None, seq=None
+    ):
+        """
+        한 번 인코딩된 프레임(bytes)을 방의 멤버(room이 None이면 모든 클라이언트)
+        큐에 공유해서 넣음. seq가 있으면 방 이벤트(채팅)이므로 resume 클라이언트에게는
+        번호를 붙여 보내고, 제외된 보낸 사람에게도 번호만 보냄
+        """
+        inst = self.instrument
+        if inst:
+            started = time.perf_counter()
+        targets = room.members if room else self.clients.snapshot()
+        failed = None
+        numbered = {}  # (형식, 보낸 사람인지) -> 번호를 붙인 프레임
+        for c in targets:
+            data = frame
+            if seq is not None and c in self.resumable:
+                if c in self.sync_pending:
+                    continue  # 히스토리와 함께 받음
+                key = (self.client_formats.get(c, "legacy"), c == exclude)
+                data = numbered.get(key)
+                if data is None:
+                    data = numbered[key] = (b"" if key[1] else frame) + protocol.encode_seq(
+                        key[0], seq
+                    )
+            elif c == exclude:
+                continue
+            if data:
                 try:
-                    c.sendall(encoded_message)
+                    self.send_to(c, data, sender, droppable)
                 except:
-                    self.remove_client(c)
+                    if failed is None:
+                        failed = []
+                    failed.append(c)
+        if inst:
+            inst.observe("broadcast", time.perf_counter() - started)
+            inst.mark("broadcast", members=len(targets))
+        if failed:
+            self.remove_clients(failed)
+
+    def send_to(self, client_socket, data, sender=None, droppable=False, force=False):
+        """
+        클라이언트의 송신 큐에 메시지를 넣음 (블로킹 전송 없음).
+        큐가 한계치를 넘어 정책상 연결을 끊어야 하면 ConnectionError 발생.
+        """
+        queue = self.outbound.get(client_socket)
+        if queue is None:
+            return
+        if not queue.push(data, sender, droppable, force):
+            raise ConnectionError("송신 큐 한계 초과")
+        if self.mode == "selector" and client_socket not in self.writing:
+            if threading.get_ident() == self.loop_thread_id:
+                # 이벤트 루프 안이라면 이번 루프가 끝날 때 모아서 한 번에 전송
+                self.dirty.add(client_socket)
+            else:
+                self.wake_loop(client_socket)
+
+    def flush_client(self, client_socket):
+        """selector 모드: 보낼 수 있는 만큼 전송하고, 남으면 쓰기 이벤트 등록"""
+        queue = self.outbound.get(client_socket)
+        if queue is None:
+            return
+        buffers = queue.take(max_frames=self.max_frames_per_write)
+        if buffers:
+            inst = self.instrument
+            if inst:
+                started = time.perf_counter()
+            try:
+                sent = send_buffers(client_socket, buffers)
+                if inst:
+                    inst.observe("send", time.perf_counter() - started)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self.remove_client(client_socket)
+                return
+            queue.unsend(remaining_buffers(buffers, sent))
+            queue.mark_sent(sent)
+        if queue.is_empty():
+            if client_socket in self.writing:
+                self.writing.discard(client_socket)
+                self.set_events(client_socket, selectors.EVENT_READ)
+        else:
+            self.wait_writable(client_socket)
+
+    def wake_loop(self, client_socket):
+        """
+        다른 스레드에서 쌓은 메시지를 이벤트 루프가 전송하도록 깨움.
+        writing/selector 상태는 루프 스레드만 바꾸도록 해서 경쟁 조건을 없앰
+        """
+        with self.wake_lock:
+            self.wake_pending.add(client_socket)
+            if len(self.wake_pending) > 1:
+                return  # 이미 깨우는 중
+        try:
+            self.waker[1].send(b"\0")
+        except (BlockingIOError, OSError, TypeError):
+            pass
+
+    def wait_writable(self, client_socket):
+        if client_socket in self.writing or client_socket not in self.outbound:
+            return
+        self.writing.add(client_socket)
+        self.set_events(client_socket, selectors.EVENT_READ | selectors.EVENT_WRITE)
+
+    def set_events(self, client_socket, events):
+        try:
+            self.selector.modify(client_socket, events)
+        except (KeyError, ValueError, OSError):
+            pass  # 이미 닫히거나 등록 해제된 소켓
+
+    def serve_selector(self):
+        """selector 모드의 이벤트 루프 (단일 스레드에서 accept/recv/send 처리)"""
+        self.loop_thread_id = threading.get_ident()
+        while self.running:
+            try:
+                events = self.selector.select(timeout=0.1 if self.sync_pending else 0.5)
+            except (OSError, ValueError):
+                break
+            for key, mask in events:
+                if key.fileobj is self.server_socket:
+                    self.on_acceptable()
+                    continue
+                if key.fileobj is self.waker[0]:
+                    self.on_wake()
+                    continue
+                client_socket = key.fileobj
+                try:
+                    if mask & selectors.EVENT_READ:
+                        self.on_readable(client_socket)
+                    if mask & selectors.EVENT_WRITE:
+                        self.flush_client(client_socket)
+                except Exception as e:
+                    # 한 연결의 처리 오류로 이벤트 루프가 멈추지 않도록 그 연결만 정리
+                    self.log_message(
+                        f"{self.clients.name(client_socket)} 처리 오류로 연결 종료: {e!r}"
+                    )
+                    self.remove_client(client_socket)
+            # 이번 루프 동안 메시지가 쌓인 클라이언트마다 한 번씩만 전송
+            if self.sync_pending:
+                self.expire_pending_syncs()
+            while self.dirty:
+                self.flush_client(self.dirty.pop())
+        self.selector.close()
+        for sock in self.waker:
+            sock.close()
+        self.waker = None
+
+    def on_wake(self):
+        try:
+            while self.waker[0].recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        with self.wake_lock:
+            self.dirty |= self.wake_pending
+            self.wake_pending.clear()
+
+    def on_acceptable(self):
+        try:
+            client_socket, addr = self.server_socket.accept()
+        except (BlockingIOError, OSError):
+            return
+        client_socket.setblocking(False)
+        self.recv_buffers[client_socket] = protocol.Framer(self.recv_size)
+        self.selector.register(client_socket, selectors.EVENT_READ)
+        self.add_client(client_socket, addr)
+
+    def on_readable(self, client_socket):
+        framer = self.recv_buffers.get(client_socket)
+        if framer is None:
+            return
+        try:
+            count = framer.recv_from(client_socket)
+        except BlockingIOError:
+            return
+        except OSError:
+            count = 0
+        if not count:
+            self.remove_client(client_socket)
+            return
+        frames = framer.pop_frames()
+        stats = self.connections.get(client_socket)
+        if stats:
+            stats.received(count, len(frames))
+        for frame in frames:
+            self.process_frame(client_socket, frame)
+            if client_socket not in self.recv_buffers:
+                return  # 처리 중 연결이 제거됨
+
+    def queue_stats(self):
+        """클라이언트별 송신 큐 상태 (밀린 바이트가 많은 순)"""
+        stats = []
+        for c in self.clients.snapshot():
+            queue = self.outbound.get(c)
+            if queue is None:
+                continue
+            item = queue.stats()
+            item["name"] = self.clients.name(c)
+            room = self.client_rooms.get(c)
+            item["room"] = room.name if room else None
+            stats.append(item)
+        stats.sort(key=lambda item: item["bytes"], reverse=True)
+        return stats
+
+    def connection_stats(self):
+        """
+        클라이언트별 송수신 통계: 받은 바이트/프레임, 송신 큐 상태와 보낸 양,
+        마지막 수신/전송 시각, 마지막으로 조회한 TCP_INFO와 소켓 버퍼 상태
+        """
+        stats = []
+        now = time.time()
+        for c in self.clients.snapshot():
+            queue = self.outbound.get(c)
+            conn = self.connections.get(c)
+            if queue is None or conn is None:
+                continue
+            item = queue.stats()
+            item["name"] = self.clients.name(c)
+            room = self.client_rooms.get(c)
+            item["room"] = room.name if room else None
+            item["format"] = self.client_formats.get(c, "legacy")
+            item["connected_seconds"] = round(now - conn.connected_at, 3)
+            item["last_seen"] = conn.last_seen
+            item["bytes_in"] = conn.bytes_in
+            item["frames_in"] = conn.frames_in
+            if conn.sample:
+                item.update(conn.sample)
+            stats.append(item)
+        return stats
+
+    def sample_connections(self):
+        """모든 클라이언트 소켓의 TCP_INFO/소켓 버퍼/커널 큐를 조회해서 저장"""
+        for c in self.clients.snapshot():
+            conn = self.connections.get(c)
+            if conn is not None:
+                conn.sample = sample_socket(c)
+
+    def run_sampler(self):
+        while not self.sampler_stop.wait(self.metrics_interval):
+            self.sample_connections()
+
+    def pipeline_stats(self, traces=True):
+        """처리 단계별 시간 히스토그램, 이벤트 종류별 개수, 최근 추적 (계측이 꺼져 있으면 None)"""
+        if self.instrument is None:
+            return None
+        return self.instrument.stats(traces)
+
+    def thread_target(self, target):
+        """서버 스레드 함수 (프로파일러가 cprofile이면 스레드마다 프로파일링)"""
+        if self.profiler is None:
+            return target
+        return self.profiler.wrap(target)
+
+    def dump_profile(self):
+        """프로파일 결과를 파일로 저장 (SIGUSR1, 서버 중지 시)"""
+        if self.profiler is None:
+            return None
+        path = self.profiler.dump()
+        if path:
+            self.log_message(f"프로파일 저장: {path}")
+        return path
+
+    def room_stats(self):
+        """방별 멤버 수와 드로잉 히스토리 상태 (멤버가 많은 순)"""
+        with self.rooms_lock:
+            rooms = list(self.rooms.values())
+        stats = [room.stats() for room in rooms]
+        stats.sort(key=lambda item: item["members"], reverse=True)
+        return stats
 
     def remove_client(self, client_socket):
-        if client_socket in self.clients:
-            self.clients.remove(client_socket)
-            uname = self.client_names.pop(client_socket, "Unknown")
-            client_socket.close()
-            self.log_message(f"{uname} 퇴장")
-            # 사용자 퇴장을 모든 클라이언트에게 알림
-            self.broadcast_message(f"### {uname} 퇴장 ###")
-            self.update_client_count()
-            self.refresh_netstat()
+        self.remove_clients((client_socket,))
+
+    def remove_clients(self, sockets):
+        """
+        연결들을 정리. 정리 중 퇴장 알림을 보내다 실패한 연결은 재귀 호출하지 않고
+        같은 스레드의 대기 목록에 넣어서 바깥 루프가 이어서 정리
+        """
+        pending = getattr(self.removal, "pending", None)
+        if pending is not None:
+            pending.extend(sockets)
+            return
+        self.removal.pending = pending = deque(sockets)
+        try:
+            while pending:
+                self.close_client(pending.popleft())
+        finally:
+            self.removal.pending = None
+
+    def close_client(self, client_socket):
+        # 목록에서 먼저 뺀 스레드만 정리 (수신/송신 스레드가 동시에 호출해도 한 번만)
+        uname = self.clients.remove(client_socket)
+        if uname is None:
+            return
+        queue = self.outbound.pop(client_socket, None)
+        if queue:
+            queue.close()
+        self.client_formats.pop(client_socket, None)
+        self.resumable.discard(client_socket)
+        # 히스토리를 받기 전이면 아직 방에 들어가지 않았으므로 퇴장 처리/알림도 없음
+        entered = self.sync_pending.pop(client_socket, None) is None
+        room = self.client_rooms.pop(client_socket, None)
+        if room and entered:
+            self.leave_room(client_socket, room, uname)
+        self.decoders.pop(client_socket, None)
+        self.connections.pop(client_socket, None)
+        if self.mode == "selector":
+            self.recv_buffers.pop(client_socket, None)
+            self.writing.discard(client_socket)
+            self.dirty.discard(client_socket)
+            try:
+                self.selector.unregister(client_socket)
+            except (KeyError, ValueError):
+                pass
+        client_socket.close()
+        self.log_message(f"{uname} 퇴장")
+        # 사용자 퇴장을 같은 방의 클라이언트에게 알림
+        if room and entered:
+            self.announce(room, f"### {uname} 퇴장 ###")
+        self.update_client_count()
+        self.refresh_netstat()
 
     def stop_server(self):
-        self.running = False
         # 모든 클라이언트에게 서버 종료 메시지 전송
         self.broadcast_message("### 서버가 종료되었습니다 ###")
+        # 송신 큐에 남은 메시지가 전송될 때까지 잠시 대기
+        deadline = time.time() + 1
+        for queue in list(self.outbound.values()):
+            queue.wait_empty(max(0, deadline - time.time()))
+        self.running = False
 
         # 모든 클라이언트 연결 종료
-        for c in self.clients[:]:
+        for c in self.clients.snapshot():
             try:
                 c.close()
             except:
                 pass
+        for queue in self.outbound.values():
+            queue.close()
         self.clients.clear()
-        self.client_names.clear()
+        self.outbound.clear()
+        self.connections.clear()
+        self.sampler_stop.set()
+        if self.metrics_server:
+            self.metrics_server.close()
+            self.metrics_server = None
+        if self.profiler:
+            self.profiler.stop()
+            self.dump_profile()
+        self.client_formats.clear()
+        self.resumable.clear()
+        self.sync_pending.clear()
+        self.decoders.clear()
+        self.recv_buffers.clear()
+        self.writing.clear()
+        self.dirty.clear()
+        self.wake_pending.clear()
+        self.client_rooms.clear()
+        self.draw_flusher = None
+        with self.rooms_lock:
+            rooms = list(self.rooms.values())
+            if self.journal_dir or self.backplane:
+                self.rooms.clear()  # 다시 시작하면 저널/backplane에서 복구
+        for room in rooms:
+            with room.lock:
+                for sender, event in room.throttle.flush_all():
+                    self.emit_draw(room, sender, event, {})
+            room.members = ()
+            room.close_journal()
+        if self.backplane:
+            self.backplane.close()
 
         # 서버 소켓 종료
         if self.server_socket:
@@ -143,117 +1173,253 @@ class ChatServer:
             try:
                 self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                 self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                if self.reuse_port:
+                    # 같은 포트를 여러 워커 프로세스가 공유 (커널이 연결을 분산)
+                    self.server_socket.setsockopt(
+                        socket.SOL_SOCKET, socket.SO_REUSEPORT, 1
+                    )
                 self.server_socket.bind((self.host, self.port))
                 self.server_socket.listen()
+                if self.metrics_port is not None:
+                    self.metrics_server = MetricsServer(self, port=self.metrics_port)
+                    self.metrics_server.start()
+                if self.backplane:
+                    self.backplane.start(self)
+                if self.journal_dir or self.backplane:
+                    self.get_room(DEFAULT_ROOM)  # 기본 방의 기록은 시작할 때 바로 복구
                 self.running = True
-                self.log_message(f"서버 시작: {self.host}:{self.port}")
-                threading.Thread(target=self.accept_clients, daemon=True).start()
+                self.log_message(
+                    f"서버 시작: {self.host}:{self.port} ({self.mode} 모드)"
+                )
+                if self.metrics_server:
+                    host, port = self.metrics_server.address[:2]
+                    self.log_message(f"메트릭: http://{host}:{port}/metrics")
+                self.start_draw_flusher()
+                if self.profiler:
+                    self.profiler.start()
+                if self.metrics_interval:
+                    self.sampler_stop = threading.Event()
+                    threading.Thread(target=self.run_sampler, daemon=True).start()
+                if self.mode == "selector":
+                    self.server_socket.setblocking(False)
+                    self.selector = selectors.DefaultSelector()
+                    self.selector.register(self.server_socket, selectors.EVENT_READ)
+                    self.waker = socket.socketpair()
+                    for sock in self.waker:
+                        sock.setblocking(False)
+                    self.selector.register(self.waker[0], selectors.EVENT_READ)
+                    threading.Thread(
+                        target=self.thread_target(self.serve_selector), daemon=True
+                    ).start()
+                else:
+                    threading.Thread(
+                        target=self.thread_target(self.accept_clients), daemon=True
+                    ).start()
                 self.refresh_netstat()
                 return True
-            except OSError as e:
+            except (OSError, ValueError) as e:
                 self.log_message(f"서버 시작 실패: {e}")
+                if self.metrics_server:
+                    self.metrics_server.close()
+                    self.metrics_server = None
+                if self.backplane:
+                    self.backplane.close()
                 if self.server_socket:
                     self.server_socket.close()
                 self.running = False
                 return False  # 실패를 명시적으로 반환
 
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        if observer in self.observers:
+            self.observers.remove(observer)
+
+    def notify(self, kind, value=None):
+        for observer in self.observers[:]:
+            observer(kind, value)
+
     def update_client_count(self):
-        if self.gui:
-            self.gui.client_count_label.config(
-                text=f"현재 클라이언트 수: {len(self.clients)}"
-            )
+        self.notify("clients", len(self.clients))
 
     def log_message(self, msg):
-        if self.gui:
-            self.gui.log_area.config(state="normal")
-            self.gui.log_area.insert(tk.END, msg + "\n")
-            self.gui.log_area.see(tk.END)
-            self.gui.log_area.config(state="disabled")
-        print(msg)
+        self.notify("log", msg)
 
     def refresh_netstat(self):
-        if self.gui:
-            self.gui.show_netstat_info()
-
+        self.notify("netstat")
 
-class ServerGUI:
-    def __init__(self, master, server: ChatServer):
-        self.master = master
-        self.server = server
-        self.server.gui = self
 
-        master.title("서버 GUI")
+def print_log(kind, value):
+    """GUI 없이 실행할 때 로그를 표준 출력으로 보내는 observer"""
+    if kind == "log":
+        print(value, flush=True)
 
-        self.log_area = scrolledtext.ScrolledText(
-            master, state="disabled", width=50, height=20
-        )
-        self.log_area.grid(row=0, column=0, padx=10, pady=10, sticky="n")
 
-        self.client_count_label = tk.Label(master, text="현재 클라이언트 수: 0")
-        self.client_count_label.grid(row=1, column=0, sticky="w", padx=10)
+def run_headless(server):
+    """GUI 없이 서버를 시작하고 SIGINT/SIGTERM을 받을 때까지 실행"""
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stopped.set())
+    if hasattr(signal, "SIGUSR1"):
+        # kill -USR1 <pid>: 실행 중에 프로파일 결과 저장
+        signal.signal(signal.SIGUSR1, lambda signum, frame: server.dump_profile())
+    server.add_observer(print_log)
+    if not server.start_server():
+        raise SystemExit(1)
+    while not stopped.wait(1):
+        pass
+    server.stop_server()
 
-        frame_buttons = tk.Frame(master)
-        frame_buttons.grid(row=2, column=0, pady=5, padx=10, sticky="w")
 
-        self.start_button = tk.Button(
-            frame_buttons, text="서버 시작", command=self.start_server
-        )
-        self.start_button.pack(side=tk.LEFT, padx=5)
+if __name__ == "__main__":
+    import argparse
+    from backplane import SocketBackplane
 
-        self.stop_button = tk.Button(
-            frame_buttons, text="서버 중지", command=self.stop_server, state="disabled"
-        )
-        self.stop_button.pack(side=tk.LEFT, padx=5)
+    parser = argparse.ArgumentParser(description="채팅/그림판 서버")
+    parser.add_argument("--mode", choices=SERVER_MODES, default="thread")
+    parser.add_argument(
+        "--policy",
+        choices=SLOW_CLIENT_POLICIES,
+        default="drop_oldest",
+        help="송신 큐가 가득 찬 느린 클라이언트 처리 정책",
+    )
+    parser.add_argument("--queue-max-bytes", type=int, default=1 << 20)
+    parser.add_argument("--queue-max-messages", type=int, default=10000)
+    parser.add_argument(
+        "--journal-dir", help="드로잉/채팅 기록을 저장할 디렉터리 (재시작 시 복구)"
+    )
+    parser.add_argument(
+        "--fsync", choices=FSYNC_POLICIES, default="interval", help="저널 fsync 정책"
+    )
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument(
+        "--recv-size", type=int, default=65536, help="소켓에서 한 번에 읽을 최대 바이트 수"
+    )
+    parser.add_argument(
+        "--backplane",
+        help="여러 서버가 방을 공유할 backplane 브로커 주소 (tcp://호스트:포트 또는 unix:///경로)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="2 이상이면 GUI 없이 SO_REUSEPORT 워커 프로세스 여러 개로 실행",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="127.0.0.1의 이 포트에서 Prometheus 메트릭(/metrics)과 JSON 통계(/stats) 제공",
+    )
+    parser.add_argument(
+        "--draw-limit",
+        type=DrawLimits.parse,
+        help="모든 방의 보낸 사람별 드로잉 제한 '초당개수[:버스트[:합치기ms]]' (예: 120:240:20)",
+    )
+    parser.add_argument(
+        "--room-limit",
+        action="append",
+        default=[],
+        metavar="방=초당개수[:버스트[:합치기ms]]",
+        help="방별 드로잉 제한 (여러 번 지정 가능, 예: lobby=60::30)",
+    )
+    parser.add_argument(
+        "--replay-window",
+        type=int,
+        default=2000,
+        help="재접속한 클라이언트에게 빠진 부분만 보내기 위해 방마다 보관할 최근 이벤트 수",
+    )
+    parser.add_argument(
+        "--no-compression",
+        action="store_true",
+        help="hello로 협상하는 연결별 zlib 스트림 압축을 쓰지 않음",
+    )
+    parser.add_argument(
+        "--compress-min",
+        type=int,
+        default=512,
+        help="송신 큐에서 한 번에 꺼낸 메시지가 이 바이트 이상일 때만 압축",
+    )
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help="처리 단계별 시간/이벤트 개수/샘플링 추적 기록 (/stats의 pipeline)",
+    )
+    parser.add_argument(
+        "--trace-every",
+        type=int,
+        default=1000,
+        help="--instrument일 때 이 개수의 프레임마다 하나씩 단계별 시각 기록 (0이면 안 함)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=Profiler.KINDS,
+        help="서버 스레드 프로파일링 (SIGUSR1 또는 중지 시 --profile-out에 저장)",
+    )
+    parser.add_argument("--profile-out", help="프로파일 결과 파일 경로")
+    parser.add_argument(
+        "--headless", action="store_true", help="GUI 없이 바로 시작 (로그는 표준 출력)"
+    )
+    args = parser.parse_args()
+    room_limits = {}
+    for item in args.room_limit:
+        name, _, spec = item.partition("=")
+        if not valid_room_name(name) or not spec:
+            parser.error(f"잘못된 --room-limit: {item}")
+        room_limits[name] = DrawLimits.parse(spec)
 
-        # --- netstat 결과 표시를 위한 UI 추가 ---
-        netstat_frame = tk.LabelFrame(master, text="포트 상태(netstat)", padx=5, pady=5)
-        netstat_frame.grid(row=0, column=1, rowspan=3, padx=10, pady=10, sticky="n")
+    if args.workers > 1:
+        from cluster import run_workers
 
-        self.netstat_text = scrolledtext.ScrolledText(
-            netstat_frame, width=80, height=20
+        run_workers(
+            args.workers,
+            host="0.0.0.0",
+            port=args.port,
+            mode=args.mode,
+            queue_max_bytes=args.queue_max_bytes,
+            queue_max_messages=args.queue_max_messages,
+            slow_client_policy=args.policy,
+            journal_dir=args.journal_dir,
+            fsync_policy=args.fsync,
+            recv_size=args.recv_size,
+            metrics_port=args.metrics_port,
+            instrument=args.instrument,
+            trace_every=args.trace_every,
+            profile=args.profile,
+            profile_out=args.profile_out,
+            draw_limits=args.draw_limit,
+            room_limits=room_limits,
+            replay_window=args.replay_window,
+            compression=() if args.no_compression else protocol.COMPRESSION_METHODS,
+            compress_min=args.compress_min,
         )
-        self.netstat_text.pack(pady=(0, 5))
+        raise SystemExit
 
-        self.netstat_button = tk.Button(
-            netstat_frame, text="netstat 조회", command=self.show_netstat_info
-        )
-        self.netstat_button.pack()
+    server = ChatServer(
+        host="0.0.0.0",
+        port=args.port,
+        mode=args.mode,
+        queue_max_bytes=args.queue_max_bytes,
+        queue_max_messages=args.queue_max_messages,
+        slow_client_policy=args.policy,
+        journal_dir=args.journal_dir,
+        fsync_policy=args.fsync,
+        backplane=SocketBackplane(args.backplane) if args.backplane else None,
+        recv_size=args.recv_size,
+        metrics_port=args.metrics_port,
+        instrument=args.instrument,
+        trace_every=args.trace_every,
+        profile=args.profile,
+        profile_out=args.profile_out,
+        draw_limits=args.draw_limit,
+        room_limits=room_limits,
+        replay_window=args.replay_window,
+        compression=() if args.no_compression else protocol.COMPRESSION_METHODS,
+        compress_min=args.compress_min,
+    )
+    if args.headless:
+        run_headless(server)
+    else:
+        from server_gui import run_gui
 
-        # Grid 설정
-        master.grid_columnconfigure(0, weight=1)
-        master.grid_columnconfigure(1, weight=1)
-
-    def show_netstat_info(self):
-        port = self.server.port
-        info = get_netstat_info(port)
-        self.netstat_text.delete("1.0", tk.END)
-        self.netstat_text.insert(tk.END, info)
-
-    def start_server(self):
-        success = self.server.start_server()
-        if success:
-            self.start_button.config(state="disabled")
-            self.stop_button.config(state="normal")
-        else:
-            # 서버 시작 실패 시 버튼 상태 복구
-            self.start_button.config(state="normal")
-            self.stop_button.config(state="disabled")
-
-    def stop_server(self):
-        self.server.stop_server()
-        self.start_button.config(state="normal")
-        self.stop_button.config(state="disabled")
-
-
-if __name__ == "__main__":
-    # 메인 윈도우가 닫힐 때 서버 종료를 보장하기 위한 함수
-    def on_closing():
-        if server:
-            server.stop_server()
-        root.destroy()
-
-    root = tk.Tk()
-    server = ChatServer(host="0.0.0.0", port=9000)
-    gui = ServerGUI(root, server)
-    root.protocol("WM_DELETE_WINDOW", on_closing)  # 창 닫기 이벤트 처리
-    root.mainloop()
+        run_gui(server)
@@ -0,0 +1,195 @@
+"""
+서버 GUI (Tkinter).
+
+ChatServer는 GUI를 모르고 observer로 이벤트만 알린다. 네트워크 스레드는 EventQueue에
+이벤트를 넣기만 하고, GUI 스레드가 after()로 일정 간격마다 꺼내서 위젯에 반영한다.
+소켓 상태 조회(network_utils.get_netstat_info)도 GUI 쪽 스레드에서 하고 결과는 같은 큐로
+돌려받는다.
+"""
+
+import threading
+import time
+import tkinter as tk
+from collections import deque
+from tkinter import scrolledtext
+
+from logview import LogView
+from network_utils import get_netstat_info
+
+POLL_MS = 100  # 이벤트 큐를 확인하는 간격
+NETSTAT_INTERVAL = 2.0  # 접속/퇴장이 몰려도 netstat은 이 간격(초)에 한 번만 자동 조회
+
+
+class EventQueue:
+    """
+    서버 observer로 등록해서 이벤트를 모아 두는 큐.
+    어느 스레드에서든 호출할 수 있고, GUI 스레드가 drain으로 한꺼번에 꺼낸다.
+    GUI가 멈춰 있는 동안 maxlen을 넘으면 오래된 이벤트부터 버린다.
+    """
+
+    def __init__(self, maxlen=10000):
+        self.events = deque(maxlen=maxlen)
+
+    def __call__(self, kind, value=None):
+        self.events.append((kind, value))
+
+    def drain(self):
+        events = []
+        while True:
+            try:
+                events.append(self.events.popleft())
+            except IndexError:
+                return events
+
+
+class ServerGUI:
+    def __init__(self, master, server):
+        self.master = master
+        self.server = server
+        self.events = EventQueue()
+        server.add_observer(self.events)
+        self.netstat_running = False  # netstat 조회 스레드가 실행 중인지
+        self.netstat_wanted = False  # 포트 상태가 바뀌어 다시 조회해야 하는지
+        self.last_netstat = 0
+
+        master.title("서버 GUI")
+
+        self.log_area = scrolledtext.ScrolledText(
+            master, state="disabled", width=50, height=20
+        )
+        self.log_area.grid(row=0, column=0, padx=10, pady=10, sticky="n")
+        # 최근 2000줄만 위젯에 두고 이전 로그는 위로 스크롤하면 임시 파일에서 불러옴
+        self.log_view = LogView(self.log_area, capacity=2000)
+
+        self.client_count_label = tk.Label(master, text="현재 클라이언트 수: 0")
+        self.client_count_label.grid(row=1, column=0, sticky="w", padx=10)
+
+        frame_buttons = tk.Frame(master)
+        frame_buttons.grid(row=2, column=0, pady=5, padx=10, sticky="w")
+
+        self.start_button = tk.Button(
+            frame_buttons, text="서버 시작", command=self.start_server
+        )
+        self.start_button.pack(side=tk.LEFT, padx=5)
+
+        self.stop_button = tk.Button(
+            frame_buttons, text="서버 중지", command=self.stop_server, state="disabled"
+        )
+        self.stop_button.pack(side=tk.LEFT, padx=5)
+
+        # --- netstat 결과 표시를 위한 UI 추가 ---
+        netstat_frame = tk.LabelFrame(master, text="포트 상태(netstat)", padx=5, pady=5)
+        netstat_frame.grid(row=0, column=1, rowspan=3, padx=10, pady=10, sticky="n")
+
+        self.netstat_text = scrolledtext.ScrolledText(
+            netstat_frame, width=80, height=20
+        )
+        self.netstat_text.pack(pady=(0, 5))
+
+        self.netstat_button = tk.Button(
+            netstat_frame, text="netstat 조회", command=self.show_netstat_info
+        )
+        self.netstat_button.pack(side=tk.LEFT)
+
+        self.queue_button = tk.Button(
+            netstat_frame, text="송신 큐 상태", command=self.show_queue_stats
+        )
+        self.queue_button.pack(side=tk.LEFT, padx=5)
+
+        # Grid 설정
+        master.grid_columnconfigure(0, weight=1)
+        master.grid_columnconfigure(1, weight=1)
+
+        self.master.after(POLL_MS, self.poll_events)
+
+    def poll_events(self):
+        """쌓인 서버 이벤트를 한꺼번에 위젯에 반영 (GUI 스레드)"""
+        logs = []
+        count = None
+        for kind, value in self.events.drain():
+            if kind == "log":
+                logs.append(value)
+            elif kind == "clients":
+                count = value
+            elif kind == "netstat":
+                self.netstat_wanted = True
+            elif kind == "netstat_result":
+                self.netstat_running = False
+                self.netstat_text.delete("1.0", tk.END)
+                self.netstat_text.insert(tk.END, value)
+        if logs:
+            self.log_view.extend(logs)
+            self.log_view.flush()  # 이미 POLL_MS마다 모아서 들어옴
+        if count is not None:
+            self.client_count_label.config(text=f"현재 클라이언트 수: {count}")
+        if (
+            self.netstat_wanted
+            and time.monotonic() - self.last_netstat >= NETSTAT_INTERVAL
+        ):
+            self.show_netstat_info()
+        self.master.after(POLL_MS, self.poll_events)
+
+    def show_netstat_info(self):
+        """소켓 상태는 별도 스레드에서 조회하고 결과는 이벤트 큐로 받음"""
+        self.netstat_wanted = False
+        if self.netstat_running:
+            return
+        self.netstat_running = True
+        self.last_netstat = time.monotonic()
+        port = self.server.port
+        threading.Thread(
+            target=lambda: self.events("netstat_result", get_netstat_info(port)),
+            daemon=True,
+        ).start()
+
+    def show_queue_stats(self):
+        # 송신 큐가 밀린 클라이언트부터 표시 (RTT/커널 송신 큐는 마지막 조회 값)
+        stats = sorted(
+            self.server.connection_stats(), key=lambda item: item["bytes"], reverse=True
+        )
+        lines = [
+            f"{item['name']}({item['room']}): 대기 {item['messages']}개/{item['bytes']}B "
+            f"(최대 {item['peak_messages']}개/{item['peak_bytes']}B), "
+            f"버림 {item['dropped']}, 합침 {item['coalesced']}"
+            + (
+                f", 압축({item['compression']}) {item['compressed_in']}B→{item['compressed_out']}B"
+                if item["compressed_batches"]
+                else ""
+            )
+            + (
+                f", RTT {item['rtt_us'] / 1000:.1f}ms, 커널 큐 {item['outq']}B"
+                if "rtt_us" in item and "outq" in item
+                else ""
+            )
+            for item in stats
+        ]
+        self.netstat_text.delete("1.0", tk.END)
+        self.netstat_text.insert(tk.END, "\n".join(lines) or "접속한 클라이언트 없음")
+
+    def start_server(self):
+        success = self.server.start_server()
+        if success:
+            self.start_button.config(state="disabled")
+            self.stop_button.config(state="normal")
+        else:
+            # 서버 시작 실패 시 버튼 상태 복구
+            self.start_button.config(state="normal")
+            self.stop_button.config(state="disabled")
+
+    def stop_server(self):
+        self.server.stop_server()
+        self.start_button.config(state="normal")
+        self.stop_button.config(state="disabled")
+
+
+def run_gui(server):
+    # 메인 윈도우가 닫힐 때 서버 종료를 보장하기 위한 함수
+    def on_closing():
+        server.stop_server()
+        gui.log_view.close()
+        root.destroy()
+
+    root = tk.Tk()
+    gui = ServerGUI(root, server)
+    root.protocol("WM_DELETE_WINDOW", on_closing)  # 창 닫기 이벤트 처리
+    root.mainloop()
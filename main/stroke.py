@@ -0,0 +1,67 @@
+"""
+획(stroke) 점 목록 간소화 함수.
+네트워크로 보내기 전에 눈에 띄지 않는 범위에서 점 개수를 줄이는 데 사용한다.
+"""
+
+import math
+
+
+def distance_filter(points, min_distance):
+    """직전에 남긴 점과 min_distance보다 가까운 점을 제거 (마지막 점은 유지)"""
+    if len(points) <= 2 or min_distance <= 0:
+        return list(points)
+    kept = [points[0]]
+    for point in points[1:-1]:
+        last = kept[-1]
+        if math.hypot(point[0] - last[0], point[1] - last[1]) >= min_distance:
+            kept.append(point)
+    kept.append(points[-1])
+    return kept
+
+
+def _line_distance(point, start, end):
+    if start == end:
+        return math.hypot(point[0] - start[0], point[1] - start[1])
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    return abs(dy * point[0] - dx * point[1] + end[0] * start[1] - end[1] * start[0]) / (
+        math.hypot(dx, dy)
+    )
+
+
+def rdp(points, epsilon):
+    """
+    Ramer-Douglas-Peucker 알고리즘.
+    양 끝점을 잇는 선분에서 epsilon 픽셀 이상 벗어난 점만 남긴다.
+    """
+    if len(points) <= 2 or epsilon <= 0:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        max_distance = 0
+        index = first
+        for i in range(first + 1, last):
+            distance = _line_distance(points[i], points[first], points[last])
+            if distance > max_distance:
+                max_distance = distance
+                index = i
+        if max_distance > epsilon:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def simplify(points, anchor=None, epsilon=0.0, min_distance=0.0):
+    """
+    전송할 점 목록을 간소화. anchor(직전에 보낸 점)를 기준점으로 포함해서
+    계산하므로 조각 경계에서 선이 끊기거나 휘지 않는다. anchor는 결과에서 제외
+    """
+    work = ([anchor] if anchor is not None else []) + list(points)
+    if min_distance > 0:
+        work = distance_filter(work, min_distance)
+    if epsilon > 0:
+        work = rdp(work, epsilon)
+    return work[1:] if anchor is not None else work
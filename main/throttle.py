@@ -0,0 +1,166 @@
+"""
+보낸 사람별 드로잉 트래픽 제한과 move 이벤트 합치기.
+
+빠르게 그리는 클라이언트(특히 segment를 쓰지 않는 기존 클라이언트)는 점마다 move
+이벤트를 보내고, 서버는 그 하나하나를 히스토리에 기록하고 방 전체에 전달한다.
+방마다 DrawThrottle을 두고 relay 전에 거친다.
+
+- 토큰 버킷: 보낸 사람마다 초당 rate개(최대 burst개까지 몰아서)의 move/segment만
+  받고 넘치는 것은 버림. start/end/clear는 획 구조가 깨지지 않도록 항상 통과
+- 합치기: coalesce_ms 동안 같은 보낸 사람의 move 좌표를 모아 segment 이벤트 하나로
+  기록/전달. 같은 사람의 다른 이벤트(start/end/segment)가 오면 그 전에 먼저 내보냄
+"""
+
+import time
+
+MAX_SEGMENT_POINTS = 127  # 모은 점이 이만큼이면 기한 전이라도 내보냄 (바이너리 레코드 하나)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now, cost=1):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+
+class DrawLimits:
+    """방 하나의 드로잉 트래픽 설정"""
+
+    def __init__(self, rate=0, burst=None, coalesce_ms=0):
+        if rate < 0 or coalesce_ms < 0:
+            raise ValueError("rate와 coalesce_ms는 0 이상이어야 합니다")
+        self.rate = rate  # 보낸 사람당 초당 move/segment 이벤트 수 (0이면 제한 없음)
+        self.burst = burst if burst else max(1, rate)  # 한 번에 몰아서 받을 수 있는 개수
+        self.coalesce_ms = coalesce_ms  # move를 모아 둘 시간 (0이면 합치지 않음)
+
+    @classmethod
+    def parse(cls, text):
+        """'rate[:burst[:coalesce_ms]]' 형식 (예: '120:240:20')"""
+        parts = [float(part) if part else 0 for part in text.split(":")]
+        if len(parts) > 3:
+            raise ValueError(f"잘못된 드로잉 제한: {text}")
+        rate, burst, coalesce_ms = (parts + [0, 0])[:3]
+        return cls(rate, burst, coalesce_ms)
+
+    def __bool__(self):
+        return bool(self.rate or self.coalesce_ms)
+
+    def to_dict(self):
+        return {"rate": self.rate, "burst": self.burst, "coalesce_ms": self.coalesce_ms}
+
+
+class DrawThrottle:
+    """
+    방 하나의 보낸 사람별 토큰 버킷과 합치는 중인 move 좌표.
+    room.lock 안에서 호출하며, 결과로 실제로 기록/전달할 (보낸 사람, 이벤트) 목록을 반환
+    """
+
+    def __init__(self, limits=None):
+        self.buckets = {}  # 보낸 사람 -> TokenBucket
+        self.pending = {}  # 보낸 사람 -> (기한, 모은 좌표 목록)
+        self.next_deadline = None  # pending 중 가장 빠른 기한
+        self.shed = 0  # 제한을 넘어 버린 이벤트 수
+        self.merged = 0  # segment로 합쳐져 따로 전달되지 않은 move 수
+        self.segments = 0  # 합쳐서 만든 segment 수
+        self.set_limits(limits or DrawLimits())
+
+    def set_limits(self, limits):
+        self.limits = limits
+        self.interval = limits.coalesce_ms / 1000
+        self.buckets.clear()
+
+    def submit(self, sender, event, now=None):
+        """받은 드로잉 이벤트 하나를 처리하고 지금 내보낼 (보낸 사람, 이벤트) 목록을 반환"""
+        if not self.limits and not self.pending:
+            return [(sender, event)]
+        if now is None:
+            now = time.monotonic()
+        out = self.expire(now) if self.next_deadline and now >= self.next_deadline else []
+        if event["type"] == "clear":
+            # 지우기 전에 그려진 점이 지운 뒤에 나타나지 않도록 모두 먼저 내보냄
+            out.extend(self.flush_all())
+            out.append((sender, event))
+            return out
+        action = event.get("action")
+        if action in ("move", "segment") and self.limits.rate:
+            bucket = self.buckets.get(sender)
+            if bucket is None:
+                bucket = self.buckets[sender] = TokenBucket(
+                    self.limits.rate, self.limits.burst, now
+                )
+            if not bucket.take(now):
+                self.shed += 1
+                return out
+        if action == "move" and self.interval:
+            pending = self.pending.get(sender)
+            if pending is None:
+                deadline = now + self.interval
+                pending = self.pending[sender] = (deadline, [])
+                if self.next_deadline is None or deadline < self.next_deadline:
+                    self.next_deadline = deadline
+            pending[1].append((event["x"], event["y"]))
+            if len(pending[1]) >= MAX_SEGMENT_POINTS:
+                out.append(self.flush(sender))
+            return out
+        if sender in self.pending:
+            out.append(self.flush(sender))
+        out.append((sender, event))
+        return out
+
+    def flush(self, sender):
+        """보낸 사람이 모아 둔 좌표를 이벤트 하나로 만듦 (점이 하나면 move 그대로)"""
+        _, points = self.pending.pop(sender)
+        if not self.pending:
+            self.next_deadline = None
+        if len(points) == 1:
+            x, y = points[0]
+            return sender, {"type": "draw", "action": "move", "x": x, "y": y}
+        self.merged += len(points) - 1
+        self.segments += 1
+        return sender, {"type": "draw", "action": "segment", "points": [list(p) for p in points]}
+
+    def flush_all(self):
+        return [self.flush(sender) for sender in list(self.pending)]
+
+    def expire(self, now=None):
+        """기한이 지난 좌표를 내보냄 (타이머 스레드, 다음 이벤트가 올 때)"""
+        if self.next_deadline is None:
+            return []
+        if now is None:
+            now = time.monotonic()
+        out = [
+            self.flush(sender)
+            for sender, (deadline, _) in list(self.pending.items())
+            if deadline <= now
+        ]
+        if self.pending:
+            self.next_deadline = min(deadline for deadline, _ in self.pending.values())
+        return out
+
+    def forget(self, sender):
+        """보낸 사람이 방을 나갈 때: 모아 둔 좌표를 반환하고 버킷을 지움"""
+        self.buckets.pop(sender, None)
+        if sender in self.pending:
+            return [self.flush(sender)]
+        return []
+
+    def stats(self):
+        item = self.limits.to_dict()
+        item.update(
+            shed=self.shed,
+            merged=self.merged,
+            segments=self.segments,
+            pending_senders=len(self.pending),
+        )
+        return item